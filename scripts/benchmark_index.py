@@ -0,0 +1,48 @@
+"""
+Benchmark of the workflow index on large generated workflows.
+
+Run with `python -m scripts.benchmark_index`. Indexing should stay linear:
+the time per step printed for each size should not grow with the size.
+"""
+
+import time
+
+from src.workflow_index import index_workflow
+
+SIZES = (1_000, 10_000, 100_000)
+RUNS = 3
+
+
+def generate_workflow(steps: int) -> str:
+    """Generate a workflow of `steps` steps, mixing every kind of line indexed"""
+    lines = ["name: Generated", "on: push", "jobs:", "  build:"]
+    lines += ["    container:", "      image: node:18 # runtime", "    steps:"]
+    for step in range(steps):
+        if step % 4 == 0:
+            lines.append(f"      - uses: actions/checkout@v{step % 5} # step {step}")
+        elif step % 4 == 1:
+            lines.append(f'      - uses: "octo-org/action-{step}@main"')
+        elif step % 4 == 2:
+            lines += ["      - run: |", "          echo 'uses: not/an-action@v1'"]
+        else:
+            lines += ["      # uses: commented/out@v1", "      - name: Step"]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    for steps in SIZES:
+        content = generate_workflow(steps)
+        timings = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            index = index_workflow(content)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(
+            f"{steps:>8} steps, {len(content) / 1e6:6.2f} MB: {best * 1e3:8.1f} ms, "
+            f"{best / steps * 1e6:5.2f} µs per step, {len(index.uses)} uses indexed"
+        )
+
+
+if __name__ == "__main__":
+    main()
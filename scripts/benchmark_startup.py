@@ -0,0 +1,69 @@
+"""
+Benchmark of the two ways the GitHub Action can run gha-pinner.
+
+Run with `python scripts/benchmark_startup.py [--pyz PATH] [--runs N]`. It
+compares installing gha-pinner into a fresh virtual environment with pip, then
+starting it, to starting the zipapp (built with scripts/build_zipapp.py if no
+archive is given), which needs no installation.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import venv
+from typing import List
+
+from build_zipapp import ROOT, build
+
+
+def _timed(command: List[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def _start_up(command: List[str], runs: int) -> str:
+    # The first run warms the file system cache, as the checkout does in a job
+    _timed(command)
+    timings = [_timed(command) for _ in range(runs)]
+    return (
+        f"median {statistics.median(timings) * 1e3:6.0f} ms, "
+        f"min {min(timings) * 1e3:6.0f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pyz", help="zipapp to benchmark, built if not given")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        pyz = args.pyz or os.path.join(work, "gha-pinner.pyz")
+        if not args.pyz:
+            build(pyz)
+
+        environment = os.path.join(work, "venv")
+        start = time.perf_counter()
+        venv.create(environment, with_pip=True)
+        bin_dir = os.path.join(environment, "Scripts" if os.name == "nt" else "bin")
+        subprocess.run(
+            [os.path.join(bin_dir, "pip"), "install", "--quiet", ROOT], check=True
+        )
+        install = time.perf_counter() - start
+
+        installed = _start_up(
+            [os.path.join(bin_dir, "gha-pinner"), "--version"], args.runs
+        )
+        zipped = _start_up([sys.executable, pyz, "--version"], args.runs)
+
+    print(f"pip install path: install {install:6.1f} s, start-up {installed}")
+    print(f"zipapp path:      install    0.0 s, start-up {zipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Build gha-pinner as a single-file zipapp, runnable without installing anything.
+
+Run with `python scripts/build_zipapp.py [OUTPUT]` (dist/gha-pinner.pyz by
+default). The dependencies are vendored from their pure-Python wheels, at the
+versions of poetry.lock, so the archive runs on any platform. Every module is
+precompiled: the bytecode is used by the Python version that built the archive,
+other versions falling back to the sources, which are kept. The tests are left
+out.
+"""
+
+import argparse
+import compileall
+import glob
+import os
+import py_compile
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipapp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(ROOT, "dist", "gha-pinner.pyz")
+LOCK_FILE = os.path.join(ROOT, "poetry.lock")
+# The name and version of each [[package]] of the lock file
+LOCKED_PACKAGE_PATTERN = r'(?m)^\[\[package\]\]\nname = "([^"]+)"\nversion = "([^"]+)"$'
+INTERPRETER = "/usr/bin/env python3"
+ENTRY_POINT = "src.main:app"
+# Installed alongside the packages, but useless to import them
+EXCLUDED = ("bin", "src/test")
+EXTENSION_SUFFIXES = (".so", ".pyd", ".dylib")
+
+
+def _pip(*args: str) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "pip", "--disable-pip-version-check", *args],
+        check=True,
+    )
+
+
+def _write_constraints(path: str) -> None:
+    """Constrain the dependencies to the versions of the lock file"""
+    with open(LOCK_FILE) as f:
+        locked = re.findall(LOCKED_PACKAGE_PATTERN, f.read())
+    with open(path, "w") as f:
+        f.writelines(f"{name}=={version}\n" for name, version in locked)
+
+
+def _stage(staging: str, wheels: str) -> None:
+    """Install gha-pinner and its dependencies into the staging directory"""
+    _pip("wheel", "--no-deps", "--quiet", "--wheel-dir", wheels, ROOT)
+    [wheel] = glob.glob(os.path.join(wheels, "*.whl"))
+    constraints = os.path.join(wheels, "constraints.txt")
+    _write_constraints(constraints)
+    # Only pure-Python wheels: compiled extensions cannot be imported from a zip
+    _pip(
+        "install",
+        "--quiet",
+        "--no-compile",
+        "--target",
+        staging,
+        "--only-binary=:all:",
+        "--platform",
+        "any",
+        "--implementation",
+        "py",
+        "--constraint",
+        constraints,
+        wheel,
+    )
+    for excluded in EXCLUDED:
+        shutil.rmtree(os.path.join(staging, excluded), ignore_errors=True)
+
+    extensions = [
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(staging)
+        for name in names
+        if name.endswith(EXTENSION_SUFFIXES)
+    ]
+    if extensions:
+        sys.exit(f"❌ Compiled extensions cannot be vendored: {extensions}")
+
+
+def _compile(staging: str) -> None:
+    """Precompile the modules next to their sources, where zipimport finds them
+
+    The bytecode is not checked against the sources, whose timestamps do not
+    survive in the archive reliably: the archive is never edited in place.
+    """
+    if not compileall.compile_dir(
+        staging,
+        quiet=1,
+        legacy=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    ):
+        sys.exit("❌ Failed to compile the vendored modules")
+
+
+def build(output: str) -> None:
+    with tempfile.TemporaryDirectory() as work:
+        staging = os.path.join(work, "app")
+        _stage(staging, os.path.join(work, "wheels"))
+        _compile(staging)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        zipapp.create_archive(
+            staging,
+            output,
+            interpreter=INTERPRETER,
+            main=ENTRY_POINT,
+            compressed=True,
+        )
+    size = os.path.getsize(output) / 1e6
+    print(f"📦 Built {output} ({size:.1f} MB) for Python {sys.version.split()[0]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", nargs="?", default=DEFAULT_OUTPUT)
+    build(parser.parse_args().output)
+
+
+if __name__ == "__main__":
+    main()
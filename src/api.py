@@ -0,0 +1,240 @@
+"""
+Asynchronous library API, for embedding gha-pinner in other programs.
+
+Nothing is printed: results are returned as dataclasses and failures raised as
+the exceptions of `src.common.exceptions`. The blocking work of each call runs
+in its own thread pool, bounded by its `concurrency` argument.
+
+Calls share the state of the process with each other and with the CLI: the
+resolution cache and its backends (see `src.cache`), so that repeated calls do
+not query GitHub again, and the hosts configuration (see `src.hosts`), with the
+HTTP session and rate limit of each host. Configure them once, before the
+first call.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from src.common.action_status import ActionStatus
+from src.common.constants import DEFAULT_RESOLVE_WORKERS
+from src.common.exceptions import (
+    InvalidActionError,
+    InvalidConcurrencyError,
+    InvalidImageError,
+    ResolutionError,
+    WorkflowPathError,
+)
+from src.common.failure_reason import FailureReason
+from src.editor import find_workflow_files, scan_workflow_file
+from src.registry import resolve_image_digest
+from src.retriever import resolve_action_sha, resolve_latest_release_tag, split_action
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """The outcome of resolving an action to its commit SHA"""
+
+    action: str
+    sha: Optional[str]
+    reason: Optional[FailureReason] = None
+    message: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.sha is not None
+
+
+@dataclass(frozen=True)
+class ActionResult:
+    """An action found in a workflow file"""
+
+    action: str
+    status: ActionStatus
+    sha: Optional[str] = None
+    original_ref: Optional[str] = None
+    reason: Optional[FailureReason] = None
+    message: Optional[str] = None
+    line: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """The actions found in a workflow file"""
+
+    path: str
+    actions: List[ActionResult] = field(default_factory=list)
+
+    @property
+    def needs_pinning(self) -> List[ActionResult]:
+        return [
+            action
+            for action in self.actions
+            if action.status == ActionStatus.NEEDS_PINNING
+        ]
+
+
+def _resolve_quietly(action: str) -> Tuple[Optional[str], Optional[FailureReason]]:
+    try:
+        return resolve_action_sha(action), None
+    except InvalidActionError:
+        return None, None
+    except ResolutionError as e:
+        return None, e.reason
+
+
+def _latest_tag_quietly(owner: str, repo: str) -> Optional[str]:
+    try:
+        return resolve_latest_release_tag(owner, repo)
+    except ResolutionError:
+        return None
+
+
+def _digest_quietly(image: str) -> Tuple[Optional[str], Optional[FailureReason]]:
+    try:
+        return resolve_image_digest(image), None
+    except InvalidImageError:
+        return None, None
+    except ResolutionError as e:
+        return None, e.reason
+
+
+def _resolution(action: str) -> Resolution:
+    try:
+        return Resolution(action, resolve_action_sha(action))
+    except ResolutionError as e:
+        return Resolution(action, None, e.reason, str(e))
+
+
+def _action_result(action: Dict[str, Any]) -> ActionResult:
+    reason = action.get("reason")
+    return ActionResult(
+        action=action["action"],
+        status=ActionStatus(action["status"]),
+        sha=action.get("sha"),
+        original_ref=action.get("original_ref"),
+        reason=FailureReason(reason) if reason else None,
+        message=action.get("message"),
+        line=action.get("line"),
+    )
+
+
+def _scan_file(path: str, validate_only: bool, pin_images: bool) -> FileResult:
+    actions = scan_workflow_file(
+        path,
+        validate_only,
+        _resolve_quietly,
+        _latest_tag_quietly,
+        _digest_quietly if pin_images else None,
+    )
+    return FileResult(path, [_action_result(action) for action in actions])
+
+
+async def _run_in_threads(
+    func: Callable[..., T], calls: Sequence[Tuple[Any, ...]], concurrency: int
+) -> List[T]:
+    """Run `func` on each tuple of arguments, at most `concurrency` at a time"""
+    if concurrency < 1:
+        raise InvalidConcurrencyError(concurrency)
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(calls))))
+    try:
+        return list(
+            await asyncio.gather(
+                *(loop.run_in_executor(executor, func, *args) for args in calls)
+            )
+        )
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def resolve(action: str) -> str:
+    """Retrieve the commit SHA of an action (owner/repo[/path]@ref)
+
+    Raises:
+        InvalidActionError: If the action is not in the expected format
+        ResolutionError: If the SHA could not be retrieved
+    """
+    results = await _run_in_threads(resolve_action_sha, [(action,)], 1)
+    return results[0]
+
+
+async def resolve_many(
+    actions: Sequence[str], concurrency: int = DEFAULT_RESOLVE_WORKERS
+) -> List[Resolution]:
+    """Retrieve the commit SHAs of many actions concurrently
+
+    Args:
+        actions: Actions in the owner/repo[/path]@ref format
+        concurrency: Maximum number of lookups in flight
+
+    Returns:
+        One resolution per action, in the same order, failed ones carrying the
+        reason of the failure
+
+    Raises:
+        InvalidActionError: If an action is not in the expected format, before
+            any lookup is made
+        InvalidConcurrencyError: If `concurrency` is less than 1
+    """
+    for action in actions:
+        if split_action(action) is None:
+            raise InvalidActionError(action)
+
+    unique = list(dict.fromkeys(actions))
+    resolutions = await _run_in_threads(
+        _resolution, [(action,) for action in unique], concurrency
+    )
+    by_action = dict(zip(unique, resolutions))
+    return [by_action[action] for action in actions]
+
+
+async def scan_file(
+    path: str, validate_only: bool = True, pin_images: bool = False
+) -> FileResult:
+    """Find the actions of a workflow file, pinning them unless `validate_only`
+
+    Container images are only looked up with `pin_images`.
+
+    Raises:
+        WorkflowPathError: If the file does not exist
+        NotWorkflowFileError: If the file is not a workflow file
+        OSError: If the file could not be read or written
+    """
+    results = await _run_in_threads(_scan_file, [(path, validate_only, pin_images)], 1)
+    return results[0]
+
+
+async def scan_tree(
+    path: str,
+    validate_only: bool = True,
+    concurrency: int = DEFAULT_RESOLVE_WORKERS,
+    pin_images: bool = False,
+) -> List[FileResult]:
+    """Find the actions of every workflow file in a directory, recursively
+
+    Args:
+        path: The directory to scan
+        validate_only: If False, pin the actions in the files
+        concurrency: Maximum number of files processed at once
+        pin_images: If True, also look up the digests of container images
+
+    Returns:
+        One result per workflow file
+
+    Raises:
+        WorkflowPathError: If the directory does not exist
+        InvalidConcurrencyError: If `concurrency` is less than 1
+    """
+    if not os.path.isdir(path):
+        raise WorkflowPathError(path)
+
+    files = find_workflow_files(path)
+    return await _run_in_threads(
+        _scan_file, [(file, validate_only, pin_images) for file in files], concurrency
+    )
@@ -0,0 +1,366 @@
+"""
+Cache of resolved action references, shared by every lookup of a run.
+
+Entries hold either a successful resolution or the reason of a definitive
+failure (e.g. a private action), the latter expiring sooner. They live in an
+in-memory mapping, which can be swapped for a multiprocessing proxy so that
+worker processes share a single cache.
+
+Behind the in-memory mapping, backends persist entries beyond a run: a local
+JSON file, loaded whole so that the next run starts warm, and remote services
+(see `src.remote_cache`) consulted on a miss and written to as entries are
+resolved. The file format is also used for the snapshots exported and imported
+by the `cache` subcommands, optionally gzip-compressed.
+"""
+
+import gzip
+import json
+import math
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import IO, Any, Dict, List, MutableMapping, Optional
+
+from src import metrics
+from src.common.constants import (
+    CACHE_FILE_FORMAT_VERSION,
+    DEFAULT_CACHE_TTL,
+    ERROR_LOADING_CACHE,
+    ERROR_SAVING_CACHE,
+    NEGATIVE_CACHE_TTL,
+    UNSUPPORTED_CACHE_VERSION_ERROR,
+)
+
+
+class CacheBackend(ABC):
+    """Where cache entries are kept beyond the in-memory mapping of a run"""
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return the entries to start the run with"""
+        return {}
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for `key`, asked when it is not in memory"""
+
+    @abstractmethod
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Record a newly resolved entry"""
+
+    def flush(self) -> None:
+        """Wait for the writes deferred by the backend, if any"""
+
+    def close(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Persist what is left to persist at the end of the run
+
+        Args:
+            entries: Every entry of the in-memory mapping
+        """
+        self.flush()
+
+
+def _open(path: str, mode: str, compressed: Optional[bool] = None) -> IO[str]:
+    """Open a cache file or snapshot, (de)compressing it if it is a .gz file"""
+    if compressed is None:
+        compressed = path.endswith(".gz")
+    return gzip.open(path, mode + "t") if compressed else open(path, mode)
+
+
+def _read(path: str) -> Dict[str, Any]:
+    """Read a cache file or snapshot, '-' reading from stdin"""
+    if path == "-":
+        return json.load(sys.stdin)
+    with _open(path, "r") as f:
+        return json.load(f)
+
+
+def _run_stats() -> Dict[str, int]:
+    """Cache lookups counted by this run"""
+    return {
+        name: int(
+            metrics.counter_value("gha_pinner_cache_requests_total", {"result": result})
+        )
+        for name, result in (("hits", "hit"), ("misses", "miss"))
+    }
+
+
+class FileBackend(CacheBackend):
+    """A local JSON file, read whole when the run starts and written at exit"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # Cache lookups counted by the runs that saved the file before this one
+        self.saved_stats = {"hits": 0, "misses": 0}
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            data = _read(self.path)
+            if data.get("version") != CACHE_FILE_FORMAT_VERSION:
+                return {}
+            stats = data.get("stats", {})
+            self.saved_stats = {
+                "hits": int(stats.get("hits", 0)),
+                "misses": int(stats.get("misses", 0)),
+            }
+            return data.get("entries", {})
+        except (OSError, ValueError, AttributeError) as e:
+            print(ERROR_LOADING_CACHE.format(self.path, e))
+            return {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        # Every entry of the file was loaded upfront
+        return None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        # Written along with the others on close
+        pass
+
+    def lifetime_stats(self) -> Dict[str, int]:
+        """Cache lookups counted across every run that saved the file, this one included"""
+        run_stats = _run_stats()
+        return {name: self.saved_stats[name] + run_stats[name] for name in run_stats}
+
+    def close(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        data = {
+            "version": CACHE_FILE_FORMAT_VERSION,
+            "entries": entries,
+            "stats": self.lifetime_stats(),
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with _open(tmp_path, "w", compressed=self.path.endswith(".gz")) as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(ERROR_SAVING_CACHE.format(self.path, e))
+
+
+_store: MutableMapping[str, Dict[str, Any]] = {}
+_backends: List[CacheBackend] = []
+
+
+def reset() -> None:
+    """Forget every entry and go back to an in-memory only cache"""
+    global _store, _backends
+    _store = {}
+    _backends = []
+
+
+def _file_backend() -> Optional[FileBackend]:
+    for backend in _backends:
+        if isinstance(backend, FileBackend):
+            return backend
+    return None
+
+
+def get_path() -> Optional[str]:
+    """Return the file the cache is persisted to, if any"""
+    backend = _file_backend()
+    return backend.path if backend else None
+
+
+def get_store() -> MutableMapping[str, Dict[str, Any]]:
+    """Return the mapping currently backing the cache"""
+    return _store
+
+
+def use_store(store: MutableMapping[str, Dict[str, Any]]) -> None:
+    """Back the cache with the given mapping (e.g. a multiprocessing proxy)"""
+    global _store
+    _store = store
+
+
+def get_backends() -> List[CacheBackend]:
+    """Return the backends behind the in-memory mapping"""
+    return list(_backends)
+
+
+def use_backend(backend: CacheBackend) -> None:
+    """Add a backend behind the in-memory mapping, starting with its entries"""
+    _backends.append(backend)
+    _store.update(backend.load())
+
+
+def load(path: str) -> None:
+    """Load the entries persisted in `path` and save back to it on `save()`"""
+    use_backend(FileBackend(path))
+
+
+def flush() -> None:
+    """Wait for every backend to complete its deferred writes"""
+    for backend in _backends:
+        backend.flush()
+
+
+def save() -> None:
+    """Persist the entries to every backend, e.g. the file passed to `load()`"""
+    entries = dict(_store.items())
+    for backend in _backends:
+        backend.close(entries)
+
+
+def _ttl(entry: Dict[str, Any]) -> float:
+    """Failed resolutions (entries with an "error") expire sooner, and immutable
+    entries (e.g. content addressed by commit SHA) never do"""
+    if entry.get("immutable"):
+        return math.inf
+    return NEGATIVE_CACHE_TTL if "error" in entry else DEFAULT_CACHE_TTL
+
+
+def _is_expired(entry: Dict[str, Any], now: float) -> bool:
+    return now - entry.get("resolved_at", 0) > _ttl(entry)
+
+
+def _read_through(key: str, now: float) -> Optional[Dict[str, Any]]:
+    """Ask the backends for an entry missing from memory"""
+    for backend in _backends:
+        entry = backend.get(key)
+        if entry is not None and not _is_expired(entry, now):
+            return entry
+    return None
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached entry for `key`, unless it is missing or expired"""
+    now = time.time()
+    entry = _store.get(key)
+    if entry is None or _is_expired(entry, now):
+        entry = _read_through(key, now)
+        if entry is None:
+            metrics.inc("gha_pinner_cache_requests_total", {"result": "miss"})
+            return None
+
+    metrics.inc("gha_pinner_cache_requests_total", {"result": "hit"})
+    # Assign a copy rather than mutating, so that proxied stores see the update
+    _store[key] = {**entry, "last_used": now}
+    return entry
+
+
+def store(key: str, **values: Any) -> None:
+    """Cache the given values for `key`, forever if `immutable=True` is given"""
+    entry = {**values, "resolved_at": time.time()}
+    _store[key] = entry
+    for backend in _backends:
+        backend.put(key, entry)
+
+
+def export_snapshot(path: str) -> int:
+    """Write every entry to a portable snapshot, '-' writing to stdout
+
+    Returns:
+        The number of exported entries
+    """
+    entries = dict(_store.items())
+    data = {"version": CACHE_FILE_FORMAT_VERSION, "entries": entries}
+    if path == "-":
+        json.dump(data, sys.stdout)
+        sys.stdout.write("\n")
+    else:
+        with _open(path, "w") as f:
+            json.dump(data, f)
+    return len(entries)
+
+
+def read_snapshot(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read the entries of a cache file or snapshot, '-' reading from stdin
+
+    Raises:
+        ValueError: If the snapshot is not in a supported format
+    """
+    data = _read(path)
+    if not isinstance(data, dict) or data.get("version") != CACHE_FILE_FORMAT_VERSION:
+        raise ValueError(UNSUPPORTED_CACHE_VERSION_ERROR.format(path))
+    return data.get("entries", {})
+
+
+def import_snapshot(path: str) -> int:
+    """Merge the entries of a snapshot into the cache, '-' reading from stdin
+
+    When both hold an entry for the same key, the most recently resolved wins.
+
+    Returns:
+        The number of imported entries
+
+    Raises:
+        ValueError: If the snapshot is not in a supported format
+    """
+    imported = 0
+    for key, entry in read_snapshot(path).items():
+        current = _store.get(key)
+        if current is None or entry.get("resolved_at", 0) > current.get(
+            "resolved_at", 0
+        ):
+            _store[key] = entry
+            imported += 1
+    return imported
+
+
+def prune(max_age: Optional[float] = None, max_entries: Optional[int] = None) -> int:
+    """Evict expired entries, then those older than `max_age` seconds (unless
+    immutable), then the least recently used ones until at most `max_entries`
+    are left
+
+    Returns:
+        The number of evicted entries
+    """
+    now = time.time()
+    evicted = [
+        key
+        for key, entry in _store.items()
+        if _is_expired(entry, now)
+        or (
+            max_age is not None
+            and not entry.get("immutable")
+            and now - entry.get("resolved_at", 0) > max_age
+        )
+    ]
+    for key in evicted:
+        del _store[key]
+
+    if max_entries is not None and len(_store) > max_entries:
+        by_last_use = sorted(
+            _store.items(),
+            key=lambda item: item[1].get("last_used", item[1].get("resolved_at", 0)),
+        )
+        for key, _ in by_last_use[: len(_store) - max_entries]:
+            del _store[key]
+            evicted.append(key)
+
+    return len(evicted)
+
+
+def stats() -> Dict[str, Any]:
+    """Count the entries by kind and the cache lookups of every saved run
+
+    Returns:
+        The number of entries, of resolved, failed and expired ones, of failures
+        per reason, and of cache hits and misses
+    """
+    now = time.time()
+    counts: Dict[str, Any] = {
+        "entries": 0,
+        "resolved": 0,
+        "failed": 0,
+        "expired": 0,
+        "failures": {},
+    }
+    for entry in _store.values():
+        counts["entries"] += 1
+        if _is_expired(entry, now):
+            counts["expired"] += 1
+        if "error" in entry:
+            counts["failed"] += 1
+            reason = entry["error"]
+            counts["failures"][reason] = counts["failures"].get(reason, 0) + 1
+        else:
+            counts["resolved"] += 1
+    backend = _file_backend()
+    lookups = backend.lifetime_stats() if backend else _run_stats()
+    return {**counts, **lookups}
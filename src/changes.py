@@ -0,0 +1,87 @@
+"""
+Selection of the files to process from a git diff or an explicit path list.
+
+Only local git plumbing is used, so restricting a run to the files touched by
+a pull request costs time proportional to the change, not to the repository.
+"""
+
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+from src.common.constants import GIT_COMMAND_ERROR
+
+
+def read_path_list(path: str) -> List[str]:
+    """Read paths separated by newlines or NUL characters (as with `git diff -z`)
+
+    Args:
+        path: File listing the paths, or '-' to read from stdin
+    """
+    if path == "-":
+        content = sys.stdin.read()
+    else:
+        with open(path, "r") as f:
+            content = f.read()
+
+    separator = "\0" if "\0" in content else "\n"
+    return [line.strip() for line in content.split(separator) if line.strip()]
+
+
+def _git(cwd: str, *args: str) -> Optional[str]:
+    """Run a git command, returning its output or None if it failed"""
+    try:
+        result = subprocess.run(
+            ["git", "-C", cwd, *args],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None) or str(e)
+        print(GIT_COMMAND_ERROR.format(" ".join(args), stderr.strip()))
+        return None
+    return result.stdout
+
+
+def changed_files(ref: str, path: str = ".") -> Optional[List[str]]:
+    """List the files changed since the merge base of `ref` and HEAD
+
+    Committed, staged, unstaged and untracked changes are all included, deleted
+    files are not.
+
+    Args:
+        ref: The git ref to compare with (e.g., 'origin/main')
+        path: Any path inside the repository
+
+    Returns:
+        Absolute paths of the changed files, or None if git failed
+    """
+    cwd = path if os.path.isdir(path) else os.path.dirname(path) or "."
+
+    toplevel = _git(cwd, "rev-parse", "--show-toplevel")
+    if toplevel is None:
+        return None
+    toplevel = toplevel.strip()
+
+    merge_base = _git(toplevel, "merge-base", ref, "HEAD")
+    if merge_base is None:
+        return None
+
+    diff = _git(
+        toplevel, "diff", "--name-only", "-z", "--diff-filter=d", merge_base.strip()
+    )
+    untracked = _git(toplevel, "ls-files", "--others", "--exclude-standard", "-z")
+    if diff is None or untracked is None:
+        return None
+
+    names = [name for name in (diff + untracked).split("\0") if name]
+    return [os.path.join(toplevel, name) for name in dict.fromkeys(names)]
+
+
+def is_within(file: str, dir: str) -> bool:
+    """Check if the file is inside the directory"""
+    file_path = os.path.realpath(file)
+    dir_path = os.path.realpath(dir)
+    return os.path.commonpath([file_path, dir_path]) == dir_path
@@ -10,9 +10,60 @@ VERSION = "v0.1.6"
 PROGRAM_DESCRIPTION = "📌 Pin third-party Github Actions using the commit SHA"
 ACTION_ARG_HELP = "🎯 The GitHub Action to pin (e.g., 'actions/checkout@v3')"
 VERSION_ARG_HELP = "🔍 Show gha-pinner's version and exit"
-FILE_ARG_HELP = "📄 The file in which to pin the actions (e.g., 'path/to/file.yml')"
+FILE_ARG_HELP = "📄 The files in which to pin the actions (e.g., 'path/to/file.yml')"
 DIR_ARG_HELP = "📂 The directory in which to pin the actions (e.g., 'path/to/dir')"
 VALIDATE_ARG_HELP = "🔍 Validate actions without modifying files"
+METRICS_FILE_ARG_HELP = "📊 Write Prometheus text-format metrics to this file on exit"
+CACHE_FILE_ARG_HELP = "💾 Persist resolved actions to this JSON file between runs"
+REPOS_ARG_HELP = "📦 Repository root directories to process"
+REPOS_FILE_ARG_HELP = "📜 File listing repository roots, one per line ('-' for stdin)"
+WORKERS_ARG_HELP = "⚙️ Number of worker processes"
+REPORT_ARG_HELP = "🧾 Write a JSON report of the results to this file"
+SHARD_ARG_HELP = "🧩 Only process shard K of N of the workflow files (e.g., '2/4')"
+REPORTS_ARG_HELP = "🧾 JSON reports to merge (as written by --report)"
+MERGED_REPORT_ARG_HELP = "🧾 Write the merged JSON report to this file"
+CHANGED_SINCE_ARG_HELP = (
+    "🌿 Only process files changed since the merge base with this git ref"
+)
+FILES_FROM_ARG_HELP = (
+    "📜 Only process the files listed in this file, one per line ('-' for stdin)"
+)
+CACHE_COMMAND_HELP = "💾 Manage the resolution cache file given with --cache-file"
+WARM_ACTIONS_ARG_HELP = (
+    "🎯 Actions to resolve ahead of time (e.g., 'actions/checkout@v4')"
+)
+WARM_FILE_ARG_HELP = "📜 File listing actions to resolve, one per line ('-' for stdin)"
+RESOLVE_WORKERS_ARG_HELP = "⚙️ Number of concurrent lookups"
+EXPORT_PATH_ARG_HELP = "📦 Snapshot file to write ('-' for stdout, '.gz' to compress)"
+IMPORT_PATH_ARG_HELP = "📦 Snapshot file to read ('-' for stdin)"
+MAX_AGE_ARG_HELP = "⏳ Evict entries resolved more than this many seconds ago"
+MAX_ENTRIES_ARG_HELP = "📏 Evict the least recently used entries beyond this count"
+REMOTE_CACHE_ARG_HELP = "🌐 Share resolved actions through the remote cache at this URL"
+SERVE_HOST_ARG_HELP = "🌐 Address to listen on"
+SERVE_PORT_ARG_HELP = "🔌 Port to listen on (0 picks a free port)"
+WATCH_DIR_ARG_HELP = "📂 The directory whose workflow files to watch"
+POLL_ARG_HELP = "🔁 Poll for changes instead of using inotify"
+DEBOUNCE_ARG_HELP = "⏳ Seconds without changes to wait for before revalidating"
+VERIFY_ARG_HELP = "🔎 Check that pinned SHAs match their version comment and belong to their repository"
+TRANSITIVE_ARG_HELP = "🔗 Also report unpinned actions used by the actions and reusable workflows used, recursively"
+UPDATE_PATHS_ARG_HELP = (
+    "📂 Workflow files or directories in which to update pinned actions"
+)
+UPDATE_POLICY_ARG_HELP = "📐 How far to update: any newer version (major), within the same major version (minor), or within the same minor version (patch)"
+UPDATE_VALIDATE_ARG_HELP = "🔍 Report available updates without modifying files"
+DIFF_ARG_HELP = "🩹 Write the changes as a unified diff to this file ('-' for stdout) instead of modifying files"
+CHECK_ARG_HELP = (
+    "🚦 Exit with a non-zero code if any file would change, without modifying files"
+)
+PIN_IMAGES_ARG_HELP = (
+    "🐳 Also pin Docker actions, job containers and service images to their digest"
+)
+HOSTS_CONFIG_ARG_HELP = "🏢 JSON file mapping owners to GitHub hosts (e.g., GitHub Enterprise Server) and their tokens"
+SEED_INDEX_ARG_HELP = "🌱 Seed index of pre-resolved actions to use instead of the bundled one ('none' to disable it)"
+SNAPSHOT_ARG_HELP = "📦 Cache file or snapshot to index ('-' for stdin)"
+SEED_INDEX_OUTPUT_ARG_HELP = "🌱 Seed index file to write"
+HEDGE_ARG_HELP = "🪁 Also ask the git ref advertisement for actions whose API lookup is slower than usual, taking the first answer"
+TRACE_ARG_HELP = "🛰️ Emit OpenTelemetry spans (requires the opentelemetry-api package)"
 
 # Error and info messages
 NO_ACTION_ERROR = "❌ No GitHub Action specified. Use -a/--action to specify an action."
@@ -22,7 +73,10 @@ EXPECTED_FORMAT_MESSAGE = (
     "💡 Expected format: owner/repo@ref (e.g., actions/checkout@v3)"
 )
 ERROR_RETRIEVING_SHA = "❌ Error retrieving SHA for {}: {}"
+KNOWN_FAILURE_MESSAGE = "🔒 Action '{}' recently failed to resolve ({}). Skipping."
 ERROR_RETRIEVING_LATEST_RELEASE = "❌ Error retrieving latest release for {}/{}: {}"
+NO_LATEST_RELEASE_ERROR = "❌ No release found for {}/{} to resolve '{}'"
+MISSING_SHA_ERROR = "❌ Error retrieving SHA for {}: no SHA in the response"
 PRIVATE_OR_INVALID_ACTION_ERROR = (
     "🔒 Action '{}' might be private or invalid. Skipping."
 )
@@ -32,10 +86,102 @@ ERROR_PROCESSING_FILE = "❌ Error processing file '{}': {}"
 ACTION_SKIP_ERROR = (
     "🔒 Skipping action '{}': Unable to retrieve SHA (might be private or invalid)"
 )
+ACTION_SKIP_WITH_REASON_ERROR = "🔒 Skipping action '{}': Unable to retrieve SHA ({})"
+INVALID_CONCURRENCY_ERROR = "Concurrency must be at least 1, got {}"
+UNRESOLVED_ACTION_MESSAGE = "Unable to retrieve SHA"
+SHARED_LINE_ACTION_MESSAGE = (
+    "Several actions on one line cannot each keep their version comment"
+)
 ACTION_PARSING_ERROR = "❌ Error parsing action '{}': {}"
 SUCCESS_PIN_MESSAGE = "✅ Successfully pinned actions in '{}'"
 SUCCESS_VALIDATION_MESSAGE = "✅ Successfully validated actions in '{}'"
 UNABLE_TO_PIN_ACTION = "🔒 Unable to pin action: {} (might be private or invalid)"
+ERROR_LOADING_CACHE = "⚠️ Ignoring unreadable cache file '{}': {}"
+ERROR_SAVING_CACHE = "⚠️ Unable to save cache file '{}': {}"
+NO_REPOS_ERROR = (
+    "❌ No repositories specified. Pass them as arguments or use --from-file."
+)
+REPO_SUMMARY_FORMAT = "📦 {}: {} need pinning, {} already pinned, {} skipped, {} errors"
+TOTAL_SUMMARY_FORMAT = "📊 Total ({} repositories): {} need pinning, {} already pinned, {} skipped, {} errors"
+INVALID_SHARD_ERROR = "Expected K/N with 1 <= K <= N (e.g., '2/4'), got '{}'"
+INCONSISTENT_SHARD_COUNTS_ERROR = "Reports were produced for different shard counts: {}"
+DUPLICATE_SHARDS_ERROR = "Several reports were produced for shards: {}"
+UNSHARDED_REPORT_ERROR = "Sharded reports cannot be merged with unsharded ones"
+UNSUPPORTED_REPORT_VERSION_ERROR = "Unsupported report format in '{}'"
+ERROR_READING_REPORT = "❌ Error reading report '{}': {}"
+ERROR_MERGING_REPORTS = "❌ Error merging reports: {}"
+MISSING_SHARDS_ERROR = "❌ Missing reports for shards: {}"
+MERGED_SUMMARY_FORMAT = (
+    "📊 Merged ({} files): {} need pinning, {} already pinned, {} skipped, {} errors"
+)
+GIT_COMMAND_ERROR = "❌ Error running 'git {}': {}"
+NO_CHANGED_FILES_MESSAGE = "✅ No workflow files to process"
+ERROR_PROCESSING_REPO = "❌ Error processing repository '{}': {}"
+NO_CACHE_FILE_ERROR = (
+    "❌ No cache file specified. Use --cache-file or set GHA_PINNER_CACHE_FILE."
+)
+NO_CACHE_ERROR = (
+    "❌ No cache specified. Use --cache-file or --remote-cache, or set "
+    "GHA_PINNER_CACHE_FILE or GHA_PINNER_REMOTE_CACHE."
+)
+NO_ACTIONS_ERROR = "❌ No actions specified. Pass them as arguments or use --from-file."
+UNSUPPORTED_CACHE_VERSION_ERROR = "Unsupported cache snapshot format in '{}'"
+ERROR_IMPORTING_CACHE = "❌ Error importing cache snapshot '{}': {}"
+ERROR_EXPORTING_CACHE = "❌ Error exporting cache snapshot '{}': {}"
+CACHE_WARMED_MESSAGE = "🔥 Resolved {} of {} actions into the cache"
+CACHE_EXPORTED_MESSAGE = "📦 Exported {} entries to '{}'"
+CACHE_IMPORTED_MESSAGE = "📥 Imported {} entries from '{}'"
+CACHE_PRUNED_MESSAGE = "🧹 Evicted {} entries, {} left"
+CACHE_ENTRIES_FORMAT = "📦 Entries: {} ({} resolved, {} failed, {} expired)"
+CACHE_FAILURES_FORMAT = "🔒 Failures: {}"
+CACHE_HIT_RATIO_FORMAT = "🎯 Hit ratio: {:.1%} ({} hits, {} misses)"
+CACHE_NO_LOOKUPS_MESSAGE = "🎯 Hit ratio: n/a (no lookups recorded yet)"
+REMOTE_CACHE_UNAVAILABLE_WARNING = (
+    "⚠️ Remote cache '{}' is unavailable ({}). Continuing without it for {}s."
+)
+CACHE_SERVER_STARTED_MESSAGE = "🌐 Serving the resolution cache on http://{}:{}"
+WATCHING_MESSAGE = "👀 Watching '{}' for changes ({}). Press Ctrl+C to stop."
+WATCH_RESULT_FORMAT = "⏱️ Validated '{}' in {:.1f} ms"
+WATCH_STOPPED_MESSAGE = "👋 Stopped watching '{}'"
+ERROR_FETCHING_FILE = "❌ Error fetching {} from {}/{}@{}: {}"
+UNPINNED_NESTED_ACTION_FORMAT = "❌ - {} used by {} is not pinned"
+TRANSITIVE_SUMMARY_FORMAT = (
+    "🔗 {} actions and reusable workflows inspected: {} unpinned nested actions"
+)
+INVALID_IMAGE_ERROR = "❌ Invalid image reference: '{}'"
+ERROR_RESOLVING_IMAGE = "❌ Error resolving the digest of image '{}': {}"
+IMAGE_NOT_FOUND_ERROR = "❌ Image '{}' not found or private"
+MISSING_DIGEST_ERROR = "❌ No digest returned for image '{}'"
+ERROR_LISTING_REFS = "❌ Error listing the {} of {}/{}: {}"
+ERROR_RETRIEVING_REPO = "❌ Error retrieving repository {}/{}: {}"
+ERROR_COMPARING_COMMITS = "❌ Error comparing {} with {} in {}/{}: {}"
+INVALID_HOSTS_CONFIG_ERROR = "Invalid hosts configuration '{}': {}"
+HOST_TOKEN_MISSING_WARNING = "⚠️ {} is not set, querying {} anonymously"
+ERROR_READING_ADVERTISED_REFS = "❌ Error reading the refs advertised by {}/{}: {}"
+REF_NOT_ADVERTISED_ERROR = "❌ {}/{} advertises no tag or branch named '{}'"
+INVALID_SEED_INDEX_ERROR = "Invalid seed index '{}': {}"
+ERROR_BUILDING_SEED_INDEX = "❌ Error building seed index from '{}': {}"
+SEED_INDEX_BUILT_MESSAGE = "🌱 Indexed {} actions into '{}'"
+HOST_RATE_LIMITED_ERROR = (
+    "⏳ The API rate limit of {} is exhausted until {}, not requesting {}"
+)
+DRIFTED_ACTION_FORMAT = "⚠️ - {} in '{}': {} points to {}"
+UNREACHABLE_ACTION_FORMAT = (
+    "🚫 - {} in '{}': commit not found in {}/{} (it may come from a fork)"
+)
+UNVERIFIABLE_ACTION_FORMAT = "❔ - {} in '{}': unable to verify"
+VERIFY_SUMMARY_FORMAT = (
+    "🔎 {} pinned actions verified: {} drifted, {} unreachable, {} unverifiable"
+)
+UPDATE_AVAILABLE_FORMAT = "⬆️ - {} # {} should be updated to {}@{} # {}"
+SUCCESS_UPDATE_MESSAGE = "✅ Updated {} actions in '{}'"
+WOULD_CHANGE_FORMAT = "📝 {} workflow files would be changed"
+UPDATE_SUMMARY_FORMAT = (
+    "📊 {} workflow files checked, tags of {} repositories listed: {} updates"
+)
+TRACING_UNAVAILABLE_WARNING = (
+    "⚠️ Tracing requested but opentelemetry-api is not installed. Continuing without it."
+)
 
 # Output formats
 ORIGINAL_ACTION_FORMAT = "Original: {}"
@@ -43,13 +189,128 @@ PINNED_ACTION_FORMAT = "Pinned:   {}@{}"
 NEEDS_PINNING_FORMAT = "❌ - {} should be pinned as {}@{}"
 
 # Regex patterns
-ACTION_REGEX_PATTERN = r"([^/]+)/([^@]+)@(.+)"
+# owner/repo[/path]@ref, where path points to an action or reusable workflow in the repo
+ACTION_REGEX_PATTERN = r"^([^/@\s]+)/([^/@\s]+)(?:/([^@\s]+))?@(\S+)$"
 SHA_REGEX_PATTERN = r"^[0-9a-f]{40}$"
-WORKFLOW_ACTION_PATTERN = r"(\s+uses:\s+)([^\s]+)"
+# v1, v1.2, 1.2.3, ... without pre-release or build suffixes
+VERSION_TAG_PATTERN = r"^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?$"
+# The comment written when pinning @latest
+LATEST_COMMENT_PATTERN = r"^latest \((\S+)\)$"
+# key: at the start of a line, possibly as the first key of a sequence item
+MAPPING_KEY_PATTERN = r"^[ \t]*(?:-[ \t]+)*([\w-]+):(?:[ \t]+|$)"
+# A value that is a flow collection ({...} or [...]), possibly as a sequence item
+FLOW_COLLECTION_PATTERN = r"^[ \t]*(?:-[ \t]+)*(?:([\w-]+):[ \t]+)?[{\[]"
+# key: inside a flow mapping
+FLOW_KEY_PATTERN = r"[{,][ \t]*([\w-]+):[ \t]+"
+# The header of a block scalar (| or >, with its modifiers), following its key
+BLOCK_SCALAR_PATTERN = r"[|>][-+0-9]*[ \t]*(?:#.*)?$"
+# A comment following a value, and its text
+TRAILING_COMMENT_PATTERN = r"[ \t]+#[ \t]*(.*?)[ \t]*$"
+# [registry[:port]/]repository[:tag][@digest], in lowercase as OCI requires
+IMAGE_REPOSITORY_PATTERN = (
+    r"^[a-z0-9]+(?:[._-][a-z0-9]+)*(?:/[a-z0-9]+(?:[._-][a-z0-9]+)*)*$"
+)
+IMAGE_TAG_PATTERN = r"^[\w][\w.-]{0,127}$"
+IMAGE_DIGEST_PATTERN = r"^sha256:[0-9a-f]{64}$"
+# key="value" parameters of a WWW-Authenticate challenge
+AUTH_CHALLENGE_PARAM_PATTERN = r'(\w+)="([^"]*)"'
+
+# API URL formats, relative to the API (or raw content) base URL of the host
+GITHUB_API_COMMITS_URL = "{}/repos/{}/{}/commits/{}"
+GITHUB_API_RELEASES_URL = "{}/repos/{}/{}/releases/latest"
+GITHUB_API_TAGS_URL = "{}/repos/{}/{}/tags?per_page=100"
+GITHUB_API_BRANCHES_URL = "{}/repos/{}/{}/branches?per_page=100"
+GITHUB_API_REPO_URL = "{}/repos/{}/{}"
+GITHUB_API_COMPARE_URL = "{}/repos/{}/{}/compare/{}...{}"
+GITHUB_RAW_URL = "{}/{}/{}/{}/{}"
+# Ref advertisement of the git smart HTTP protocol, relative to the git base URL
+GIT_INFO_REFS_URL = "{}/{}/{}.git/info/refs?service=git-upload-pack"
+OCI_MANIFEST_URL = "{}://{}/v2/{}/manifests/{}"
+
+# GitHub host settings
+GITHUB_HOST = "github.com"
+GITHUB_API_BASE_URL = "https://api.github.com"
+GITHUB_RAW_BASE_URL = "https://raw.githubusercontent.com"
+GITHUB_GIT_BASE_URL = "https://github.com"
+# Base URLs of GitHub Enterprise Server instances, given their host name
+GHES_API_BASE_URL = "https://{}/api/v3"
+GHES_RAW_BASE_URL = "https://{}/raw"
+GHES_GIT_BASE_URL = "https://{}"
+
+# Cache settings
+CACHE_FILE_FORMAT_VERSION = 1
+DEFAULT_CACHE_TTL = 6 * 60 * 60  # seconds
+NEGATIVE_CACHE_TTL = 60 * 60  # seconds, for actions that failed to resolve
+DEFAULT_RESOLVE_WORKERS = 8
+
+# Container registry settings
+DOCKER_ACTION_PREFIX = "docker://"
+DOCKER_HUB_REGISTRY = "registry-1.docker.io"
+DOCKER_HUB_ALIASES = ("docker.io", "index.docker.io")
+DOCKER_HUB_NAMESPACE = "library"  # of official images, e.g. alpine
+DEFAULT_IMAGE_TAG = "latest"
+# Registries reached over plain HTTP, as Docker does by default
+INSECURE_REGISTRY_HOSTS = ("localhost", "127.0.0.1")
+REGISTRY_TIMEOUT = 10.0  # seconds
+REGISTRY_TOKEN_TTL = 60  # seconds, when the token server does not say
+# Manifest media types accepted, multi-platform indexes first
+OCI_MANIFEST_MEDIA_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+)
+
+# Remote cache settings
+REMOTE_CACHE_PATH_PREFIX = "/v1/"
+REMOTE_CACHE_TIMEOUT = 2.0  # seconds
+REMOTE_CACHE_COOLDOWN = 60.0  # seconds without requests after a failure
+DEFAULT_CACHE_SERVER_HOST = "127.0.0.1"
+DEFAULT_CACHE_SERVER_PORT = 8787
+
+# Seed index settings
+SEED_INDEX_FILE = "data/seed-index.bin"  # relative to the src package
+SEED_INDEX_MAGIC = b"GHASEED\0"
+SEED_INDEX_FORMAT_VERSION = 1
+SEED_INDEX_DISABLED = "none"
+
+# Hedged resolution settings
+HEDGE_PERCENTILE = 0.95  # of the recent lookup durations, to hedge after
+HEDGE_WINDOW = 200  # recent lookup durations kept per host
+HEDGE_MIN_SAMPLES = 20  # lookup durations needed before trusting the percentile
+HEDGE_INITIAL_DELAY = 1.0  # seconds, until enough durations were observed
+HEDGE_MIN_DELAY = 0.05  # seconds
+HEDGE_MAX_WORKERS = 4 * DEFAULT_RESOLVE_WORKERS
+# Peeled annotated tags first, then tags and branches, as git resolves names
+ADVERTISED_REF_FORMATS = ("refs/tags/{}^{{}}", "refs/tags/{}", "refs/heads/{}")
+
+# Watch settings
+WATCH_DEBOUNCE = 0.2  # seconds
+WATCH_POLL_INTERVAL = 0.5  # seconds
+WATCH_STOP_CHECK_INTERVAL = 0.5  # seconds
+
+# Repository layout
+REPO_WORKFLOWS_DIR = ".github/workflows"
+ACTION_MANIFEST_FILES = ("action.yml", "action.yaml")
+
+# Transitive inspection settings
+MAX_TRANSITIVE_DEPTH = 10  # levels of nested actions below the workflows
+
+# Diff settings
+DIFF_CONTEXT_LINES = 3
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+# Report settings
+REPORT_FORMAT_VERSION = 1
 
-# API URL formats
-GITHUB_API_COMMITS_URL = "https://api.github.com/repos/{}/{}/commits/{}"
-GITHUB_API_RELEASES_URL = "https://api.github.com/repos/{}/{}/releases/latest"
+# Environment variables
+CACHE_FILE_ENV_VAR = "GHA_PINNER_CACHE_FILE"
+METRICS_FILE_ENV_VAR = "GHA_PINNER_METRICS_FILE"
+REMOTE_CACHE_ENV_VAR = "GHA_PINNER_REMOTE_CACHE"
+HOSTS_CONFIG_ENV_VAR = "GHA_PINNER_HOSTS_CONFIG"
+SEED_INDEX_ENV_VAR = "GHA_PINNER_SEED_INDEX"
+HEDGE_ENV_VAR = "GHA_PINNER_HEDGE"
+TRACE_ENV_VAR = "GHA_PINNER_TRACE"
 
 # File extensions
 WORKFLOW_FILE_EXTENSIONS = (".yml", ".yaml")
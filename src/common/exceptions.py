@@ -0,0 +1,74 @@
+"""
+Errors raised by the gha-pinner library API.
+"""
+
+from src.common.constants import (
+    FILE_NOT_FOUND_ERROR,
+    INVALID_ACTION_FORMAT_ERROR,
+    INVALID_CONCURRENCY_ERROR,
+    INVALID_HOSTS_CONFIG_ERROR,
+    INVALID_IMAGE_ERROR,
+    NOT_WORKFLOW_FILE_ERROR,
+)
+from src.common.failure_reason import FailureReason
+
+
+class GhaPinnerError(Exception):
+    """Base class of every error raised by gha-pinner"""
+
+
+class InvalidActionError(GhaPinnerError, ValueError):
+    """The action reference is not in the owner/repo[/path]@ref format"""
+
+    def __init__(self, action: str) -> None:
+        super().__init__(INVALID_ACTION_FORMAT_ERROR.format(action))
+        self.action = action
+
+
+class InvalidImageError(GhaPinnerError, ValueError):
+    """The container image reference is not a valid [registry/]repository[:tag]"""
+
+    def __init__(self, image: str) -> None:
+        super().__init__(INVALID_IMAGE_ERROR.format(image))
+        self.image = image
+
+
+class ResolutionError(GhaPinnerError):
+    """The commit SHA of an action could not be retrieved"""
+
+    def __init__(self, action: str, reason: FailureReason, message: str) -> None:
+        super().__init__(message)
+        self.action = action
+        self.reason = reason
+
+
+class WorkflowPathError(GhaPinnerError, FileNotFoundError):
+    """The workflow file or directory to scan does not exist"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(FILE_NOT_FOUND_ERROR.format(path))
+        self.path = path
+
+
+class NotWorkflowFileError(GhaPinnerError, ValueError):
+    """The file to scan is not a GitHub workflow file"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(NOT_WORKFLOW_FILE_ERROR.format(path))
+        self.path = path
+
+
+class HostsConfigError(GhaPinnerError, ValueError):
+    """The hosts configuration file cannot be read or is not valid"""
+
+    def __init__(self, path: str, reason: object) -> None:
+        super().__init__(INVALID_HOSTS_CONFIG_ERROR.format(path, reason))
+        self.path = path
+
+
+class InvalidConcurrencyError(GhaPinnerError, ValueError):
+    """The maximum number of concurrent lookups or files is not positive"""
+
+    def __init__(self, concurrency: int) -> None:
+        super().__init__(INVALID_CONCURRENCY_ERROR.format(concurrency))
+        self.concurrency = concurrency
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class FailureReason(Enum):
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    UNAUTHORIZED = "unauthorized"
+    RATE_LIMITED = "rate_limited"
+    UNAVAILABLE = "unavailable"
+
+
+# Failures that will not go away by retrying, and are therefore worth caching
+DEFINITIVE_FAILURES = (FailureReason.NOT_FOUND, FailureReason.FORBIDDEN)
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+# How far a pinned action may be updated from the version it is pinned to
+class UpdatePolicy(Enum):
+    MAJOR = "major"  # Any newer version
+    MINOR = "minor"  # Newer versions with the same major version
+    PATCH = "patch"  # Newer versions with the same major and minor versions
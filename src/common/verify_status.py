@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class VerifyStatus(Enum):
+    VERIFIED = "verified"
+    DRIFTED = "drifted"  # The version in the comment points to another commit
+    UNREACHABLE = "unreachable"  # The commit is not in the repository
+    UNVERIFIABLE = "unverifiable"
@@ -1,22 +1,53 @@
+import hashlib
 import os
 import re
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from src import metrics
+from src.changes import is_within
 from src.common.action_status import ActionStatus
 from src.common.constants import (
     ACTION_PARSING_ERROR,
     ACTION_SKIP_ERROR,
+    ACTION_SKIP_WITH_REASON_ERROR,
+    DOCKER_ACTION_PREFIX,
     ERROR_PROCESSING_FILE,
     FILE_NOT_FOUND_ERROR,
     NEEDS_PINNING_FORMAT,
     NOT_WORKFLOW_FILE_ERROR,
     SHA_REGEX_PATTERN,
+    SHARED_LINE_ACTION_MESSAGE,
     SUCCESS_PIN_MESSAGE,
     SUCCESS_VALIDATION_MESSAGE,
-    WORKFLOW_ACTION_PATTERN,
+    UNRESOLVED_ACTION_MESSAGE,
     WORKFLOW_FILE_EXTENSIONS,
 )
-from src.retriever import get_action_sha, get_latest_release_tag
+from src.common.exceptions import NotWorkflowFileError, WorkflowPathError
+from src.common.failure_reason import FailureReason
+from src.patch import DiffWriter
+from src.registry import get_image_digest, parse_image, resolve_image_digests
+from src.retriever import (
+    get_action_sha,
+    get_failure_reason,
+    get_latest_release_tag,
+    split_action,
+)
+from src.tracing import span
+from src.workflow_index import (
+    Edit,
+    IndexedValue,
+    apply_edits,
+    index_workflow,
+    replace_value,
+    set_comment,
+)
+
+# Returns the SHA of an action, or the reason why it could not be retrieved
+ShaResolver = Callable[[str], Tuple[Optional[str], Optional[FailureReason]]]
+# Returns the latest release tag of an owner/repo, if any
+TagResolver = Callable[[str, str], Optional[str]]
+# Returns the digest of a container image, or the reason why it could not be retrieved
+DigestResolver = Callable[[str], Tuple[Optional[str], Optional[FailureReason]]]
 
 
 def _is_sha_reference(ref: str) -> bool:
@@ -30,28 +61,106 @@ def _is_github_workflow_file(file: str) -> bool:
     return file.lower().endswith(WORKFLOW_FILE_EXTENSIONS)
 
 
-def _process_actions_in_workflow_content(
-    content: str, validate_only: bool = False
-) -> Tuple[str, List[Dict[str, str]]]:
-    """Process actions in the workflow content
+def _resolve_sha(action: str) -> Tuple[Optional[str], Optional[FailureReason]]:
+    sha = get_action_sha(action)
+    return sha, None if sha else get_failure_reason(action)
+
+
+def _is_unpinned_image(image: str) -> bool:
+    """Check if the image is a valid reference that is not pinned to a digest"""
+    parts = parse_image(image)
+    return parts is not None and parts[3] is None
+
+
+def find_workflow_edits(
+    content: str,
+    validate_only: bool,
+    resolve_sha: ShaResolver,
+    resolve_latest_tag: TagResolver,
+    resolve_digest: Optional[DigestResolver] = None,
+) -> Tuple[List[Edit], List[Dict[str, str]]]:
+    """Find the actions in the workflow content and the edits pinning them,
+    without printing
 
     Args:
         content: The workflow file content
-        validate_only: If True, only validate actions without modifying content
+        validate_only: If True, only validate actions, without any edit
+        resolve_sha: Returns the SHA of an action, or the reason it has none
+        resolve_latest_tag: Returns the latest release tag of owner/repo, if any
+        resolve_digest: Returns the digest of a container image, or the reason
+            it has none. Without it, `docker://` actions are skipped and job
+            containers and services are left alone.
 
     Returns:
         Tuple containing:
-        - Updated content (or original if validate_only=True)
-        - List of actions found with their details
+        - Edits to the content (none if validate_only=True)
+        - List of actions found with their details, and the line they are on
     """
-    # Find all actions in the format 'uses: owner/repo@ref' or other valid formats
-    # This pattern handles standard actions, actions with organization, and docker actions
-    pattern = WORKFLOW_ACTION_PATTERN
+    index = index_workflow(content)
     actions_found = []
-
-    def replace_action(match):
-        indent = match.group(1)
-        action = match.group(2)
+    edits: List[Edit] = []
+
+    # Images are looked up concurrently upfront, the lookups being network bound
+    digests: Dict[str, Tuple[Optional[str], Optional[FailureReason]]] = {}
+    if resolve_digest:
+        images = [
+            uses.value[len(DOCKER_ACTION_PREFIX) :]
+            for uses in index.uses
+            if uses.value.startswith(DOCKER_ACTION_PREFIX)
+        ]
+        images.extend(image.value for image in index.images)
+        images = [image for image in images if _is_unpinned_image(image)]
+        digests = resolve_image_digests(images, resolve_digest)
+
+    def pin_image(image: str, name: str) -> Optional[str]:
+        """Record the image (named `name` in the results), returning its pinned
+        reference if it needs pinning and was resolved"""
+        _, _, tag, pinned_digest = parse_image(image)
+        if pinned_digest:
+            actions_found.append(
+                {
+                    "action": name,
+                    "status": ActionStatus.ALREADY_PINNED,
+                    "sha": pinned_digest,
+                }
+            )
+            return None
+
+        digest, reason = digests[image]
+        if not digest:
+            error = {
+                "action": name,
+                "status": ActionStatus.ERROR,
+                "message": UNRESOLVED_ACTION_MESSAGE,
+            }
+            if reason:
+                error["reason"] = reason.value
+            actions_found.append(error)
+            return None
+
+        actions_found.append(
+            {
+                "action": name,
+                "status": ActionStatus.NEEDS_PINNING,
+                "original_ref": tag,
+                "sha": digest,
+            }
+        )
+        # The tag is kept for readability, the digest taking precedence over it
+        return None if validate_only else f"{image}@{digest}"
+
+    def pin_action(uses: IndexedValue) -> List[Edit]:
+        """Record the action, returning the edits pinning it"""
+        action = uses.value
+
+        # Docker images are pinned to their digest
+        image = action[len(DOCKER_ACTION_PREFIX) :]
+        if resolve_digest and action.startswith(DOCKER_ACTION_PREFIX):
+            if parse_image(image):
+                pinned = pin_image(image, action)
+                if pinned:
+                    return [replace_value(uses, f"{DOCKER_ACTION_PREFIX}{pinned}")]
+                return []
 
         # Try to parse the action reference
         try:
@@ -68,7 +177,7 @@ def _process_actions_in_workflow_content(
                             "sha": ref,
                         }
                     )
-                    return match.group(0)
+                    return []
 
                 # Store the original ref for comment
                 original_ref = ref
@@ -76,15 +185,14 @@ def _process_actions_in_workflow_content(
                 # If the reference is 'latest', get the actual latest version tag
                 if ref == "latest":
                     # Parse the owner and repo from the action
-                    parts = action_base.split("/")
-                    if len(parts) >= 2:
-                        owner = parts[-2]
-                        repo = parts[-1]
-                        latest_tag = get_latest_release_tag(owner, repo)
+                    parts = split_action(action)
+                    if parts:
+                        owner, repo, _, _ = parts
+                        latest_tag = resolve_latest_tag(owner, repo)
                         if latest_tag:
                             original_ref = f"latest ({latest_tag})"
 
-                sha = get_action_sha(action)
+                sha, reason = resolve_sha(action)
 
                 if sha:
                     # Add to found actions
@@ -97,23 +205,27 @@ def _process_actions_in_workflow_content(
                         }
                     )
 
-                    # Replace the reference with the SHA and append the original version as a comment
+                    # Replace the reference with the SHA and prefix the original
+                    # version to the comment, keeping the quotes and any comment
                     if validate_only:
-                        return match.group(0)
+                        return []
                     else:
-                        return f"{indent}{action_base}@{sha} # {original_ref}"
+                        return [
+                            replace_value(uses, f"{action_base}@{sha}"),
+                            set_comment(uses, original_ref, keep_existing=True),
+                        ]
                 else:
                     # If we couldn't get the SHA, it might be a private action or there was an error
-                    actions_found.append(
-                        {
-                            "action": action,
-                            "status": ActionStatus.ERROR,
-                            "message": "Unable to retrieve SHA",
-                        }
-                    )
-                    # Keep the original and print a message
-                    print(ACTION_SKIP_ERROR.format(action))
-                    return match.group(0)
+                    error = {
+                        "action": action,
+                        "status": ActionStatus.ERROR,
+                        "message": UNRESOLVED_ACTION_MESSAGE,
+                    }
+                    if reason:
+                        error["reason"] = reason.value
+                    actions_found.append(error)
+                    # Keep the original
+                    return []
             else:
                 # Not a GitHub action or already using a different format
                 actions_found.append(
@@ -123,28 +235,193 @@ def _process_actions_in_workflow_content(
                         "message": "Not a standard GitHub action format",
                     }
                 )
-                return match.group(0)
+                return []
         except Exception as e:
             actions_found.append(
                 {"action": action, "status": ActionStatus.ERROR, "message": str(e)}
             )
-            print(ACTION_PARSING_ERROR.format(action, e))
-            return match.group(0)
+            return []
+
+    for uses in index.uses:
+        recorded = len(actions_found)
+        edits.extend(pin_action(uses))
+        for action in actions_found[recorded:]:
+            action["line"] = uses.line
+
+    for uses in index.shared_line_uses:
+        actions_found.append(
+            {
+                "action": uses.value,
+                "status": ActionStatus.SKIPPED,
+                "message": SHARED_LINE_ACTION_MESSAGE,
+                "line": uses.line,
+            }
+        )
+
+    if resolve_digest:
+        for image in index.images:
+            recorded = len(actions_found)
+            pinned = (
+                pin_image(image.value, image.value)
+                if parse_image(image.value)
+                else None
+            )
+            if pinned:
+                edits.append(replace_value(image, pinned))
+            for action in actions_found[recorded:]:
+                action["line"] = image.line
+
+    return edits, actions_found
+
+
+def scan_workflow_content(
+    content: str,
+    validate_only: bool,
+    resolve_sha: ShaResolver,
+    resolve_latest_tag: TagResolver,
+    resolve_digest: Optional[DigestResolver] = None,
+) -> Tuple[str, List[Dict[str, str]]]:
+    """Find the actions in the workflow content and pin them, without printing
+
+    See `find_workflow_edits` for the arguments.
+
+    Returns:
+        Tuple containing:
+        - Updated content (or original if validate_only=True)
+        - List of actions found with their details, and the line they are on
+    """
+    edits, actions_found = find_workflow_edits(
+        content, validate_only, resolve_sha, resolve_latest_tag, resolve_digest
+    )
+    return apply_edits(content, edits), actions_found
+
+
+def _print_action_errors(actions_found: List[Dict[str, str]]) -> None:
+    for action in actions_found:
+        if action["status"] != ActionStatus.ERROR:
+            continue
+        if "reason" in action:
+            print(
+                ACTION_SKIP_WITH_REASON_ERROR.format(action["action"], action["reason"])
+            )
+        elif action["message"] == UNRESOLVED_ACTION_MESSAGE:
+            print(ACTION_SKIP_ERROR.format(action["action"]))
+        else:
+            print(ACTION_PARSING_ERROR.format(action["action"], action["message"]))
 
-    updated_content = re.sub(pattern, replace_action, content)
-    return updated_content, actions_found
 
+def _process_actions_in_workflow_content(
+    content: str, validate_only: bool = False, pin_images: bool = False
+) -> Tuple[str, List[Dict[str, str]]]:
+    """Process actions in the workflow content, printing the actions that failed
+
+    Args:
+        content: The workflow file content
+        validate_only: If True, only validate actions without modifying content
+        pin_images: If True, also pin container images to their digest
+
+    Returns:
+        Tuple containing:
+        - Updated content (or original if validate_only=True)
+        - List of actions found with their details
+    """
+    edits, actions_found = _find_edits_in_workflow_content(
+        content, validate_only, pin_images
+    )
+    return apply_edits(content, edits), actions_found
+
+
+def _find_edits_in_workflow_content(
+    content: str, validate_only: bool = False, pin_images: bool = False
+) -> Tuple[List[Edit], List[Dict[str, str]]]:
+    """Find the edits pinning the actions in the workflow content, printing the
+    actions that failed"""
+    edits, actions_found = find_workflow_edits(
+        content,
+        validate_only,
+        _resolve_sha,
+        get_latest_release_tag,
+        get_image_digest if pin_images else None,
+    )
+    _print_action_errors(actions_found)
+    return edits, actions_found
+
+
+def scan_workflow_file(
+    file: str,
+    validate_only: bool,
+    resolve_sha: ShaResolver,
+    resolve_latest_tag: TagResolver,
+    resolve_digest: Optional[DigestResolver] = None,
+) -> List[Dict[str, str]]:
+    """Pin the actions in the file or validate them, without printing
+
+    Args:
+        file: Path to the GitHub Action workflow file
+        validate_only: If True, only validate actions without modifying file
+        resolve_sha: Returns the SHA of an action, or the reason it has none
+        resolve_latest_tag: Returns the latest release tag of owner/repo, if any
+        resolve_digest: Returns the digest of a container image, or the reason
+            it has none
 
-def pin_action_in_file(file: str, validate_only: bool = False) -> List[Dict[str, str]]:
+    Returns:
+        List of actions found with their details
+
+    Raises:
+        WorkflowPathError: If the file does not exist
+        NotWorkflowFileError: If the file is not a workflow file
+        OSError: If the file could not be read or written
+    """
+    if not os.path.exists(file):
+        raise WorkflowPathError(file)
+    if not _is_github_workflow_file(file):
+        raise NotWorkflowFileError(file)
+
+    with open(file, "r", newline="") as f:
+        content = f.read()
+
+    updated_content, actions_found = scan_workflow_content(
+        content, validate_only, resolve_sha, resolve_latest_tag, resolve_digest
+    )
+    if not validate_only and updated_content != content:
+        with open(file, "w", newline="") as f:
+            f.write(updated_content)
+    return actions_found
+
+
+def pin_action_in_file(
+    file: str,
+    validate_only: bool = False,
+    diff_writer: Optional[DiffWriter] = None,
+    pin_images: bool = False,
+) -> List[Dict[str, str]]:
     """Pin the action in the file or validate actions that need pinning
 
     Args:
         file: Path to the GitHub Action workflow file
         validate_only: If True, only validate actions without modifying file
+        diff_writer: If given, write the changes pinning the actions to it as a
+            diff, instead of modifying the file
+        pin_images: If True, also pin container images to their digest
 
     Returns:
         List of actions found with their details
     """
+    with span("gha_pinner.file", path=file):
+        with metrics.timed("gha_pinner_file_duration_seconds"):
+            actions_found = _pin_action_in_file(
+                file, validate_only, diff_writer, pin_images
+            )
+    metrics.inc("gha_pinner_files_processed_total")
+    return actions_found
+
+
+def _pin_action_in_file(
+    file: str,
+    validate_only: bool,
+    diff_writer: Optional[DiffWriter],
+    pin_images: bool,
+) -> List[Dict[str, str]]:
     actions_found = []
 
     if not os.path.exists(file):
@@ -156,18 +433,27 @@ def pin_action_in_file(file: str, validate_only: bool = False) -> List[Dict[str,
         return actions_found
 
     try:
-        # Read the file content
-        with open(file, "r") as f:
+        # Read the file content, keeping its line endings (e.g. CRLF) so that
+        # they are written back and diffed as they are
+        with open(file, "r", newline="") as f:
             content = f.read()
 
+        if diff_writer is not None:
+            # The file is left untouched, its changes going to the diff
+            edits, actions_found = _find_edits_in_workflow_content(
+                content, pin_images=pin_images
+            )
+            diff_writer.add(file, content, edits)
+            return actions_found
+
         # Process actions in the content
         updated_content, actions_found = _process_actions_in_workflow_content(
-            content, validate_only
+            content, validate_only, pin_images
         )
 
         if not validate_only:
             # Write the updated content back to the file
-            with open(file, "w") as f:
+            with open(file, "w", newline="") as f:
                 f.write(updated_content)
             print(SUCCESS_PIN_MESSAGE.format(file))
         else:
@@ -188,29 +474,108 @@ def pin_action_in_file(file: str, validate_only: bool = False) -> List[Dict[str,
     return actions_found
 
 
-def pin_actions_in_dir(dir: str, validate_only: bool = False) -> List[Dict[str, str]]:
-    """Pin the actions in the directory recursively or validate actions that need pinning
+def iter_workflow_files(dir: str) -> Iterator[str]:
+    """Yield the workflow files in the directory recursively, as they are found"""
+    for file in os.listdir(dir):
+        file_path = os.path.join(dir, file)
+        if os.path.isdir(file_path):
+            yield from iter_workflow_files(file_path)
+        elif _is_github_workflow_file(file_path):
+            yield file_path
+
+
+def find_workflow_files(dir: str) -> List[str]:
+    """Find the workflow files in the directory recursively"""
+    return list(iter_workflow_files(dir))
+
+
+def _is_in_shard(file: str, shard: Tuple[int, int]) -> bool:
+    """Check if the file belongs to shard K of N
+
+    Files are assigned by a stable hash of their path relative to the processed
+    directory, so every runner agrees on the split wherever the repository is
+    checked out.
+    """
+    index, count = shard
+    digest = hashlib.sha256(file.replace(os.sep, "/").encode()).hexdigest()
+    return int(digest[:8], 16) % count == index - 1
+
+
+def iter_actions_in_dir(
+    dir: str,
+    validate_only: bool = False,
+    shard: Optional[Tuple[int, int]] = None,
+    files: Optional[Iterable[str]] = None,
+    diff_writer: Optional[DiffWriter] = None,
+    pin_images: bool = False,
+) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+    """Pin the actions in the directory recursively or validate actions that need
+    pinning, yielding the actions of each file as soon as it is processed
+
+    Nothing is accumulated, so memory use does not grow with the directory.
 
     Args:
         dir: Path to the directory
         validate_only: If True, only validate actions without modifying files
-
-    Returns:
-        List of actions found with their details
+        shard: Only process the files of shard K out of N, as a (K, N) tuple
+        files: Only process these files, instead of scanning the whole directory
+        diff_writer: If given, write the changes to it as a diff, instead of
+            modifying the files
+        pin_images: If True, also pin container images to their digest
+
+    Yields:
+        Tuples of a workflow file and the actions found in it with their details
     """
-    all_actions = []
-
     if not os.path.exists(dir):
         print(FILE_NOT_FOUND_ERROR.format(dir))
-        return all_actions
+        return
+
+    if files is None:
+        candidates = iter_workflow_files(dir)
+    else:
+        candidates = (
+            file
+            for file in files
+            if _is_github_workflow_file(file)
+            and os.path.isfile(file)
+            and is_within(file, dir)
+        )
 
-    for file in os.listdir(dir):
-        file_path = os.path.join(dir, file)
-        if os.path.isdir(file_path):
-            actions = pin_actions_in_dir(file_path, validate_only)
-            all_actions.extend(actions)
-        elif _is_github_workflow_file(file_path):
-            actions = pin_action_in_file(file_path, validate_only)
-            all_actions.extend(actions)
+    for file_path in candidates:
+        relative_path = os.path.relpath(
+            os.path.abspath(file_path), os.path.abspath(dir)
+        )
+        if shard and not _is_in_shard(relative_path, shard):
+            continue
+        yield (
+            file_path,
+            pin_action_in_file(file_path, validate_only, diff_writer, pin_images),
+        )
 
-    return all_actions
+
+def pin_actions_in_dir(
+    dir: str,
+    validate_only: bool = False,
+    shard: Optional[Tuple[int, int]] = None,
+    files: Optional[Iterable[str]] = None,
+    pin_images: bool = False,
+) -> List[Dict[str, str]]:
+    """Pin the actions in the directory recursively or validate actions that need pinning
+
+    Args:
+        dir: Path to the directory
+        validate_only: If True, only validate actions without modifying files
+        shard: Only process the files of shard K out of N, as a (K, N) tuple
+        files: Only process these files, instead of scanning the whole directory
+        pin_images: If True, also pin container images to their digest
+
+    Returns:
+        List of actions found with their details
+    """
+    return [
+        action
+        for _, actions in iter_actions_in_dir(
+            dir, validate_only, shard, files, pin_images=pin_images
+        )
+        for action in actions
+    ]
@@ -0,0 +1,128 @@
+"""
+Hedged lookups, so that one slow response does not stall a whole run.
+
+When hedging is enabled, a lookup that has not answered within the usual
+duration of its kind (the 95th percentile of the recent ones) is raced against
+a second request to another backend. The first successful answer is used. The
+other request cannot be interrupted once sent: it is cancelled if it has not
+started yet, and its answer is discarded otherwise.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from src import metrics
+from src.common.constants import (
+    HEDGE_INITIAL_DELAY,
+    HEDGE_MAX_WORKERS,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+)
+
+T = TypeVar("T")
+
+_enabled = False
+# Recent durations of the primary lookups, by kind (e.g. the host queried)
+_durations: Dict[str, Deque[float]] = {}
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+
+
+def enable(enabled: bool = True) -> None:
+    """Hedge the lookups that support it"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Disable hedging and forget the observed durations"""
+    enable(False)
+    with _lock:
+        _durations.clear()
+
+
+def record(kind: str, duration: float) -> None:
+    """Record the duration of a primary lookup"""
+    with _lock:
+        _durations.setdefault(kind, deque(maxlen=HEDGE_WINDOW)).append(duration)
+
+
+def delay(kind: str) -> float:
+    """How long to wait for a primary lookup before hedging it: the 95th
+    percentile of the recent durations, once enough of them were observed"""
+    with _lock:
+        durations = sorted(_durations.get(kind, ()))
+    if len(durations) < HEDGE_MIN_SAMPLES:
+        return HEDGE_INITIAL_DELAY
+    percentile = durations[int(HEDGE_PERCENTILE * (len(durations) - 1))]
+    return max(percentile, HEDGE_MIN_DELAY)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return this process' pool running the raced lookups"""
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def run(kind: str, primary: Callable[[], T], hedge: Callable[[], T]) -> T:
+    """Run the primary lookup, racing it against the hedge if it is slow
+
+    Returns:
+        The first successful answer
+
+    Raises:
+        Exception: The error of the primary lookup, if neither succeeds
+    """
+
+    started = threading.Event()
+
+    def timed_primary() -> T:
+        start = time.perf_counter()
+        started.set()
+        try:
+            return primary()
+        finally:
+            record(kind, time.perf_counter() - start)
+
+    executor = _get_executor()
+    first = executor.submit(timed_primary)
+    # The delay runs from the start of the primary, not from its submission, so
+    # that waiting for a free thread does not count as a slow lookup
+    started.wait()
+    done, _ = wait([first], timeout=delay(kind))
+    if done:
+        metrics.inc("gha_pinner_hedged_lookups_total", {"outcome": "not_hedged"})
+        return first.result()
+
+    second = executor.submit(hedge)
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        # Both may complete at once, the primary answer being preferred then
+        for future in sorted(done, key=lambda future: future is not first):
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                outcome = "primary_won" if future is first else "hedge_won"
+                metrics.inc("gha_pinner_hedged_lookups_total", {"outcome": outcome})
+                return future.result()
+
+    metrics.inc("gha_pinner_hedged_lookups_total", {"outcome": "both_failed"})
+    return first.result()
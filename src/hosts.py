@@ -0,0 +1,159 @@
+"""
+GitHub hosts that actions are resolved against.
+
+Actions resolve against github.com unless a hosts configuration maps their
+owner to another host, typically a GitHub Enterprise Server instance:
+
+    {
+      "default": "github.com",
+      "hosts": {
+        "github.com": {"token_env": "GITHUB_TOKEN"},
+        "github.example.com": {
+          "owners": ["platform", "security"],
+          "token_env": "GHES_TOKEN"
+        }
+      }
+    }
+
+The API, raw content and git base URLs of a host default to those of github.com,
+or to the GHES layout (https://<host>/api/v3, https://<host>/raw and
+https://<host>) for any other host, and can be set with "api_url", "raw_url"
+and "git_url". Tokens are read from the
+environment variable named by "token_env", so they never live in the file.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.common.constants import (
+    GHES_API_BASE_URL,
+    GHES_GIT_BASE_URL,
+    GHES_RAW_BASE_URL,
+    GITHUB_API_BASE_URL,
+    GITHUB_GIT_BASE_URL,
+    GITHUB_HOST,
+    GITHUB_RAW_BASE_URL,
+    HOST_TOKEN_MISSING_WARNING,
+)
+from src.common.exceptions import HostsConfigError
+
+
+@dataclass(frozen=True)
+class Host:
+    """A GitHub host, with the URLs of its APIs and the token to query them with"""
+
+    name: str
+    api_url: str
+    raw_url: str
+    git_url: str
+    token: Optional[str] = None
+
+    @property
+    def key_prefix(self) -> str:
+        """Prefix of the cache keys of its repositories, so that a repository
+        of another host never shares the entries of its github.com namesake"""
+        return "" if self.name == GITHUB_HOST else f"{self.name}/"
+
+
+GITHUB = Host(
+    GITHUB_HOST, GITHUB_API_BASE_URL, GITHUB_RAW_BASE_URL, GITHUB_GIT_BASE_URL
+)
+
+_hosts: Dict[str, Host] = {GITHUB_HOST: GITHUB}
+# Host name by lower-cased owner, owners being case-insensitive on GitHub
+_owners: Dict[str, str] = {}
+_default: str = GITHUB_HOST
+
+
+def _parse_host(name: str, settings: Any, warnings: List[str]) -> Host:
+    if not isinstance(settings, dict):
+        raise ValueError(f"the settings of host '{name}' are not an object")
+
+    token_env = settings.get("token_env")
+    token = os.environ.get(token_env) if token_env else None
+    if token_env and not token:
+        warnings.append(HOST_TOKEN_MISSING_WARNING.format(token_env, name))
+
+    if name == GITHUB_HOST:
+        urls = (GITHUB_API_BASE_URL, GITHUB_RAW_BASE_URL, GITHUB_GIT_BASE_URL)
+    else:
+        urls = (
+            GHES_API_BASE_URL.format(name),
+            GHES_RAW_BASE_URL.format(name),
+            GHES_GIT_BASE_URL.format(name),
+        )
+    api_url, raw_url, git_url = (
+        str(settings.get(setting, url)).rstrip("/")
+        for setting, url in zip(("api_url", "raw_url", "git_url"), urls)
+    )
+    return Host(name, api_url, raw_url, git_url, token)
+
+
+def load(path: str) -> List[str]:
+    """Resolve actions against the hosts configured in `path`
+
+    Returns:
+        Warnings about the configuration (e.g. unset token variables)
+
+    Raises:
+        HostsConfigError: If the file cannot be read or is not valid
+    """
+    warnings: List[str] = []
+    try:
+        with open(path) as f:
+            config = json.load(f)
+        if not isinstance(config, dict) or not isinstance(
+            config.get("hosts", {}), dict
+        ):
+            raise ValueError("expected an object with a 'hosts' object")
+
+        hosts = {GITHUB_HOST: GITHUB}
+        owners: Dict[str, str] = {}
+        for name, settings in config.get("hosts", {}).items():
+            hosts[name] = _parse_host(name, settings, warnings)
+            host_owners = settings.get("owners", [])
+            if not isinstance(host_owners, list):
+                raise ValueError(f"the owners of host '{name}' are not a list")
+            for owner in host_owners:
+                owners[str(owner).lower()] = name
+
+        default = config.get("default", GITHUB_HOST)
+        if default not in hosts:
+            raise ValueError(f"the default host '{default}' is not configured")
+    except (OSError, ValueError) as e:
+        raise HostsConfigError(path, e) from e
+
+    configure(hosts, owners, default)
+    return warnings
+
+
+def get_config() -> Tuple[Dict[str, Host], Dict[str, str], str]:
+    """Return the hosts, the host of each owner and the default host, e.g. to
+    configure another process the same way with `configure()`"""
+    return dict(_hosts), dict(_owners), _default
+
+
+def configure(hosts: Dict[str, Host], owners: Dict[str, str], default: str) -> None:
+    """Resolve actions against the given hosts, as returned by `get_config()`"""
+    global _default
+    _hosts.clear()
+    _hosts.update(hosts)
+    _owners.clear()
+    _owners.update(owners)
+    _default = default
+
+
+def reset() -> None:
+    """Resolve every action against github.com again"""
+    global _default
+    _hosts.clear()
+    _hosts[GITHUB_HOST] = GITHUB
+    _owners.clear()
+    _default = GITHUB_HOST
+
+
+def host_for(owner: str) -> Host:
+    """Return the host the repositories of an owner live on"""
+    return _hosts[_owners.get(owner.lower(), _default)]
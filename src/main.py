@@ -1,25 +1,134 @@
 #!/usr/bin/env python3
 
 
+import os
 import sys
+import time
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from functools import partial
+from typing import Iterator, List, Optional, Tuple
 
+import click
 import typer
 
+from src import cache, hedging, hosts, metrics, seed_index
+from src.changes import changed_files, read_path_list
 from src.common.action_status import ActionStatus
 from src.common.constants import (
     ACTION_ARG_HELP,
+    CACHE_COMMAND_HELP,
+    CACHE_ENTRIES_FORMAT,
+    CACHE_EXPORTED_MESSAGE,
+    CACHE_FAILURES_FORMAT,
+    CACHE_FILE_ARG_HELP,
+    CACHE_FILE_ENV_VAR,
+    CACHE_HIT_RATIO_FORMAT,
+    CACHE_IMPORTED_MESSAGE,
+    CACHE_NO_LOOKUPS_MESSAGE,
+    CACHE_PRUNED_MESSAGE,
+    CACHE_SERVER_STARTED_MESSAGE,
+    CACHE_WARMED_MESSAGE,
+    CHANGED_SINCE_ARG_HELP,
+    CHECK_ARG_HELP,
+    DEBOUNCE_ARG_HELP,
+    DEFAULT_CACHE_SERVER_HOST,
+    DEFAULT_CACHE_SERVER_PORT,
+    DEFAULT_RESOLVE_WORKERS,
+    DIFF_ARG_HELP,
     DIR_ARG_HELP,
+    ERROR_BUILDING_SEED_INDEX,
+    ERROR_EXPORTING_CACHE,
+    ERROR_IMPORTING_CACHE,
+    ERROR_MERGING_REPORTS,
+    ERROR_READING_REPORT,
+    EXPECTED_FORMAT_MESSAGE,
+    EXPORT_PATH_ARG_HELP,
     FILE_ARG_HELP,
+    FILE_NOT_FOUND_ERROR,
+    FILES_FROM_ARG_HELP,
+    HEDGE_ARG_HELP,
+    HEDGE_ENV_VAR,
+    HOSTS_CONFIG_ARG_HELP,
+    HOSTS_CONFIG_ENV_VAR,
+    IMPORT_PATH_ARG_HELP,
+    INVALID_SHARD_ERROR,
+    MAX_AGE_ARG_HELP,
+    MAX_ENTRIES_ARG_HELP,
+    MERGED_REPORT_ARG_HELP,
+    MERGED_SUMMARY_FORMAT,
+    METRICS_FILE_ARG_HELP,
+    METRICS_FILE_ENV_VAR,
+    MISSING_SHARDS_ERROR,
+    NEEDS_PINNING_FORMAT,
+    NO_ACTIONS_ERROR,
+    NO_CACHE_ERROR,
+    NO_CACHE_FILE_ERROR,
+    NO_CHANGED_FILES_MESSAGE,
+    NO_REPOS_ERROR,
+    PIN_IMAGES_ARG_HELP,
+    POLL_ARG_HELP,
     PROGRAM_DESCRIPTION,
     PROGRAM_NAME,
+    REMOTE_CACHE_ARG_HELP,
+    REMOTE_CACHE_ENV_VAR,
+    REPO_SUMMARY_FORMAT,
+    REPORT_ARG_HELP,
+    REPORTS_ARG_HELP,
+    REPOS_ARG_HELP,
+    REPOS_FILE_ARG_HELP,
+    RESOLVE_WORKERS_ARG_HELP,
+    SEED_INDEX_ARG_HELP,
+    SEED_INDEX_BUILT_MESSAGE,
+    SEED_INDEX_DISABLED,
+    SEED_INDEX_ENV_VAR,
+    SEED_INDEX_OUTPUT_ARG_HELP,
+    SERVE_HOST_ARG_HELP,
+    SERVE_PORT_ARG_HELP,
+    SHARD_ARG_HELP,
+    SNAPSHOT_ARG_HELP,
+    TOTAL_SUMMARY_FORMAT,
+    TRACE_ARG_HELP,
+    TRACE_ENV_VAR,
+    TRANSITIVE_ARG_HELP,
+    UPDATE_PATHS_ARG_HELP,
+    UPDATE_POLICY_ARG_HELP,
+    UPDATE_SUMMARY_FORMAT,
+    UPDATE_VALIDATE_ARG_HELP,
     VALIDATE_ARG_HELP,
+    VERIFY_ARG_HELP,
     VERSION,
     VERSION_ARG_HELP,
+    WARM_ACTIONS_ARG_HELP,
+    WARM_FILE_ARG_HELP,
+    WATCH_DEBOUNCE,
+    WATCH_DIR_ARG_HELP,
+    WATCH_RESULT_FORMAT,
+    WATCH_STOPPED_MESSAGE,
+    WATCHING_MESSAGE,
+    WORKERS_ARG_HELP,
+    WOULD_CHANGE_FORMAT,
 )
-from src.editor import pin_action_in_file, pin_actions_in_dir
-from src.retriever import get_action_sha, print_pinned_action
+from src.common.exceptions import HostsConfigError, InvalidActionError, ResolutionError
+from src.common.update_policy import UpdatePolicy
+from src.editor import iter_actions_in_dir, iter_workflow_files, pin_action_in_file
+from src.patch import DiffWriter
+from src.report import (
+    ReportWriter,
+    build_report,
+    merge_reports,
+    missing_shards,
+    read_report,
+    write_report,
+)
+from src.retriever import get_action_shas, print_pinned_action, resolve_action_sha
+from src.tracing import enable_tracing
+from src.transitive import report_transitively, roots_of
+from src.updater import update_paths
+from src.verifier import has_failures, verify_files
 
 app = typer.Typer(help=PROGRAM_DESCRIPTION)
+cache_app = typer.Typer(help=CACHE_COMMAND_HELP, no_args_is_help=True)
+app.add_typer(cache_app, name="cache")
 
 
 def version_callback(value: bool) -> None:
@@ -38,6 +147,50 @@ def callback(
         callback=version_callback,
         is_flag=True,
     ),
+    metrics_file: Optional[str] = typer.Option(
+        None,
+        "--metrics-file",
+        help=METRICS_FILE_ARG_HELP,
+        envvar=METRICS_FILE_ENV_VAR,
+    ),
+    cache_file: Optional[str] = typer.Option(
+        None,
+        "--cache-file",
+        help=CACHE_FILE_ARG_HELP,
+        envvar=CACHE_FILE_ENV_VAR,
+    ),
+    remote_cache: Optional[str] = typer.Option(
+        None,
+        "--remote-cache",
+        help=REMOTE_CACHE_ARG_HELP,
+        envvar=REMOTE_CACHE_ENV_VAR,
+    ),
+    hosts_config: Optional[str] = typer.Option(
+        None,
+        "--hosts-config",
+        help=HOSTS_CONFIG_ARG_HELP,
+        envvar=HOSTS_CONFIG_ENV_VAR,
+    ),
+    seed_index_path: Optional[str] = typer.Option(
+        None,
+        "--seed-index",
+        help=SEED_INDEX_ARG_HELP,
+        envvar=SEED_INDEX_ENV_VAR,
+    ),
+    hedge: bool = typer.Option(
+        False,
+        "--hedge",
+        help=HEDGE_ARG_HELP,
+        envvar=HEDGE_ENV_VAR,
+        is_flag=True,
+    ),
+    trace: bool = typer.Option(
+        False,
+        "--trace",
+        help=TRACE_ARG_HELP,
+        envvar=TRACE_ENV_VAR,
+        is_flag=True,
+    ),
     ctx: typer.Context = typer.Option(None, hidden=True),
 ) -> None:
     """
@@ -48,6 +201,41 @@ def callback(
         typer.echo(ctx.get_help())
         raise typer.Exit(code=1)
 
+    if trace:
+        enable_tracing()
+
+    if hosts_config:
+        try:
+            warnings = hosts.load(hosts_config)
+        except HostsConfigError as e:
+            raise typer.BadParameter(str(e), param_hint="--hosts-config")
+        for warning in warnings:
+            print(warning)
+
+    if hedge:
+        hedging.enable()
+
+    if seed_index_path:
+        try:
+            seed_index.use(
+                None if seed_index_path == SEED_INDEX_DISABLED else seed_index_path
+            )
+        except (OSError, ValueError) as e:
+            raise typer.BadParameter(str(e), param_hint="--seed-index")
+
+    if cache_file:
+        cache.load(cache_file)
+    if remote_cache:
+        # Imported on use, like src.sweep and src.watch, to keep start-up fast
+        from src.remote_cache import HttpBackend
+
+        cache.use_backend(HttpBackend(remote_cache, on_unavailable=print))
+    if cache_file or remote_cache:
+        ctx.call_on_close(cache.save)
+
+    if metrics_file:
+        ctx.call_on_close(lambda: metrics.write(metrics_file))
+
 
 @app.command("action", help="Get the commit SHA for a specific GitHub Action.")
 def pin_action(
@@ -56,30 +244,153 @@ def pin_action(
     """
     Pin a specific GitHub Action by name and get its commit SHA.
     """
-    sha: str = get_action_sha(action)
+    sha: Optional[str] = None
+    try:
+        sha = resolve_action_sha(action)
+    except InvalidActionError as e:
+        print(e)
+        print(EXPECTED_FORMAT_MESSAGE)
+    except ResolutionError as e:
+        print(e)
     print_pinned_action(action, sha)
 
 
-@app.command("file", help="Process a workflow file and pin all actions in it.")
+def _select_files(
+    files: List[str],
+    files_from: Optional[str],
+    changed_since: Optional[str],
+    path: Optional[str],
+) -> Optional[List[str]]:
+    """Gather the files given as arguments and with --files-from, then keep only
+    those changed since the --changed-since ref
+
+    Args:
+        path: Path inside the git repository (defaults to the first file)
+
+    Returns:
+        The selected files, or None if neither option nor files were given
+    """
+    if files_from:
+        files = files + read_path_list(files_from)
+    if not changed_since:
+        return files if files or files_from else None
+
+    changed = changed_files(changed_since, path or (files[0] if files else "."))
+    if changed is None:
+        raise typer.Exit(code=1)
+    if not files and not files_from:
+        return changed
+
+    changed_paths = {os.path.realpath(file) for file in changed}
+    return [file for file in files if os.path.realpath(file) in changed_paths]
+
+
+@app.command("file", help="Process workflow files and pin all actions in them.")
 def pin_file(
-    file: str = typer.Argument(..., help=FILE_ARG_HELP),
+    files: Optional[List[str]] = typer.Argument(
+        None, metavar="FILE", help=FILE_ARG_HELP, show_default=False
+    ),
     validate: bool = typer.Option(
         False,
         "--validate",
         help=VALIDATE_ARG_HELP,
         is_flag=True,
     ),
+    files_from: Optional[str] = typer.Option(
+        None, "--files-from", help=FILES_FROM_ARG_HELP
+    ),
+    changed_since: Optional[str] = typer.Option(
+        None, "--changed-since", help=CHANGED_SINCE_ARG_HELP
+    ),
+    verify: bool = typer.Option(False, "--verify", help=VERIFY_ARG_HELP, is_flag=True),
+    transitive: bool = typer.Option(
+        False, "--transitive", help=TRANSITIVE_ARG_HELP, is_flag=True
+    ),
+    diff: Optional[str] = typer.Option(
+        None, "--diff", metavar="PATH", help=DIFF_ARG_HELP
+    ),
+    check: bool = typer.Option(False, "--check", help=CHECK_ARG_HELP, is_flag=True),
+    pin_images: bool = typer.Option(
+        False, "--pin-images", help=PIN_IMAGES_ARG_HELP, is_flag=True
+    ),
 ) -> None:
     """
-    Process a workflow file and pin all actions in it.
+    Process workflow files and pin all actions in them.
     """
-    actions_found = pin_action_in_file(file, validate)
+    if not files and not files_from:
+        raise click.MissingParameter(param_hint="'FILE'", param_type="argument")
 
-    # Exit with non-zero code if validation is enabled and unpinned actions are found
-    if validate and any(
-        action["status"] == ActionStatus.NEEDS_PINNING for action in actions_found
-    ):
-        sys.exit(1)
+    selected = _select_files(list(files or []), files_from, changed_since, None)
+    if not selected:
+        print(NO_CHANGED_FILES_MESSAGE)
+
+    with _diff_output(diff, check) as diff_writer:
+        actions_found = []
+        for file in selected:
+            actions_found.extend(
+                pin_action_in_file(file, validate, diff_writer, pin_images)
+            )
+
+        if transitive:
+            report_transitively(roots_of(actions_found))
+        changed = _report_changes(diff_writer)
+
+        # Exit with non-zero code if pinned actions drifted from their comment
+        if verify and has_failures(verify_files(selected)):
+            sys.exit(1)
+
+        # Exit with non-zero code if validation is enabled and unpinned actions are found
+        if validate and any(
+            action["status"] == ActionStatus.NEEDS_PINNING for action in actions_found
+        ):
+            sys.exit(1)
+
+        # Exit with non-zero code if checking and files would change
+        if check and changed:
+            sys.exit(1)
+
+
+@contextmanager
+def _diff_output(diff: Optional[str], check: bool) -> Iterator[Optional[DiffWriter]]:
+    """Write the changes to a diff rather than to the files, for --diff or --check
+
+    While the diff goes to stdout, messages go to stderr.
+
+    Yields:
+        The diff writer, or None if the files are to be modified
+    """
+    if not diff and not check:
+        yield None
+        return
+    with DiffWriter(diff) as diff_writer:
+        with redirect_stdout(sys.stderr) if diff == "-" else nullcontext():
+            yield diff_writer
+
+
+def _report_changes(diff_writer: Optional[DiffWriter]) -> bool:
+    """Print how many files the diff changes, if the changes go to a diff
+
+    Returns:
+        Whether any file would change
+    """
+    if diff_writer is None:
+        return False
+    print(WOULD_CHANGE_FORMAT.format(len(diff_writer.changed)))
+    return bool(diff_writer.changed)
+
+
+def _parse_shard(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a K/N shard specification"""
+    if value is None:
+        return None
+
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise typer.BadParameter(INVALID_SHARD_ERROR.format(value))
+    if not 1 <= index <= count:
+        raise typer.BadParameter(INVALID_SHARD_ERROR.format(value))
+    return index, count
 
 
 @app.command("dir", help="Process a directory and pin all actions in it.")
@@ -91,18 +402,422 @@ def pin_dir(
         help=VALIDATE_ARG_HELP,
         is_flag=True,
     ),
+    shard: Optional[str] = typer.Option(
+        None,
+        "--shard",
+        help=SHARD_ARG_HELP,
+        callback=_parse_shard,
+    ),
+    report: Optional[str] = typer.Option(None, "--report", help=REPORT_ARG_HELP),
+    files_from: Optional[str] = typer.Option(
+        None, "--files-from", help=FILES_FROM_ARG_HELP
+    ),
+    changed_since: Optional[str] = typer.Option(
+        None, "--changed-since", help=CHANGED_SINCE_ARG_HELP
+    ),
+    verify: bool = typer.Option(False, "--verify", help=VERIFY_ARG_HELP, is_flag=True),
+    transitive: bool = typer.Option(
+        False, "--transitive", help=TRANSITIVE_ARG_HELP, is_flag=True
+    ),
+    diff: Optional[str] = typer.Option(
+        None, "--diff", metavar="PATH", help=DIFF_ARG_HELP
+    ),
+    check: bool = typer.Option(False, "--check", help=CHECK_ARG_HELP, is_flag=True),
+    pin_images: bool = typer.Option(
+        False, "--pin-images", help=PIN_IMAGES_ARG_HELP, is_flag=True
+    ),
 ) -> None:
     """
     Process a directory and pin all actions in it.
     """
-    actions_found = pin_actions_in_dir(dir, validate)
+    files = _select_files([], files_from, changed_since, dir)
+
+    with _diff_output(diff, check) as diff_writer:
+        # Consume the results file by file, so that memory does not grow with the tree
+        processed = []
+        roots = []
+        needs_pinning = False
+        with (
+            ReportWriter(report, validate, shard) if report else nullcontext()
+        ) as writer:
+            for file, actions in iter_actions_in_dir(
+                dir, validate, shard, files, diff_writer, pin_images
+            ):
+                processed.append(file)
+                if transitive:
+                    roots.extend(roots_of(actions))
+                needs_pinning = needs_pinning or any(
+                    action["status"] == ActionStatus.NEEDS_PINNING for action in actions
+                )
+                if writer:
+                    writer.add(file, actions)
+
+        if files is not None and not processed:
+            print(NO_CHANGED_FILES_MESSAGE)
+
+        if transitive:
+            report_transitively(roots)
+        changed = _report_changes(diff_writer)
+
+        # Exit with non-zero code if pinned actions drifted from their comment
+        if verify and has_failures(verify_files(processed)):
+            sys.exit(1)
+
+        # Exit with non-zero code if validation is enabled and unpinned actions are found
+        if validate and needs_pinning:
+            sys.exit(1)
+
+        # Exit with non-zero code if checking and files would change
+        if check and changed:
+            sys.exit(1)
+
+
+def _validate_files(files: List[str], pin_images: bool = False) -> None:
+    """Validate the files, reporting how long each one took"""
+    for file in files:
+        start = time.perf_counter()
+        pin_action_in_file(file, True, pin_images=pin_images)
+        print(
+            WATCH_RESULT_FORMAT.format(file, (time.perf_counter() - start) * 1000),
+            flush=True,
+        )
+
+
+@app.command("watch", help="Revalidate workflow files as they change.")
+def watch_dir(
+    dir: str = typer.Argument(..., help=WATCH_DIR_ARG_HELP),
+    poll: bool = typer.Option(False, "--poll", help=POLL_ARG_HELP, is_flag=True),
+    debounce: float = typer.Option(
+        WATCH_DEBOUNCE, "--debounce", help=DEBOUNCE_ARG_HELP, min=0
+    ),
+    pin_images: bool = typer.Option(
+        False, "--pin-images", help=PIN_IMAGES_ARG_HELP, is_flag=True
+    ),
+) -> None:
+    """
+    Validate the workflow files of a directory, then again each time one changes.
+    """
+    if not os.path.isdir(dir):
+        print(FILE_NOT_FOUND_ERROR.format(dir))
+        raise typer.Exit(code=1)
+
+    from src.watch import create_watcher, watch
+
+    watcher = create_watcher(dir, poll)
+    try:
+        # A first full pass warms the cache, so that edits are validated quickly
+        _validate_files(list(iter_workflow_files(dir)), pin_images)
+        print(WATCHING_MESSAGE.format(dir, watcher.name), flush=True)
+        watch(watcher, partial(_validate_files, pin_images=pin_images), debounce)
+    except KeyboardInterrupt:
+        print(WATCH_STOPPED_MESSAGE.format(dir))
+    finally:
+        watcher.close()
+
+
+@app.command("update", help="Update pinned actions to newer tags.")
+def update(
+    paths: List[str] = typer.Argument(..., metavar="PATH", help=UPDATE_PATHS_ARG_HELP),
+    policy: UpdatePolicy = typer.Option(
+        UpdatePolicy.MINOR.value, "--policy", help=UPDATE_POLICY_ARG_HELP
+    ),
+    validate: bool = typer.Option(
+        False, "--validate", help=UPDATE_VALIDATE_ARG_HELP, is_flag=True
+    ),
+    workers: int = typer.Option(
+        DEFAULT_RESOLVE_WORKERS,
+        "-j",
+        "--workers",
+        help=RESOLVE_WORKERS_ARG_HELP,
+        min=1,
+    ),
+) -> None:
+    """
+    Update the actions pinned to a SHA with a version comment to the newest tag
+    allowed by the policy, rewriting the SHA and the comment together.
+    """
+    files, tag_lists, updates = update_paths(paths, policy, validate, workers)
+    print(UPDATE_SUMMARY_FORMAT.format(files, len(tag_lists), len(updates)))
+
+    # Exit with non-zero code if validation is enabled and updates are available
+    if validate and updates:
+        sys.exit(1)
+
+
+def _print_summary(summary_format: str, name: str, summary: dict) -> None:
+    print(
+        summary_format.format(
+            name,
+            summary[ActionStatus.NEEDS_PINNING.value],
+            summary[ActionStatus.ALREADY_PINNED.value],
+            summary[ActionStatus.SKIPPED.value],
+            summary[ActionStatus.ERROR.value],
+        )
+    )
+
+
+@app.command("repos", help="Process the workflows of many repositories in parallel.")
+def pin_repos(
+    repos: Optional[List[str]] = typer.Argument(None, help=REPOS_ARG_HELP),
+    repos_file: Optional[str] = typer.Option(
+        None,
+        "--from-file",
+        help=REPOS_FILE_ARG_HELP,
+    ),
+    validate: bool = typer.Option(
+        False,
+        "--validate",
+        help=VALIDATE_ARG_HELP,
+        is_flag=True,
+    ),
+    workers: int = typer.Option(
+        os.cpu_count() or 1,
+        "-j",
+        "--workers",
+        help=WORKERS_ARG_HELP,
+        min=1,
+    ),
+    report: Optional[str] = typer.Option(None, "--report", help=REPORT_ARG_HELP),
+    pin_images: bool = typer.Option(
+        False, "--pin-images", help=PIN_IMAGES_ARG_HELP, is_flag=True
+    ),
+) -> None:
+    """
+    Process the .github/workflows directory of each repository and report per repository.
+    """
+    from src.sweep import read_list, sweep_repos
+
+    roots = list(repos or [])
+    if repos_file:
+        roots.extend(read_list(repos_file))
+    if not roots:
+        print(NO_REPOS_ERROR)
+        raise typer.Exit(code=1)
+
+    results = sweep_repos(roots, validate, workers, pin_images)
+    run_report = build_report(results, validate)
+
+    for root, result in run_report["results"].items():
+        _print_summary(REPO_SUMMARY_FORMAT, root, result["summary"])
+    _print_summary(TOTAL_SUMMARY_FORMAT, len(results), run_report["summary"])
+
+    if report:
+        write_report(run_report, report)
 
     # Exit with non-zero code if validation is enabled and unpinned actions are found
-    if validate and any(
-        action["status"] == ActionStatus.NEEDS_PINNING for action in actions_found
-    ):
+    if validate and run_report["summary"][ActionStatus.NEEDS_PINNING.value]:
         sys.exit(1)
 
 
+@app.command("merge-reports", help="Merge JSON reports into a single verdict.")
+def merge_reports_command(
+    reports: List[str] = typer.Argument(..., help=REPORTS_ARG_HELP),
+    output: Optional[str] = typer.Option(
+        None, "-o", "--output", help=MERGED_REPORT_ARG_HELP
+    ),
+) -> None:
+    """
+    Merge the reports of sharded runs and exit with the combined verdict.
+    """
+    loaded = []
+    for path in reports:
+        try:
+            loaded.append(read_report(path))
+        except (OSError, ValueError) as e:
+            print(ERROR_READING_REPORT.format(path, e))
+            raise typer.Exit(code=1)
+
+    try:
+        merged = merge_reports(loaded)
+        missing = missing_shards(merged)
+    except ValueError as e:
+        print(ERROR_MERGING_REPORTS.format(e))
+        raise typer.Exit(code=1)
+
+    for result in merged["results"].values():
+        for action in result["actions"]:
+            if action["status"] == ActionStatus.NEEDS_PINNING.value:
+                print(
+                    NEEDS_PINNING_FORMAT.format(
+                        action["action"],
+                        action["action"].split("@")[0],
+                        action["sha"],
+                    )
+                )
+    _print_summary(MERGED_SUMMARY_FORMAT, len(merged["results"]), merged["summary"])
+
+    if output:
+        write_report(merged, output)
+
+    if missing:
+        print(MISSING_SHARDS_ERROR.format(", ".join(str(index) for index in missing)))
+        raise typer.Exit(code=1)
+
+    # Exit with non-zero code if validation is enabled and unpinned actions are found
+    if merged["validate"] and merged["summary"][ActionStatus.NEEDS_PINNING.value]:
+        sys.exit(1)
+
+
+def _require_cache_file() -> None:
+    """Exit with an error if no cache file was given with --cache-file"""
+    if cache.get_path() is None:
+        print(NO_CACHE_FILE_ERROR)
+        raise typer.Exit(code=1)
+
+
+def _require_cache() -> None:
+    """Exit with an error if neither --cache-file nor --remote-cache was given"""
+    if not cache.get_backends():
+        print(NO_CACHE_ERROR)
+        raise typer.Exit(code=1)
+
+
+@cache_app.command("warm", help="Resolve actions ahead of time into the cache.")
+def cache_warm(
+    actions: Optional[List[str]] = typer.Argument(None, help=WARM_ACTIONS_ARG_HELP),
+    actions_file: Optional[str] = typer.Option(
+        None, "--from-file", help=WARM_FILE_ARG_HELP
+    ),
+    workers: int = typer.Option(
+        DEFAULT_RESOLVE_WORKERS,
+        "-j",
+        "--workers",
+        help=RESOLVE_WORKERS_ARG_HELP,
+        min=1,
+    ),
+) -> None:
+    """
+    Resolve the given actions concurrently, so that later runs find them cached.
+    """
+    from src.sweep import read_list
+
+    _require_cache()
+    refs = list(actions or [])
+    if actions_file:
+        refs.extend(read_list(actions_file))
+    if not refs:
+        print(NO_ACTIONS_ERROR)
+        raise typer.Exit(code=1)
+
+    shas = get_action_shas(refs, workers)
+    print(
+        CACHE_WARMED_MESSAGE.format(sum(1 for sha in shas.values() if sha), len(shas))
+    )
+
+
+@cache_app.command("export", help="Write the cache entries to a portable snapshot.")
+def cache_export(
+    path: str = typer.Argument(..., help=EXPORT_PATH_ARG_HELP),
+) -> None:
+    _require_cache_file()
+    try:
+        count = cache.export_snapshot(path)
+    except OSError as e:
+        print(ERROR_EXPORTING_CACHE.format(path, e))
+        raise typer.Exit(code=1)
+    # Keep stdout clean for the snapshot itself
+    if path != "-":
+        print(CACHE_EXPORTED_MESSAGE.format(count, path))
+
+
+@cache_app.command("import", help="Merge a snapshot into the cache.")
+def cache_import(
+    path: str = typer.Argument(..., help=IMPORT_PATH_ARG_HELP),
+) -> None:
+    _require_cache_file()
+    try:
+        count = cache.import_snapshot(path)
+    except (OSError, ValueError, AttributeError) as e:
+        print(ERROR_IMPORTING_CACHE.format(path, e))
+        raise typer.Exit(code=1)
+    print(CACHE_IMPORTED_MESSAGE.format(count, path))
+
+
+@cache_app.command("prune", help="Evict expired, old or least recently used entries.")
+def cache_prune(
+    max_age: Optional[int] = typer.Option(
+        None, "--max-age", help=MAX_AGE_ARG_HELP, min=0
+    ),
+    max_entries: Optional[int] = typer.Option(
+        None, "--max-entries", help=MAX_ENTRIES_ARG_HELP, min=0
+    ),
+) -> None:
+    _require_cache_file()
+    evicted = cache.prune(max_age, max_entries)
+    print(CACHE_PRUNED_MESSAGE.format(evicted, len(cache.get_store())))
+
+
+@cache_app.command("stats", help="Show the cache entry counts and hit ratio.")
+def cache_stats() -> None:
+    _require_cache_file()
+    stats = cache.stats()
+    print(
+        CACHE_ENTRIES_FORMAT.format(
+            stats["entries"], stats["resolved"], stats["failed"], stats["expired"]
+        )
+    )
+    if stats["failures"]:
+        print(
+            CACHE_FAILURES_FORMAT.format(
+                ", ".join(
+                    f"{reason} {count}"
+                    for reason, count in sorted(stats["failures"].items())
+                )
+            )
+        )
+
+    lookups = stats["hits"] + stats["misses"]
+    if lookups:
+        print(
+            CACHE_HIT_RATIO_FORMAT.format(
+                stats["hits"] / lookups, stats["hits"], stats["misses"]
+            )
+        )
+    else:
+        print(CACHE_NO_LOOKUPS_MESSAGE)
+
+
+@cache_app.command(
+    "build-index", help="Build a seed index of the actions resolved in a snapshot."
+)
+def cache_build_index(
+    snapshot: str = typer.Argument(..., help=SNAPSHOT_ARG_HELP),
+    output: str = typer.Argument(..., help=SEED_INDEX_OUTPUT_ARG_HELP),
+) -> None:
+    """
+    Index the resolved actions of a cache file or snapshot for --seed-index.
+    """
+    try:
+        count = seed_index.write(output, cache.read_snapshot(snapshot))
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        print(ERROR_BUILDING_SEED_INDEX.format(snapshot, e))
+        raise typer.Exit(code=1)
+    print(SEED_INDEX_BUILT_MESSAGE.format(count, output))
+
+
+@cache_app.command("serve", help="Run a reference remote cache server.")
+def cache_serve(
+    host: str = typer.Option(
+        DEFAULT_CACHE_SERVER_HOST, "--host", help=SERVE_HOST_ARG_HELP
+    ),
+    port: int = typer.Option(
+        DEFAULT_CACHE_SERVER_PORT, "--port", help=SERVE_PORT_ARG_HELP, min=0
+    ),
+) -> None:
+    """
+    Serve the remote cache protocol from memory, e.g. for local testing.
+    """
+    from src.remote_cache import CacheServer
+
+    server = CacheServer((host, port))
+    print(CACHE_SERVER_STARTED_MESSAGE.format(*server.server_address[:2]), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 if __name__ == "__main__":
     app()
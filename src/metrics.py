@@ -0,0 +1,242 @@
+"""
+In-process run metrics, exportable in the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (in seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric name -> (type, help)
+METRICS = {
+    # The "endpoint" label is the target of the request: a GitHub API endpoint
+    # (e.g. commits or tags), raw file content (raw), the git ref advertisement
+    # (git_refs) or a container registry (registry)
+    "gha_pinner_http_requests_total": (
+        "counter",
+        "HTTP requests by target (endpoint label) and HTTP status",
+    ),
+    "gha_pinner_http_request_duration_seconds": (
+        "histogram",
+        "HTTP request duration by target (endpoint label)",
+    ),
+    "gha_pinner_rate_limit_remaining": (
+        "gauge",
+        "Last X-RateLimit-Remaining value reported by the API of each GitHub host",
+    ),
+    "gha_pinner_registry_rate_limit_remaining": (
+        "gauge",
+        "Last RateLimit-Remaining value reported by a container registry",
+    ),
+    "gha_pinner_resolutions_total": (
+        "counter",
+        "Action reference resolutions by result",
+    ),
+    "gha_pinner_resolution_failures_total": (
+        "counter",
+        "Failed action reference resolutions by reason",
+    ),
+    "gha_pinner_resolution_duration_seconds": (
+        "histogram",
+        "Duration of a single action reference resolution",
+    ),
+    "gha_pinner_hedged_lookups_total": (
+        "counter",
+        "Hedgeable lookups by outcome (not_hedged, primary_won, hedge_won or both_failed)",
+    ),
+    "gha_pinner_hedge_ratio": (
+        "gauge",
+        "Share of hedgeable lookups slow enough to be hedged",
+    ),
+    "gha_pinner_cache_requests_total": (
+        "counter",
+        "Resolution cache lookups by result (hit or miss)",
+    ),
+    "gha_pinner_cache_hit_ratio": (
+        "gauge",
+        "Share of resolution cache lookups served from the cache",
+    ),
+    "gha_pinner_seed_index_lookups_total": (
+        "counter",
+        "Seed index lookups by result (hit, miss or stale)",
+    ),
+    "gha_pinner_remote_cache_requests_total": (
+        "counter",
+        "Remote cache requests by operation and result",
+    ),
+    "gha_pinner_files_processed_total": (
+        "counter",
+        "Workflow files processed",
+    ),
+    "gha_pinner_file_duration_seconds": (
+        "histogram",
+        "Duration of processing a single workflow file",
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+# (name, labels) -> [bucket counts..., sum, count]
+_histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+def _key(name: str, labels: Optional[Dict[str, str]]) -> Tuple[str, Labels]:
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc(name: str, labels: Optional[Dict[str, str]] = None, value: float = 1) -> None:
+    """Increment a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+    """Set a gauge to the given value"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+    """Record an observation in a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        series = _histograms.setdefault(key, [0] * (len(DURATION_BUCKETS) + 2))
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+@contextmanager
+def timed(name: str, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+    """Observe the duration of the wrapped block in a histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, labels)
+
+
+def counter_value(name: str, labels: Optional[Dict[str, str]] = None) -> float:
+    """Return the current value of a counter"""
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Return a picklable copy of every recorded value"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {k: list(v) for k, v in _histograms.items()},
+        }
+
+
+def merge(other: Dict[str, Dict]) -> None:
+    """Add the values of a snapshot taken in another process"""
+    with _lock:
+        for key, value in other["counters"].items():
+            _counters[key] = _counters.get(key, 0) + value
+        _gauges.update(other["gauges"])
+        for key, value in other["histograms"].items():
+            series = _histograms.setdefault(key, [0] * len(value))
+            for i, count in enumerate(value):
+                series[i] += count
+
+
+def _cache_hit_ratio(counters: Dict[Tuple[str, Labels], float]) -> Dict:
+    hits = counters.get(_key("gha_pinner_cache_requests_total", {"result": "hit"}), 0)
+    misses = counters.get(
+        _key("gha_pinner_cache_requests_total", {"result": "miss"}), 0
+    )
+    if hits + misses == 0:
+        return {}
+    return {_key("gha_pinner_cache_hit_ratio", None): hits / (hits + misses)}
+
+
+def _hedge_ratio(counters: Dict[Tuple[str, Labels], float]) -> Dict:
+    by_outcome = {
+        labels: value
+        for (name, labels), value in counters.items()
+        if name == "gha_pinner_hedged_lookups_total"
+    }
+    total = sum(by_outcome.values())
+    if total == 0:
+        return {}
+    not_hedged = by_outcome.get(_key("", {"outcome": "not_hedged"})[1], 0)
+    return {_key("gha_pinner_hedge_ratio", None): (total - not_hedged) / total}
+
+
+def reset() -> None:
+    """Drop every recorded value"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """Render every recorded metric in the Prometheus text exposition format"""
+    with _lock:
+        samples = {
+            "counter": dict(_counters),
+            "gauge": {
+                **_gauges,
+                **_cache_hit_ratio(_counters),
+                **_hedge_ratio(_counters),
+            },
+            "histogram": {k: list(v) for k, v in _histograms.items()},
+        }
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        series = sorted(
+            (key, value) for key, value in samples[kind].items() if key[0] == name
+        )
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (_, labels), value in series:
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for bound, count in zip(DURATION_BUCKETS, value):
+                le = (("le", repr(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {int(count)}")
+            inf = (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_format_labels(labels, inf)} {int(value[-1])}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {repr(value[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {int(value[-1])}")
+
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def write(path: str) -> None:
+    """Write the Prometheus text dump to a file"""
+    with open(path, "w") as f:
+        f.write(render())
@@ -0,0 +1,186 @@
+"""
+Unified diffs of the changes to workflow files, built from their edits.
+
+Rather than diffing whole files, the hunks are built straight from the spans
+the edits replace: only the lines they touch and their context are split and
+compared, so the cost follows the size of the changes, not of the files. The
+diffs can be applied with `git apply` or fed to review tools.
+"""
+
+import bisect
+import os
+import sys
+from types import TracebackType
+from typing import IO, List, Optional, Tuple, Type
+
+from src.common.constants import DIFF_CONTEXT_LINES, NO_NEWLINE_MARKER
+from src.workflow_index import Edit, apply_edits
+
+
+def _line_starts(content: str) -> List[int]:
+    starts = [0]
+    position = content.find("\n")
+    while position != -1:
+        starts.append(position + 1)
+        position = content.find("\n", position + 1)
+    if starts[-1] == len(content) and len(starts) > 1:
+        starts.pop()
+    return starts
+
+
+def _changed_ranges(
+    starts: List[int], edits: List[Edit]
+) -> List[Tuple[int, int, List[Edit]]]:
+    """Group the edits by the range of lines they touch, merging adjacent ones
+
+    Returns:
+        (first line, last line, edits) tuples, lines being 0-based and inclusive
+    """
+    ranges: List[Tuple[int, int, List[Edit]]] = []
+    for edit in sorted(edits, key=lambda edit: edit[:2]):
+        start, end, _ = edit
+        first = bisect.bisect_right(starts, start) - 1
+        last = bisect.bisect_right(starts, max(start, end - 1)) - 1
+        if ranges and first <= ranges[-1][1] + 1:
+            previous_first, previous_last, previous_edits = ranges[-1]
+            ranges[-1] = (previous_first, max(previous_last, last), previous_edits)
+            previous_edits.append(edit)
+        else:
+            ranges.append((first, last, [edit]))
+    return ranges
+
+
+def _lines(content: str, starts: List[int], first: int, last: int) -> List[str]:
+    end = starts[last + 1] if last + 1 < len(starts) else len(content)
+    return content[starts[first] : end].splitlines(keepends=True)
+
+
+def _diff_line(prefix: str, line: str) -> str:
+    if line.endswith("\n"):
+        return f"{prefix}{line}"
+    return f"{prefix}{line}\n{NO_NEWLINE_MARKER}\n"
+
+
+def _context(content: str, starts: List[int], first: int, last: int) -> List[str]:
+    """The unchanged lines from first to last, as diff lines"""
+    if first > last:
+        return []
+    return [_diff_line(" ", line) for line in _lines(content, starts, first, last)]
+
+
+def unified_diff(
+    path: str, content: str, edits: List[Edit], context: int = DIFF_CONTEXT_LINES
+) -> str:
+    """Build the unified diff of the edits to the content of a file
+
+    Args:
+        path: The path of the file, as shown in the diff headers (a/path, b/path)
+        context: Number of unchanged lines shown around the changes
+
+    Returns:
+        The diff, empty if the edits change nothing
+    """
+    edits = [edit for edit in edits if content[edit[0] : edit[1]] != edit[2]]
+    if not edits:
+        return ""
+
+    starts = _line_starts(content)
+    # The hunks, as lists of changed ranges close enough to share their context
+    hunks: List[List[Tuple[int, int, List[Edit]]]] = []
+    for changed in _changed_ranges(starts, edits):
+        if hunks and changed[0] - hunks[-1][-1][1] - 1 <= 2 * context:
+            hunks[-1].append(changed)
+        else:
+            hunks.append([changed])
+
+    output = [f"--- a/{path}\n", f"+++ b/{path}\n"]
+    # Lines added minus lines removed before the current hunk
+    offset = 0
+    for hunk in hunks:
+        hunk_first = max(0, hunk[0][0] - context)
+        hunk_last = min(len(starts) - 1, hunk[-1][1] + context)
+        body = []
+        old_count = new_count = 0
+        line = hunk_first
+        for first, last, range_edits in hunk:
+            unchanged = _context(content, starts, line, first - 1)
+            old_lines = _lines(content, starts, first, last)
+            base = starts[first]
+            new_lines = apply_edits(
+                "".join(old_lines),
+                [(start - base, end - base, text) for start, end, text in range_edits],
+            ).splitlines(keepends=True)
+            body.extend(unchanged)
+            body.extend(_diff_line("-", old) for old in old_lines)
+            body.extend(_diff_line("+", new) for new in new_lines)
+            old_count += len(unchanged) + len(old_lines)
+            new_count += len(unchanged) + len(new_lines)
+            line = last + 1
+        unchanged = _context(content, starts, line, hunk_last)
+        body.extend(unchanged)
+        old_count += len(unchanged)
+        new_count += len(unchanged)
+
+        output.append(
+            f"@@ -{hunk_first + 1},{old_count} "
+            f"+{hunk_first + 1 + offset},{new_count} @@\n"
+        )
+        output.extend(body)
+        offset += new_count - old_count
+    return "".join(output)
+
+
+def diff_path(file: str) -> str:
+    """The path of a file as shown in diffs: relative to the working directory"""
+    return os.path.relpath(file).replace(os.sep, "/")
+
+
+class DiffWriter:
+    """Write the diffs of workflow files to a file or stdout, as they come
+
+    Without a path, the diffs are only counted, which is enough to tell whether
+    any file would change.
+
+    Usage:
+        with DiffWriter(path) as writer:
+            for file, content, edits in changes:
+                writer.add(file, content, edits)
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        # The files that would change
+        self.changed: List[str] = []
+        self._file: Optional[IO[str]] = None
+        self._owned = False
+
+    def __enter__(self) -> "DiffWriter":
+        if self.path == "-":
+            # Taken now, so that the diff is not mixed with messages sent
+            # elsewhere while it is written
+            self._file = sys.stdout
+        elif self.path:
+            # The lines keep their own endings, CRLF ones included
+            self._file = open(self.path, "w", newline="")
+            self._owned = True
+        return self
+
+    def add(self, file: str, content: str, edits: List[Edit]) -> None:
+        """Write the diff of the edits to a file, if they change anything"""
+        diff = unified_diff(diff_path(file), content, edits)
+        if not diff:
+            return
+        self.changed.append(file)
+        if self._file:
+            self._file.write(diff)
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self._owned:
+            self._file.close()
+        elif self._file:
+            self._file.flush()
@@ -0,0 +1,268 @@
+"""
+Resolution of container image tags to their digests.
+
+Digests are retrieved with HEAD manifest requests to the OCI distribution API,
+authenticating with the bearer-token flow registries such as Docker Hub and
+GHCR require, even anonymously. Lookups share a pooled per-process HTTP session,
+the resolution cache and the failure handling of GitHub lookups.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from src import cache, metrics
+from src.common.constants import (
+    AUTH_CHALLENGE_PARAM_PATTERN,
+    DEFAULT_IMAGE_TAG,
+    DEFAULT_RESOLVE_WORKERS,
+    DOCKER_HUB_ALIASES,
+    DOCKER_HUB_NAMESPACE,
+    DOCKER_HUB_REGISTRY,
+    ERROR_RESOLVING_IMAGE,
+    IMAGE_DIGEST_PATTERN,
+    IMAGE_NOT_FOUND_ERROR,
+    IMAGE_REPOSITORY_PATTERN,
+    IMAGE_TAG_PATTERN,
+    INSECURE_REGISTRY_HOSTS,
+    KNOWN_FAILURE_MESSAGE,
+    MISSING_DIGEST_ERROR,
+    OCI_MANIFEST_MEDIA_TYPES,
+    OCI_MANIFEST_URL,
+    REGISTRY_TIMEOUT,
+    REGISTRY_TOKEN_TTL,
+)
+from src.common.exceptions import GhaPinnerError, InvalidImageError, ResolutionError
+from src.common.failure_reason import FailureReason
+from src.retriever import classify_http_error, record_failure
+from src.tracing import span
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+# Bearer tokens by (realm, service, scope), with the time they expire at
+_tokens: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+_tokens_lock = threading.Lock()
+
+
+def parse_image(image: str) -> Optional[Tuple[str, str, str, Optional[str]]]:
+    """Split an image reference ([registry/]repository[:tag][@digest])
+
+    Docker Hub references are normalized as Docker does: `alpine` stands for
+    `registry-1.docker.io/library/alpine:latest`.
+
+    Returns:
+        (registry, repository, tag, digest), or None if the reference is not
+        valid (e.g. an expression such as ${{ matrix.image }})
+    """
+    name, _, digest = image.partition("@")
+    tag = None
+    if name.rfind(":") > name.rfind("/"):
+        name, _, tag = name.rpartition(":")
+
+    first, _, rest = name.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        registry, repository = first, rest
+    else:
+        registry, repository = DOCKER_HUB_REGISTRY, name
+    if registry in DOCKER_HUB_ALIASES:
+        registry = DOCKER_HUB_REGISTRY
+    if registry == DOCKER_HUB_REGISTRY and "/" not in repository:
+        repository = f"{DOCKER_HUB_NAMESPACE}/{repository}"
+
+    if (
+        not re.match(IMAGE_REPOSITORY_PATTERN, repository)
+        or (tag is not None and not re.match(IMAGE_TAG_PATTERN, tag))
+        or (digest and not re.match(IMAGE_DIGEST_PATTERN, digest))
+    ):
+        return None
+    return registry, repository, tag or DEFAULT_IMAGE_TAG, digest or None
+
+
+def _get_session() -> requests.Session:
+    """Return this process' registry session, pooling connections across threads"""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=DEFAULT_RESOLVE_WORKERS)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+        _session_pid = os.getpid()
+    return _session
+
+
+def _record_rate_limit(registry: str, response: Response) -> None:
+    """Export the remaining pull quota reported by a registry (e.g. "76;w=21600")"""
+    remaining = response.headers.get("RateLimit-Remaining", "").split(";")[0]
+    if remaining.isdigit():
+        metrics.set_gauge(
+            "gha_pinner_registry_rate_limit_remaining",
+            int(remaining),
+            {"registry": registry},
+        )
+
+
+def _registry_request(
+    method: str, url: str, registry: str, headers: Dict[str, str], **kwargs
+) -> Response:
+    """Perform a registry request, recording its metrics"""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response: Response = _get_session().request(
+            method, url, headers=headers, timeout=REGISTRY_TIMEOUT, **kwargs
+        )
+        status = str(response.status_code)
+        _record_rate_limit(registry, response)
+        return response
+    finally:
+        metrics.inc(
+            "gha_pinner_http_requests_total", {"endpoint": "registry", "status": status}
+        )
+        metrics.observe(
+            "gha_pinner_http_request_duration_seconds",
+            time.perf_counter() - start,
+            {"endpoint": "registry"},
+        )
+
+
+def _bearer_token(registry: str, challenge: str) -> str:
+    """Get a token from the server named in a WWW-Authenticate challenge
+
+    Tokens are reused by every lookup of the same scope until they expire.
+    """
+    params = dict(re.findall(AUTH_CHALLENGE_PARAM_PATTERN, challenge))
+    realm = params.pop("realm", "")
+    key = (realm, params.get("service", ""), params.get("scope", ""))
+    with _tokens_lock:
+        token, expires_at = _tokens.get(key, ("", 0.0))
+    if token and time.monotonic() < expires_at:
+        return token
+
+    response = _registry_request("GET", realm, registry, {}, params=params)
+    response.raise_for_status()
+    data = response.json()
+    token = data.get("token") or data.get("access_token") or ""
+    expires_in = data.get("expires_in") or REGISTRY_TOKEN_TTL
+    with _tokens_lock:
+        _tokens[key] = (token, time.monotonic() + expires_in)
+    return token
+
+
+def _fetch_digest(registry: str, repository: str, tag: str) -> Optional[str]:
+    """Request the digest of a manifest, authenticating if the registry asks to"""
+    scheme = "http" if registry.split(":")[0] in INSECURE_REGISTRY_HOSTS else "https"
+    url = OCI_MANIFEST_URL.format(scheme, registry, repository, tag)
+    headers = {"Accept": ", ".join(OCI_MANIFEST_MEDIA_TYPES)}
+
+    response = _registry_request("HEAD", url, registry, headers)
+    challenge = response.headers.get("WWW-Authenticate", "")
+    if response.status_code == 401 and challenge.lower().startswith("bearer "):
+        headers["Authorization"] = f"Bearer {_bearer_token(registry, challenge)}"
+        response = _registry_request("HEAD", url, registry, headers)
+    response.raise_for_status()
+
+    digest = response.headers.get("Docker-Content-Digest")
+    if digest:
+        return digest
+
+    # The digest is the one of the manifest, so it can be computed instead
+    response = _registry_request("GET", url, registry, headers)
+    response.raise_for_status()
+    if not response.content:
+        return None
+    return "sha256:" + hashlib.sha256(response.content).hexdigest()
+
+
+def resolve_image_digest(image: str) -> str:
+    """Retrieve the digest of a container image, without printing anything
+
+    Raises:
+        InvalidImageError: If the image reference is not valid
+        ResolutionError: If the digest could not be retrieved
+    """
+    parts = parse_image(image)
+    if not parts:
+        raise InvalidImageError(image)
+    registry, repository, tag, digest = parts
+    if digest:
+        return digest
+
+    cache_key = f"image:{registry}/{repository}:{tag}"
+    cached = cache.lookup(cache_key)
+    if cached and "error" in cached:
+        reason = FailureReason(cached["error"])
+        raise ResolutionError(
+            image, reason, KNOWN_FAILURE_MESSAGE.format(image, reason.value)
+        )
+    if cached:
+        return cached["digest"]
+
+    with span("gha_pinner.resolve_image", image=image):
+        try:
+            digest = _fetch_digest(registry, repository, tag)
+        except requests.exceptions.HTTPError as e:
+            reason = classify_http_error(e)
+            record_failure(cache_key, reason)
+            if reason == FailureReason.NOT_FOUND:
+                message = IMAGE_NOT_FOUND_ERROR.format(image)
+            else:
+                message = ERROR_RESOLVING_IMAGE.format(image, e)
+            raise ResolutionError(image, reason, message) from e
+        except (requests.exceptions.RequestException, ValueError) as e:
+            record_failure(cache_key, FailureReason.UNAVAILABLE)
+            raise ResolutionError(
+                image, FailureReason.UNAVAILABLE, ERROR_RESOLVING_IMAGE.format(image, e)
+            ) from e
+
+    if not digest:
+        raise ResolutionError(
+            image, FailureReason.UNAVAILABLE, MISSING_DIGEST_ERROR.format(image)
+        )
+    cache.store(cache_key, digest=digest)
+    return digest
+
+
+def get_image_digest(image: str) -> Tuple[Optional[str], Optional[FailureReason]]:
+    """Retrieve the digest of a container image, printing why it failed if it did
+
+    Returns:
+        The digest, or None with the reason of the failure
+    """
+    try:
+        return resolve_image_digest(image), None
+    except ResolutionError as e:
+        print(e)
+        return None, e.reason
+    except GhaPinnerError as e:
+        print(e)
+        return None, None
+
+
+def resolve_image_digests(
+    images: List[str],
+    resolve=get_image_digest,
+    workers: int = DEFAULT_RESOLVE_WORKERS,
+) -> Dict[str, Tuple[Optional[str], Optional[FailureReason]]]:
+    """Retrieve the digests of many images concurrently
+
+    Args:
+        resolve: Returns the digest of an image, or the reason it has none
+
+    Returns:
+        The digest of each image, or None with the reason of the failure
+    """
+    unique = list(dict.fromkeys(images))
+    if workers <= 1 or len(unique) <= 1:
+        return {image: resolve(image) for image in unique}
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(unique))) as pool:
+        return dict(zip(unique, pool.map(resolve, unique)))
@@ -0,0 +1,237 @@
+"""
+Resolution cache shared by a fleet of runners over HTTP.
+
+The protocol is a plain key/value store, so any internal cache service can
+implement it:
+
+    GET /v1/<key>  -> 200 with the JSON entry, or 404 if unknown
+    PUT /v1/<key>  -> 204, the JSON entry being the request body
+
+where <key> is the URL-encoded cache key (e.g. 'actions%2Fcheckout%40v4') and
+entries carry the time they were resolved at, so that clients apply their own
+expiry. `CacheServer` is a reference in-memory implementation.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import requests
+from requests import Response
+
+from src import metrics
+from src.cache import CacheBackend
+from src.common.constants import (
+    REMOTE_CACHE_COOLDOWN,
+    REMOTE_CACHE_PATH_PREFIX,
+    REMOTE_CACHE_TIMEOUT,
+    REMOTE_CACHE_UNAVAILABLE_WARNING,
+)
+
+
+class HttpBackend(CacheBackend):
+    """Client of a remote cache, reading through on misses and writing behind
+
+    Writes are queued and sent by a background thread, so resolving an action
+    never waits on the remote. Once a request fails, the remote is left alone
+    for a cooldown period and the run carries on with its local cache.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = REMOTE_CACHE_TIMEOUT,
+        cooldown: float = REMOTE_CACHE_COOLDOWN,
+        on_unavailable: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        Args:
+            on_unavailable: Called with a warning each time the remote becomes
+                unavailable
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.on_unavailable = on_unavailable
+        self._down_until = 0.0
+        self._pid: Optional[int] = None
+        self._session: Optional[requests.Session] = None
+        self._queue: "queue.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        """Set up the session and writer of this process (e.g. a forked worker)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._session = requests.Session()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_behind, daemon=True)
+        self._writer.start()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes without the session and writer of this one,
+        # which they set up on first use
+        state = self.__dict__.copy()
+        state.update(_pid=None, _session=None, _queue=None, _writer=None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._queue = queue.Queue()
+
+    def _is_available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _mark_down(self, reason: Any) -> None:
+        if self._is_available() and self.on_unavailable:
+            self.on_unavailable(
+                REMOTE_CACHE_UNAVAILABLE_WARNING.format(self.url, reason, self.cooldown)
+            )
+        self._down_until = time.monotonic() + self.cooldown
+
+    def _request(self, method: str, key: str, **kwargs: Any) -> Optional[Response]:
+        """Send a request to the remote, or return None if it is unavailable"""
+        if not self._is_available():
+            metrics.inc(
+                "gha_pinner_remote_cache_requests_total",
+                {"operation": method.lower(), "result": "skipped"},
+            )
+            return None
+
+        url = f"{self.url}{REMOTE_CACHE_PATH_PREFIX}{quote(key, safe='')}"
+        response: Optional[Response] = None
+        try:
+            response = self._session.request(
+                method, url, timeout=self.timeout, **kwargs
+            )
+            if response.status_code >= 500:
+                self._mark_down(f"HTTP {response.status_code}")
+                response = None
+        except requests.exceptions.RequestException as e:
+            self._mark_down(e)
+
+        if response is None:
+            result = "error"
+        elif response.status_code == 404:
+            result = "miss"
+        else:
+            result = "ok" if response.ok else "error"
+        metrics.inc(
+            "gha_pinner_remote_cache_requests_total",
+            {"operation": method.lower(), "result": result},
+        )
+        return response
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        self._start()
+        response = self._request("GET", key)
+        if response is None or response.status_code != 200:
+            return None
+        try:
+            entry = response.json()
+        except ValueError:
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        self._start()
+        if self._is_available():
+            self._queue.put((key, entry))
+
+    def _write_behind(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                key, entry = item
+                self._request("PUT", key, json=entry)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        self.flush()
+        if self._pid == os.getpid():
+            self._queue.put(None)
+
+
+class _CacheRequestHandler(BaseHTTPRequestHandler):
+    server: "CacheServer"
+
+    def _key(self) -> Optional[str]:
+        if not self.path.startswith(REMOTE_CACHE_PATH_PREFIX):
+            return None
+        key = unquote(self.path[len(REMOTE_CACHE_PATH_PREFIX) :])
+        return key or None
+
+    def _reply(self, status: int, body: Optional[Dict[str, Any]] = None) -> None:
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        key = self._key()
+        entry = self.server.get(key) if key else None
+        if entry is None:
+            self._reply(404)
+        else:
+            self._reply(200, entry)
+
+    def do_PUT(self) -> None:
+        key = self._key()
+        if key is None:
+            self._reply(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            entry = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._reply(400)
+            return
+        if not isinstance(entry, dict):
+            self._reply(400)
+            return
+        self.server.put(key, entry)
+        self._reply(204)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Serving one request per lookup, access logs would drown everything else
+        pass
+
+
+class CacheServer(ThreadingHTTPServer):
+    """Reference implementation of the remote cache protocol, kept in memory"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int]) -> None:
+        super().__init__(address, _CacheRequestHandler)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store the entry, unless a more recently resolved one is already stored"""
+        with self._lock:
+            current = self.entries.get(key)
+            if current is None or entry.get("resolved_at", 0) >= current.get(
+                "resolved_at", 0
+            ):
+                self.entries[key] = entry
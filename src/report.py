@@ -0,0 +1,200 @@
+"""
+JSON reports of the actions found while processing workflows.
+"""
+
+import json
+import os
+from collections import Counter
+from types import TracebackType
+from typing import IO, Any, Dict, List, Optional, Tuple, Type
+
+from src.common.action_status import ActionStatus
+from src.common.constants import (
+    DUPLICATE_SHARDS_ERROR,
+    INCONSISTENT_SHARD_COUNTS_ERROR,
+    REPORT_FORMAT_VERSION,
+    UNSHARDED_REPORT_ERROR,
+    UNSUPPORTED_REPORT_VERSION_ERROR,
+)
+
+
+def summarize(actions: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count the actions found for each status"""
+    summary = {status.value: 0 for status in ActionStatus}
+    for action in actions:
+        summary[ActionStatus(action["status"]).value] += 1
+    return summary
+
+
+def _serialize_action(action: Dict[str, Any]) -> Dict[str, Any]:
+    return {**action, "status": ActionStatus(action["status"]).value}
+
+
+def build_report(
+    results: Dict[str, List[Dict[str, Any]]],
+    validate_only: bool,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """Build a JSON-serializable report from the actions found per target
+
+    Args:
+        results: Actions found, keyed by the repository or file they come from
+        validate_only: Whether the actions were only validated
+        shard: The (K, N) shard the results were produced for, if any
+
+    Returns:
+        The report, with a summary per target and an overall summary
+    """
+    return {
+        "version": REPORT_FORMAT_VERSION,
+        "validate": validate_only,
+        "shards": [list(shard)] if shard else [],
+        "results": {
+            target: {
+                "summary": summarize(actions),
+                "actions": [_serialize_action(action) for action in actions],
+            }
+            for target, actions in results.items()
+        },
+        "summary": summarize(
+            [action for actions in results.values() for action in actions]
+        ),
+    }
+
+
+def merge_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the reports of several runs (e.g. one per shard) into one
+
+    Args:
+        reports: Reports as produced by `build_report`
+
+    Returns:
+        A report over every target of the given reports
+
+    Raises:
+        ValueError: If a shard is covered by several reports, or if sharded and
+            unsharded reports are mixed
+    """
+    shards = Counter(
+        tuple(shard) for report in reports for shard in report.get("shards", [])
+    )
+    duplicates = sorted(shard for shard, reported in shards.items() if reported > 1)
+    if duplicates:
+        raise ValueError(
+            DUPLICATE_SHARDS_ERROR.format(
+                ", ".join(f"{index}/{count}" for index, count in duplicates)
+            )
+        )
+    if shards and any(not report.get("shards") for report in reports):
+        raise ValueError(UNSHARDED_REPORT_ERROR)
+
+    results = {}
+    for report in reports:
+        for target, result in report["results"].items():
+            results[target] = result["actions"]
+
+    merged = build_report(results, all(report["validate"] for report in reports))
+    merged["shards"] = sorted(list(shard) for shard in shards)
+    return merged
+
+
+def missing_shards(report: Dict[str, Any]) -> List[int]:
+    """Return the shards (1-based) that are not covered by the report"""
+    shards = report.get("shards", [])
+    if not shards:
+        return []
+
+    counts = {count for _, count in shards}
+    if len(counts) != 1:
+        raise ValueError(INCONSISTENT_SHARD_COUNTS_ERROR.format(sorted(counts)))
+
+    covered = {index for index, _ in shards}
+    return [index for index in range(1, counts.pop() + 1) if index not in covered]
+
+
+def read_report(path: str) -> Dict[str, Any]:
+    """Read a JSON report"""
+    with open(path, "r") as f:
+        report = json.load(f)
+    if report.get("version") != REPORT_FORMAT_VERSION:
+        raise ValueError(UNSUPPORTED_REPORT_VERSION_ERROR.format(path))
+    return report
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """Write the report to a JSON file"""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+class ReportWriter:
+    """Write a report incrementally, one target at a time
+
+    The report is the same as the one `build_report` returns, but only the
+    running summary is kept in memory. It is written to a temporary file which
+    replaces `path` once complete, so an interrupted run leaves no partial
+    report behind.
+
+    Usage:
+        with ReportWriter(path, validate_only) as writer:
+            for target, actions in results:
+                writer.add(target, actions)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        validate_only: bool,
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.path = path
+        self.validate_only = validate_only
+        self.shard = shard
+        self.summary = summarize([])
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._file: Optional[IO[str]] = None
+        self._targets = 0
+
+    def __enter__(self) -> "ReportWriter":
+        self._file = open(self._tmp_path, "w")
+        self._file.write("{\n")
+        self._write_field("version", REPORT_FORMAT_VERSION)
+        self._write_field("validate", self.validate_only)
+        self._write_field("shards", [list(self.shard)] if self.shard else [])
+        self._file.write('  "results": {')
+        return self
+
+    def _write_field(self, name: str, value: Any) -> None:
+        self._file.write(f"  {json.dumps(name)}: {json.dumps(value)},\n")
+
+    def add(self, target: str, actions: List[Dict[str, Any]]) -> None:
+        """Write the actions found for a target, e.g. a workflow file"""
+        summary = summarize(actions)
+        for status, count in summary.items():
+            self.summary[status] += count
+
+        result = {
+            "summary": summary,
+            "actions": [_serialize_action(action) for action in actions],
+        }
+        separator = "," if self._targets else ""
+        self._file.write(f"{separator}\n    {json.dumps(target)}: {json.dumps(result)}")
+        self._targets += 1
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        try:
+            if exc_type is None:
+                self._file.write("\n  }," if self._targets else "},")
+                self._file.write(f'\n  "summary": {json.dumps(self.summary)}\n}}\n')
+        finally:
+            self._file.close()
+
+        if exc_type is None:
+            os.replace(self._tmp_path, self.path)
+        else:
+            os.remove(self._tmp_path)
@@ -1,89 +1,670 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 from re import Match, match
-from typing import Any, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
 
+from src import cache, hedging, hosts, metrics, seed_index
 from src.common.constants import (
     ACTION_REGEX_PATTERN,
+    ADVERTISED_REF_FORMATS,
+    DEFAULT_RESOLVE_WORKERS,
+    ERROR_COMPARING_COMMITS,
+    ERROR_FETCHING_FILE,
+    ERROR_LISTING_REFS,
+    ERROR_READING_ADVERTISED_REFS,
     ERROR_RETRIEVING_LATEST_RELEASE,
+    ERROR_RETRIEVING_REPO,
     ERROR_RETRIEVING_SHA,
     EXPECTED_FORMAT_MESSAGE,
+    GIT_INFO_REFS_URL,
+    GITHUB_API_BRANCHES_URL,
     GITHUB_API_COMMITS_URL,
+    GITHUB_API_COMPARE_URL,
     GITHUB_API_RELEASES_URL,
-    INVALID_ACTION_FORMAT_ERROR,
+    GITHUB_API_REPO_URL,
+    GITHUB_API_TAGS_URL,
+    GITHUB_RAW_URL,
+    HOST_RATE_LIMITED_ERROR,
+    KNOWN_FAILURE_MESSAGE,
+    MISSING_SHA_ERROR,
+    NO_LATEST_RELEASE_ERROR,
     ORIGINAL_ACTION_FORMAT,
     PINNED_ACTION_FORMAT,
     PRIVATE_OR_INVALID_ACTION_ERROR,
+    REF_NOT_ADVERTISED_ERROR,
+    SHA_REGEX_PATTERN,
     UNABLE_TO_PIN_ACTION,
 )
+from src.common.exceptions import GhaPinnerError, InvalidActionError, ResolutionError
+from src.common.failure_reason import DEFINITIVE_FAILURES, FailureReason
+from src.hosts import Host
+from src.tracing import span
 
+# HTTP sessions by host name, each pooling the connections to its host
+_sessions: Dict[str, requests.Session] = {}
+_sessions_pid: Optional[int] = None
+_sessions_lock = threading.Lock()
 
-def _parse_action(action: str) -> tuple[str, str, str]:
-    """Parse the action string (owner/repo@ref)"""
-    matched: Match[str] = match(ACTION_REGEX_PATTERN, action)
+# When the exhausted rate limit of a host resets, by host name
+_rate_limit_resets: Dict[str, float] = {}
+
+# Why the last resolution of an action failed, keyed by action
+_failures: Dict[str, FailureReason] = {}
+
+
+def split_action(action: str) -> Optional[Tuple[str, str, str, str]]:
+    """Split an action string (owner/repo[/path]@ref) into its parts
+
+    Returns:
+        (owner, repo, path, ref), with an empty path for top-level actions, or
+        None if the action is not in that format
+    """
+    matched: Optional[Match[str]] = match(ACTION_REGEX_PATTERN, action)
     if not matched:
-        print(INVALID_ACTION_FORMAT_ERROR.format(action))
-        print(EXPECTED_FORMAT_MESSAGE)
-        return ("", "", "")
+        return None
 
-    return matched.groups()
+    owner, repo, path, ref = matched.groups()
+    return owner, repo, path or "", ref
 
 
-def get_latest_release_tag(owner: str, repo: str) -> Optional[str]:
-    """Get the latest release tag for a repository"""
-    api_url: str = GITHUB_API_RELEASES_URL.format(owner, repo)
+def _record_rate_limit(host: Host, response: Response) -> None:
+    """Export the remaining API quota of the host reported by a response, and
+    remember when it resets once it is exhausted"""
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    if not (isinstance(remaining, str) and remaining.isdigit()):
+        return
+
+    metrics.set_gauge(
+        "gha_pinner_rate_limit_remaining", int(remaining), {"host": host.name}
+    )
+    reset = response.headers.get("X-RateLimit-Reset")
+    if remaining == "0" and isinstance(reset, str) and reset.isdigit():
+        _rate_limit_resets[host.name] = float(reset)
+
+
+def _check_rate_limit(host: Host, url: str) -> None:
+    """Fail fast rather than query a host whose rate limit is exhausted, leaving
+    the budgets of the other hosts untouched
+
+    Raises:
+        ResolutionError: If the rate limit of the host has not reset yet
+    """
+    reset = _rate_limit_resets.get(host.name)
+    if reset is None:
+        return
+    if time.time() >= reset:
+        _rate_limit_resets.pop(host.name, None)
+        return
+    raise ResolutionError(
+        host.name,
+        FailureReason.RATE_LIMITED,
+        HOST_RATE_LIMITED_ERROR.format(
+            host.name, time.strftime("%H:%M:%S", time.localtime(reset)), url
+        ),
+    )
+
+
+def _get_session(host: Host = hosts.GITHUB) -> requests.Session:
+    """Return this process' HTTP session for a host, so connections to each host
+    are pooled and reused across lookups"""
+    global _sessions_pid
+    with _sessions_lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(host.name)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=DEFAULT_RESOLVE_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if host.token:
+                session.headers["Authorization"] = f"Bearer {host.token}"
+            _sessions[host.name] = session
+        return session
+
+
+def _github_get(
+    url: str, endpoint: str, host: Host = hosts.GITHUB, **kwargs: Any
+) -> Response:
+    """Perform a GET request to the API of a GitHub host, recording its metrics
+
+    Args:
+        kwargs: Passed on to the request (e.g. auth)
+
+    Raises:
+        ResolutionError: If the rate limit of the host is exhausted
+    """
+    _check_rate_limit(host, url)
+    start = time.perf_counter()
+    status = "error"
     try:
-        response: Response = requests.get(api_url)
+        response: Response = _get_session(host).get(url, **kwargs)
+        status = str(response.status_code)
+        _record_rate_limit(host, response)
+        return response
+    finally:
+        metrics.inc(
+            "gha_pinner_http_requests_total", {"endpoint": endpoint, "status": status}
+        )
+        metrics.observe(
+            "gha_pinner_http_request_duration_seconds",
+            time.perf_counter() - start,
+            {"endpoint": endpoint},
+        )
+
+
+def classify_http_error(error: requests.exceptions.HTTPError) -> FailureReason:
+    """Tell definitive failures apart from transient ones"""
+    response = error.response
+    if response is None:
+        return FailureReason.UNAVAILABLE
+    if response.status_code == 404:
+        return FailureReason.NOT_FOUND
+    if response.status_code in (403, 429) and (
+        response.status_code == 429
+        or response.headers.get("X-RateLimit-Remaining") == "0"
+        # Secondary rate limits keep a non-zero remaining count
+        or "Retry-After" in response.headers
+        or "rate limit" in response.text.lower()
+    ):
+        return FailureReason.RATE_LIMITED
+    if response.status_code == 401:
+        # A bad or expired token, not a fact about the action
+        return FailureReason.UNAUTHORIZED
+    if response.status_code in (403, 451):
+        return FailureReason.FORBIDDEN
+    return FailureReason.UNAVAILABLE
+
+
+def record_failure(cache_key: str, reason: FailureReason) -> None:
+    """Count the failure, caching it if it is definitive"""
+    if reason in DEFINITIVE_FAILURES:
+        cache.store(cache_key, error=reason.value)
+    metrics.inc("gha_pinner_resolution_failures_total", {"reason": reason.value})
+
+
+def get_failure_reason(action: str) -> Optional[FailureReason]:
+    """Return why the last resolution of the action failed, if it did"""
+    return _failures.get(action)
+
+
+def resolve_latest_release_tag(owner: str, repo: str) -> Optional[str]:
+    """Get the latest release tag for a repository, without printing anything
+
+    Returns:
+        The tag, or None if the repository has no release
+
+    Raises:
+        ResolutionError: If the release could not be retrieved
+    """
+    host = hosts.host_for(owner)
+    cache_key = f"release:{host.key_prefix}{owner}/{repo}"
+    cached = cache.lookup(cache_key)
+    if cached:
+        return cached["tag"]
+
+    api_url: str = GITHUB_API_RELEASES_URL.format(host.api_url, owner, repo)
+    try:
+        response: Response = _github_get(api_url, "releases", host)
         response.raise_for_status()
         data: dict[str, Any] = response.json()
-        return data.get("tag_name")
-    except Exception as e:
-        print(ERROR_RETRIEVING_LATEST_RELEASE.format(owner, repo, e))
+    except requests.exceptions.HTTPError as e:
+        raise ResolutionError(
+            f"{owner}/{repo}@latest",
+            classify_http_error(e),
+            ERROR_RETRIEVING_LATEST_RELEASE.format(owner, repo, e),
+        ) from e
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise ResolutionError(
+            f"{owner}/{repo}@latest",
+            FailureReason.UNAVAILABLE,
+            ERROR_RETRIEVING_LATEST_RELEASE.format(owner, repo, e),
+        ) from e
+
+    tag = data.get("tag_name")
+    if tag:
+        cache.store(cache_key, tag=tag)
+    return tag
+
+
+def _github_get_json(
+    url: str, endpoint: str, repo: str, message: str, host: Host, **kwargs: Any
+) -> Response:
+    """Perform a GitHub API GET request, raising a ResolutionError on failure
+
+    Args:
+        repo: The owner/repo the request is about
+        message: Format of the error message, given the error
+        kwargs: Passed on to the request (e.g. auth)
+    """
+    try:
+        response: Response = _github_get(url, endpoint, host, **kwargs)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.HTTPError as e:
+        raise ResolutionError(repo, classify_http_error(e), message.format(e)) from e
+    except requests.exceptions.RequestException as e:
+        raise ResolutionError(repo, FailureReason.UNAVAILABLE, message.format(e)) from e
+
+
+def _list_refs(owner: str, repo: str, kind: str, url: str) -> List[Tuple[str, str]]:
+    """List the tags or branches of a repository with their commit SHAs
+
+    Every page of the listing is fetched, and the whole listing is cached so
+    that all the occurrences of the repository's actions share a single one.
+    """
+    host = hosts.host_for(owner)
+    cache_key = f"{kind}:{host.key_prefix}{owner}/{repo}"
+    cached = cache.lookup(cache_key)
+    if cached:
+        return [(name, sha) for name, sha in cached[kind]]
+
+    refs: List[Tuple[str, str]] = []
+    message = ERROR_LISTING_REFS.format(kind, owner, repo, "{}")
+    next_url: Optional[str] = url.format(host.api_url, owner, repo)
+    while next_url:
+        response = _github_get_json(next_url, kind, f"{owner}/{repo}", message, host)
+        try:
+            refs.extend((ref["name"], ref["commit"]["sha"]) for ref in response.json())
+        except (ValueError, KeyError, TypeError) as e:
+            raise ResolutionError(
+                f"{owner}/{repo}", FailureReason.UNAVAILABLE, message.format(e)
+            ) from e
+        next_url = response.links.get("next", {}).get("url")
+
+    cache.store(cache_key, **{kind: [list(ref) for ref in refs]})
+    return refs
+
+
+def list_tags(owner: str, repo: str) -> List[Tuple[str, str]]:
+    """List the tags of a repository with their commit SHAs, without printing anything
+
+    Returns:
+        (tag, sha) pairs, in the order GitHub returns them
+
+    Raises:
+        ResolutionError: If the tags could not be listed
+    """
+    return _list_refs(owner, repo, "tags", GITHUB_API_TAGS_URL)
+
+
+def list_branches(owner: str, repo: str) -> List[Tuple[str, str]]:
+    """List the branches of a repository with the SHAs of their heads, without
+    printing anything
+
+    Raises:
+        ResolutionError: If the branches could not be listed
+    """
+    return _list_refs(owner, repo, "branches", GITHUB_API_BRANCHES_URL)
+
+
+def get_default_branch(owner: str, repo: str) -> str:
+    """Get the name of the default branch of a repository, without printing anything
+
+    Raises:
+        ResolutionError: If the repository could not be retrieved
+    """
+    host = hosts.host_for(owner)
+    cache_key = f"repo:{host.key_prefix}{owner}/{repo}"
+    cached = cache.lookup(cache_key)
+    if cached:
+        return cached["default_branch"]
+
+    message = ERROR_RETRIEVING_REPO.format(owner, repo, "{}")
+    response = _github_get_json(
+        GITHUB_API_REPO_URL.format(host.api_url, owner, repo),
+        "repos",
+        f"{owner}/{repo}",
+        message,
+        host,
+    )
+    try:
+        default_branch = response.json()["default_branch"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ResolutionError(
+            f"{owner}/{repo}", FailureReason.UNAVAILABLE, message.format(e)
+        ) from e
+
+    cache.store(cache_key, default_branch=default_branch)
+    return default_branch
+
+
+def is_commit_reachable(owner: str, repo: str, sha: str, base: str) -> bool:
+    """Check that a commit is an ancestor of (or is) the base ref in the repository
+
+    GitHub serves the commits of forks through their parent repository too, so
+    a commit being retrievable does not mean that it belongs to the repository.
+
+    Raises:
+        ResolutionError: If the commits could not be compared
+    """
+    host = hosts.host_for(owner)
+    cache_key = f"compare:{host.key_prefix}{owner}/{repo}:{base}...{sha}"
+    cached = cache.lookup(cache_key)
+    if cached:
+        return cached["reachable"]
+
+    message = ERROR_COMPARING_COMMITS.format(sha, base, owner, repo, "{}")
+    try:
+        response = _github_get_json(
+            GITHUB_API_COMPARE_URL.format(host.api_url, owner, repo, base, sha),
+            "compare",
+            f"{owner}/{repo}",
+            message,
+            host,
+        )
+        status = response.json().get("status")
+    except ResolutionError as e:
+        if e.reason != FailureReason.NOT_FOUND:
+            raise
+        # The commit is unknown to the repository and all its forks
+        status = None
+    except (ValueError, AttributeError) as e:
+        raise ResolutionError(
+            f"{owner}/{repo}", FailureReason.UNAVAILABLE, message.format(e)
+        ) from e
+
+    reachable = status in ("identical", "behind")
+    cache.store(cache_key, reachable=reachable)
+    return reachable
+
+
+def fetch_file(owner: str, repo: str, sha: str, path: str) -> Optional[str]:
+    """Fetch a file of a repository at a commit, without printing anything
+
+    The content at a commit SHA never changes, so it is cached forever, as is
+    the absence of the file.
+
+    Returns:
+        The content of the file, or None if it does not exist at that commit
+
+    Raises:
+        ResolutionError: If the file could not be fetched
+    """
+    host = hosts.host_for(owner)
+    cache_key = f"file:{host.key_prefix}{owner}/{repo}@{sha}/{path}"
+    cached = cache.lookup(cache_key)
+    if cached:
+        return cached["content"]
+
+    message = ERROR_FETCHING_FILE.format(path, owner, repo, sha, "{}")
+    try:
+        response = _github_get_json(
+            GITHUB_RAW_URL.format(host.raw_url, owner, repo, sha, path),
+            "raw",
+            f"{owner}/{repo}@{sha}",
+            message,
+            host,
+        )
+        content: Optional[str] = response.text
+    except ResolutionError as e:
+        if e.reason != FailureReason.NOT_FOUND:
+            raise
+        content = None
+
+    cache.store(cache_key, content=content, immutable=True)
+    return content
+
+
+def get_latest_release_tag(owner: str, repo: str) -> Optional[str]:
+    """Get the latest release tag for a repository"""
+    try:
+        return resolve_latest_release_tag(owner, repo)
+    except ResolutionError as e:
+        print(e)
         return None
 
 
+def resolve_action_sha(action: str) -> str:
+    """Retrieve the commit SHA for a GitHub Action, without printing anything
+
+    Raises:
+        InvalidActionError: If the action is not in the owner/repo[/path]@ref format
+        ResolutionError: If the SHA could not be retrieved
+    """
+    with span("gha_pinner.resolve", action=action):
+        with metrics.timed("gha_pinner_resolution_duration_seconds"):
+            try:
+                sha = _resolve_action_sha(action)
+            except GhaPinnerError:
+                metrics.inc("gha_pinner_resolutions_total", {"result": "failed"})
+                raise
+    metrics.inc("gha_pinner_resolutions_total", {"result": "resolved"})
+    return sha
+
+
 def get_action_sha(action: str) -> Optional[str]:
     """Retrieve the commit SHA for a GitHub Action."""
+    try:
+        sha = resolve_action_sha(action)
+    except InvalidActionError as e:
+        print(e)
+        print(EXPECTED_FORMAT_MESSAGE)
+        return None
+    except ResolutionError as e:
+        _failures[action] = e.reason
+        print(e)
+        return None
 
-    owner, repo, ref = _parse_action(action)
+    _failures.pop(action, None)
+    return sha
 
-    if owner == "" or repo == "" or ref == "":
-        return None
+
+def get_action_shas(
+    actions: List[str], workers: int = DEFAULT_RESOLVE_WORKERS
+) -> Dict[str, Optional[str]]:
+    """Retrieve the commit SHAs of many actions concurrently
+
+    Lookups are network bound, so they run in thread pools sharing the sessions
+    and the cache of this process. Each host gets a pool of its own, so that
+    actions of several hosts (e.g. github.com and a GHES instance) resolve
+    concurrently, a slow or throttled host holding up only its own actions.
+
+    Returns:
+        The SHA of each action, or None if it could not be retrieved
+    """
+    unique = list(dict.fromkeys(actions))
+    if workers <= 1 or len(unique) <= 1:
+        return {action: get_action_sha(action) for action in unique}
+
+    by_host: Dict[str, List[str]] = {}
+    for action in unique:
+        parts = split_action(action)
+        host = hosts.host_for(parts[0]) if parts else hosts.GITHUB
+        by_host.setdefault(host.name, []).append(action)
+
+    futures: Dict[str, "Future[Optional[str]]"] = {}
+    with ExitStack() as stack:
+        for host_actions in by_host.values():
+            pool = stack.enter_context(
+                ThreadPoolExecutor(max_workers=min(workers, len(host_actions)))
+            )
+            for action in host_actions:
+                futures[action] = pool.submit(get_action_sha, action)
+    return {action: futures[action].result() for action in unique}
+
+
+def _resolve_action_sha(action: str) -> str:
+    parts = split_action(action)
+    if not parts:
+        raise InvalidActionError(action)
+    owner, repo, _, ref = parts
+    host = hosts.host_for(owner)
+
+    cache_key = f"{host.key_prefix}{owner}/{repo}@{ref}"
+    cached = cache.lookup(cache_key)
+    if cached and "error" in cached:
+        reason = FailureReason(cached["error"])
+        raise ResolutionError(
+            action, reason, KNOWN_FAILURE_MESSAGE.format(action, reason.value)
+        )
+    if cached:
+        return cached["sha"]
+    # Cold runners find the popular github.com actions in the seed index
+    if not host.key_prefix:
+        seeded = seed_index.lookup(cache_key)
+        if seeded:
+            return seeded
 
     # Handle @latest tag by fetching the latest release tag
     if ref == "latest":
-        latest_tag = get_latest_release_tag(owner, repo)
+        try:
+            latest_tag = resolve_latest_release_tag(owner, repo)
+        except ResolutionError as e:
+            raise ResolutionError(action, e.reason, str(e)) from e
         if not latest_tag:
-            return None
+            raise ResolutionError(
+                action,
+                FailureReason.NOT_FOUND,
+                NO_LATEST_RELEASE_ERROR.format(owner, repo, action),
+            )
         ref = latest_tag
 
+    # Commit SHAs need no hedging, only the API tells whether they exist
+    if hedging.is_enabled() and not match(SHA_REGEX_PATTERN, ref):
+        # The failures of the primary lookup are only recorded once both lookups
+        # failed, since a primary failing after losing to the hedge must not
+        # cache its failure over the answer
+        failures: List[FailureReason] = []
+        try:
+            sha = hedging.run(
+                host.name,
+                lambda: _commit_sha(host, owner, repo, ref, action, failures.append),
+                lambda: _advertised_sha(host, owner, repo, ref, action),
+            )
+        except ResolutionError:
+            for reason in failures:
+                record_failure(cache_key, reason)
+            raise
+    else:
+        sha = _commit_sha(
+            host, owner, repo, ref, action, partial(record_failure, cache_key)
+        )
+    cache.store(cache_key, sha=sha)
+    return sha
+
+
+def _commit_sha(
+    host: Host,
+    owner: str,
+    repo: str,
+    ref: str,
+    action: str,
+    on_failure: Callable[[FailureReason], None],
+) -> str:
+    """Retrieve the commit SHA of a ref from the commits API of the host
+
+    Args:
+        on_failure: Called with the reason of a failed request, before raising
+    """
     # GitHub API URL to get the commit SHA
-    api_url: str = GITHUB_API_COMMITS_URL.format(owner, repo, ref)
+    api_url: str = GITHUB_API_COMMITS_URL.format(host.api_url, owner, repo, ref)
 
     try:
-        response: Response = requests.get(api_url)
+        response: Response = _github_get(api_url, "commits", host)
         response.raise_for_status()
         data: dict[str, Any] = response.json()
-        return data.get("sha")
     except requests.exceptions.HTTPError as e:
+        reason = classify_http_error(e)
+        on_failure(reason)
         # Handle 404 errors (private or invalid actions)
-        try:
-            if hasattr(e, "response") and e.response and e.response.status_code == 404:
-                print(PRIVATE_OR_INVALID_ACTION_ERROR.format(action))
-        except AttributeError:
-            print(ERROR_RETRIEVING_SHA.format(action, e))
-        return None
-    except requests.exceptions.RequestException as e:
-        print(ERROR_RETRIEVING_SHA.format(action, e))
-        return None
+        if reason == FailureReason.NOT_FOUND:
+            message = PRIVATE_OR_INVALID_ACTION_ERROR.format(action)
+        else:
+            message = ERROR_RETRIEVING_SHA.format(action, e)
+        raise ResolutionError(action, reason, message) from e
+    except (requests.exceptions.RequestException, ValueError) as e:
+        on_failure(FailureReason.UNAVAILABLE)
+        raise ResolutionError(
+            action, FailureReason.UNAVAILABLE, ERROR_RETRIEVING_SHA.format(action, e)
+        ) from e
+
+    sha = data.get("sha")
+    if not sha:
+        raise ResolutionError(
+            action, FailureReason.UNAVAILABLE, MISSING_SHA_ERROR.format(action)
+        )
+    return sha
+
+
+def parse_advertised_refs(content: bytes) -> Dict[str, str]:
+    """Parse the ref advertisement of the git smart HTTP protocol
+
+    The advertisement is a sequence of pkt-lines (4 hexadecimal digits giving
+    the length of the line, themselves included, "0000" flushing), each
+    advertising a ref as "<sha> <name>", the first one followed by a NUL and the
+    server capabilities.
+
+    Returns:
+        The SHA of each advertised ref, by name (e.g. refs/tags/v4)
+
+    Raises:
+        ValueError: If the content is not a ref advertisement
+    """
+    refs: Dict[str, str] = {}
+    position = 0
+    while position < len(content):
+        length = int(content[position : position + 4], 16)
+        if length == 0:
+            position += 4
+            continue
+        if length < 4:
+            raise ValueError(f"invalid pkt-line length {length}")
+        line = content[position + 4 : position + length].split(b"\0")[0]
+        position += length
+        if line.startswith(b"#"):
+            continue
+        sha, _, name = line.decode().rstrip("\n").partition(" ")
+        if name:
+            refs[name] = sha
+    return refs
+
+
+def _advertised_sha(host: Host, owner: str, repo: str, ref: str, action: str) -> str:
+    """Retrieve the commit SHA of a tag or branch from the git ref advertisement
+    of the repository, which does not count against the API rate limit"""
+    message = ERROR_READING_ADVERTISED_REFS.format(owner, repo, "{}")
+    response = _github_get_json(
+        GIT_INFO_REFS_URL.format(host.git_url, owner, repo),
+        "git_refs",
+        action,
+        message,
+        host,
+        auth=("x-access-token", host.token) if host.token else None,
+    )
+    try:
+        refs = parse_advertised_refs(response.content)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ResolutionError(
+            action, FailureReason.UNAVAILABLE, message.format(e)
+        ) from e
+
+    for ref_format in ADVERTISED_REF_FORMATS:
+        sha = refs.get(ref_format.format(ref))
+        if sha:
+            return sha
+    raise ResolutionError(
+        action,
+        FailureReason.NOT_FOUND,
+        REF_NOT_ADVERTISED_ERROR.format(owner, repo, ref),
+    )
 
 
 def print_pinned_action(action: str, sha: Optional[str]) -> None:
     """Print the pinned action"""
     if sha:
-        owner, repo, ref = _parse_action(action)
+        # Keep the path of actions living in a subdirectory of the repository
+        action_base = action.rsplit("@", 1)[0]
         print(ORIGINAL_ACTION_FORMAT.format(action))
-        print(PINNED_ACTION_FORMAT.format(f"{owner}/{repo}", sha))
+        print(PINNED_ACTION_FORMAT.format(action_base, sha))
     else:
         print(UNABLE_TO_PIN_ACTION.format(action))
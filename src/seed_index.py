@@ -0,0 +1,255 @@
+"""
+Seed index of pre-resolved actions, for runners starting with an empty cache.
+
+The index maps action references (owner/repo@ref) to the commit SHA they
+resolved to and when. It is a sorted binary file, memory-mapped and
+binary-searched in place, so that opening it costs nothing however many
+actions it holds:
+
+    header   magic (8 bytes), format version (uint16), padding (uint16),
+             number of records (uint32)
+    offsets  offset of each record from the start of the file (uint32),
+             in the order of their keys
+    records  commit SHA (20 bytes), resolved at (uint64, seconds since the
+             epoch), key length (uint16), UTF-8 key
+
+All integers are little-endian. Indexes are built from cache snapshots with
+`gha-pinner cache build-index`, and one can be bundled with the package as
+src/data/seed-index.bin (see scripts/popular-actions.txt).
+"""
+
+import mmap
+import os
+import pkgutil
+import re
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src import metrics
+from src.common.constants import (
+    DEFAULT_CACHE_TTL,
+    INVALID_SEED_INDEX_ERROR,
+    SEED_INDEX_DISABLED,
+    SEED_INDEX_FILE,
+    SEED_INDEX_FORMAT_VERSION,
+    SEED_INDEX_MAGIC,
+    SHA_REGEX_PATTERN,
+    VERSION_TAG_PATTERN,
+)
+
+_HEADER = struct.Struct("<8sHHI")
+_OFFSET = struct.Struct("<I")
+_RECORD = struct.Struct("<20sQH")
+
+
+class SeedIndex:
+    """A seed index, read from a memory-mapped file or an in-memory buffer
+
+    Usage:
+        index = SeedIndex.open(path)
+        sha, resolved_at = index.lookup("actions/checkout@v4")
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], name: str = "<memory>") -> None:
+        """
+        Raises:
+            ValueError: If the data is not a seed index of a supported version
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError(INVALID_SEED_INDEX_ERROR.format(name, "truncated header"))
+        magic, version, _, count = _HEADER.unpack_from(data)
+        if magic != SEED_INDEX_MAGIC or version != SEED_INDEX_FORMAT_VERSION:
+            raise ValueError(
+                INVALID_SEED_INDEX_ERROR.format(name, "unsupported format")
+            )
+        if len(data) < _HEADER.size + count * _OFFSET.size:
+            raise ValueError(INVALID_SEED_INDEX_ERROR.format(name, "truncated offsets"))
+        self._data = data
+        self._count = count
+
+    @classmethod
+    def open(cls, path: str) -> "SeedIndex":
+        """Memory-map the index file at `path`
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not a seed index of a supported version
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"", path)
+            # The mapping stays valid once the file is closed
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data, path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, position: int) -> Tuple[bytes, bytes, int]:
+        """The key, binary SHA and resolution time of the record at a position"""
+        (offset,) = _OFFSET.unpack_from(self._data, _HEADER.size + position * 4)
+        sha, resolved_at, length = _RECORD.unpack_from(self._data, offset)
+        start = offset + _RECORD.size
+        return self._data[start : start + length], sha, resolved_at
+
+    def lookup(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return the SHA and resolution time of an action reference, if indexed"""
+        wanted = key.encode()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            found, sha, resolved_at = self._record(middle)
+            if found == wanted:
+                return sha.hex(), float(resolved_at)
+            if found < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+def _is_seedable(key: str, entry: Dict[str, Any]) -> bool:
+    """Only successful resolutions of github.com actions are indexed, keys of
+    other hosts being prefixed with the host name (host/owner/repo@ref)"""
+    owner_repo, _, ref = key.partition("@")
+    return (
+        bool(ref)
+        and owner_repo.count("/") == 1
+        and ":" not in owner_repo
+        and "error" not in entry
+        and isinstance(entry.get("sha"), str)
+        and re.match(SHA_REGEX_PATTERN, entry["sha"]) is not None
+    )
+
+
+def build(entries: Dict[str, Dict[str, Any]]) -> bytes:
+    """Build a seed index of the resolved actions among cache entries"""
+    records = sorted(
+        (key.encode(), bytes.fromhex(entry["sha"]), int(entry.get("resolved_at", 0)))
+        for key, entry in entries.items()
+        if _is_seedable(key, entry)
+    )
+    offsets: List[bytes] = []
+    body: List[bytes] = []
+    offset = _HEADER.size + len(records) * _OFFSET.size
+    for key, sha, resolved_at in records:
+        offsets.append(_OFFSET.pack(offset))
+        body.append(_RECORD.pack(sha, resolved_at, len(key)) + key)
+        offset += _RECORD.size + len(key)
+
+    header = _HEADER.pack(SEED_INDEX_MAGIC, SEED_INDEX_FORMAT_VERSION, 0, len(records))
+    return b"".join([header, *offsets, *body])
+
+
+def write(path: str, entries: Dict[str, Dict[str, Any]]) -> int:
+    """Write the seed index of cache entries to `path`
+
+    Returns:
+        The number of indexed actions
+    """
+    data = build(entries)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return _HEADER.unpack_from(data)[3]
+
+
+def is_fresh(ref: str, resolved_at: float, now: float) -> bool:
+    """Tell whether a seeded SHA can still be trusted
+
+    Commit SHAs and full version tags (e.g. v4.2.2) are not expected to move.
+    Other refs (e.g. v4 or main) move with new releases and commits, so their
+    seeded SHAs are trusted no longer than cached resolutions.
+    """
+    if re.match(SHA_REGEX_PATTERN, ref):
+        return True
+    version = re.match(VERSION_TAG_PATTERN, ref)
+    if version and version.group(3) is not None:
+        return True
+    return now - resolved_at <= DEFAULT_CACHE_TTL
+
+
+_index: Optional[SeedIndex] = None
+# Whether the index to use was chosen, the bundled one being opened lazily
+_chosen = False
+# The path given to use(), SEED_INDEX_DISABLED if it was None
+_source: Optional[str] = None
+_lock = threading.Lock()
+
+
+def _open_bundled() -> Optional[SeedIndex]:
+    """Open the index bundled with the package, if there is one
+
+    Installed packages have it on disk, where it is memory-mapped. Zipapps have
+    it in the archive, from which it is read into memory.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SEED_INDEX_FILE)
+    try:
+        if os.path.isfile(path):
+            return SeedIndex.open(path)
+        data = pkgutil.get_data(__package__ or "src", SEED_INDEX_FILE)
+        return SeedIndex(data, SEED_INDEX_FILE) if data else None
+    except (OSError, ValueError):
+        return None
+
+
+def use(path: Optional[str]) -> None:
+    """Use the seed index at `path` rather than the bundled one, or none at all
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a seed index of a supported version
+    """
+    global _index, _chosen, _source
+    index = SeedIndex.open(path) if path else None
+    with _lock:
+        _index, _chosen, _source = index, True, path or SEED_INDEX_DISABLED
+
+
+def reset() -> None:
+    """Go back to using the bundled index"""
+    global _index, _chosen, _source
+    with _lock:
+        _index, _chosen, _source = None, False, None
+
+
+def get_source() -> Optional[str]:
+    """Return the path given to `use()`, SEED_INDEX_DISABLED if no index is used,
+    or None if the bundled index is"""
+    return _source
+
+
+def _get_index() -> Optional[SeedIndex]:
+    global _index, _chosen
+    with _lock:
+        if not _chosen:
+            _index, _chosen = _open_bundled(), True
+        return _index
+
+
+def lookup(key: str) -> Optional[str]:
+    """Return the seeded SHA of an action reference (owner/repo@ref), if it is
+    indexed and still fresh"""
+    index = _get_index()
+    if index is None:
+        return None
+
+    seeded = index.lookup(key)
+    if seeded is None:
+        result = "miss"
+    elif is_fresh(key.rpartition("@")[2], seeded[1], time.time()):
+        result = "hit"
+    else:
+        result = "stale"
+    metrics.inc("gha_pinner_seed_index_lookups_total", {"result": result})
+    return seeded[0] if result == "hit" else None
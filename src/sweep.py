@@ -0,0 +1,169 @@
+"""
+Processing of the workflows of many repositories in a single run.
+
+Repositories are scanned by a pool of worker processes that share one
+resolution cache, so an action used across the whole fleet is only looked up
+once.
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple
+
+from src import cache, hedging, hosts, metrics, seed_index
+from src.common.constants import (
+    ERROR_PROCESSING_REPO,
+    FILE_NOT_FOUND_ERROR,
+    REPO_WORKFLOWS_DIR,
+    SEED_INDEX_DISABLED,
+)
+from src.editor import pin_actions_in_dir
+from src.tracing import disable_tracing, enable_tracing, is_tracing_enabled
+
+
+def read_list(path: str) -> List[str]:
+    """Read entries (e.g. repository roots), one per line, skipping blanks and #
+    comments
+
+    Args:
+        path: File listing the entries, or '-' to read from stdin
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r") as f:
+            lines = f.read().splitlines()
+
+    stripped = (line.strip() for line in lines)
+    return [line for line in stripped if line and not line.startswith("#")]
+
+
+def _scan_repo(
+    root: str, validate_only: bool, pin_images: bool = False
+) -> List[Dict[str, Any]]:
+    """Process the workflows directory of a single repository"""
+    if not os.path.isdir(root):
+        print(FILE_NOT_FOUND_ERROR.format(root))
+        return []
+
+    workflows_dir = os.path.join(root, REPO_WORKFLOWS_DIR)
+    if not os.path.isdir(workflows_dir):
+        return []
+
+    return pin_actions_in_dir(workflows_dir, validate_only, pin_images=pin_images)
+
+
+@dataclass(frozen=True)
+class _WorkerConfig:
+    """The configuration of the parent process, applied to each worker
+
+    It is sent rather than inherited, since workers are spawned rather than
+    forked on some platforms (e.g. macOS and Windows).
+    """
+
+    store: MutableMapping[str, Dict[str, Any]]
+    # The remote backends only, the parent persisting the cache file
+    backends: List[cache.CacheBackend]
+    hosts: Tuple[Dict[str, hosts.Host], Dict[str, str], str]
+    seed_index: Optional[str]
+    hedge: bool
+    trace: bool
+
+
+def _worker_config(store: MutableMapping[str, Dict[str, Any]]) -> _WorkerConfig:
+    return _WorkerConfig(
+        store=store,
+        backends=[
+            backend
+            for backend in cache.get_backends()
+            if not isinstance(backend, cache.FileBackend)
+        ],
+        hosts=hosts.get_config(),
+        seed_index=seed_index.get_source(),
+        hedge=hedging.is_enabled(),
+        trace=is_tracing_enabled(),
+    )
+
+
+def _init_worker(config: _WorkerConfig) -> None:
+    cache.reset()
+    cache.use_store(config.store)
+    for backend in config.backends:
+        cache.use_backend(backend)
+
+    hosts.configure(*config.hosts)
+    if config.seed_index is None:
+        seed_index.reset()
+    else:
+        seed_index.use(
+            None if config.seed_index == SEED_INDEX_DISABLED else config.seed_index
+        )
+    hedging.enable(config.hedge)
+    if config.trace:
+        enable_tracing()
+    else:
+        disable_tracing()
+    # Metrics need no setup, each repository shipping its own back to the parent
+
+
+def _scan_repo_in_worker(
+    root: str, validate_only: bool, pin_images: bool
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict]]:
+    # Only ship back the metrics of this repository, the parent sums them up
+    metrics.reset()
+    actions = _scan_repo(root, validate_only, pin_images)
+    # Complete the writes to the remote cache, if any, before reporting back
+    cache.flush()
+    return actions, metrics.snapshot()
+
+
+def sweep_repos(
+    roots: List[str],
+    validate_only: bool = False,
+    workers: Optional[int] = None,
+    pin_images: bool = False,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Pin or validate the actions of many repositories in parallel
+
+    Args:
+        roots: Repository root directories
+        validate_only: If True, only validate actions without modifying files
+        workers: Number of worker processes (defaults to the number of CPUs)
+        pin_images: If True, also pin container images to their digest
+
+    Returns:
+        Actions found with their details, keyed by repository root
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(roots) <= 1:
+        return {root: _scan_repo(root, validate_only, pin_images) for root in roots}
+
+    results = {}
+    with multiprocessing.Manager() as manager:
+        shared_store = manager.dict(cache.get_store())
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(roots)),
+            initializer=_init_worker,
+            initargs=(_worker_config(shared_store),),
+        ) as pool:
+            futures = {
+                root: pool.submit(_scan_repo_in_worker, root, validate_only, pin_images)
+                for root in roots
+            }
+            for root, future in futures.items():
+                try:
+                    actions, worker_metrics = future.result()
+                except Exception as e:
+                    print(ERROR_PROCESSING_REPO.format(root, e))
+                    actions = []
+                else:
+                    metrics.merge(worker_metrics)
+                results[root] = actions
+
+        # Bring back what the workers resolved, so it can be persisted
+        cache.get_store().update(shared_store.copy())
+
+    return results
@@ -0,0 +1,19 @@
+import pytest
+
+from src import cache, hedging, hosts, seed_index
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    """Keep resolutions cached by one test from leaking into the next"""
+    cache.reset()
+    # Independent of any seed index bundled with the working tree
+    seed_index.use(None)
+    monkeypatch.setattr("src.retriever._failures", {})
+    monkeypatch.setattr("src.retriever._sessions", {})
+    monkeypatch.setattr("src.retriever._rate_limit_resets", {})
+    yield
+    cache.reset()
+    hosts.reset()
+    seed_index.reset()
+    hedging.reset()
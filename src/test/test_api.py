@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.api import resolve, resolve_many, scan_file, scan_tree
+from src.common.action_status import ActionStatus
+from src.common.exceptions import (
+    InvalidActionError,
+    InvalidConcurrencyError,
+    NotWorkflowFileError,
+    ResolutionError,
+    WorkflowPathError,
+)
+from src.common.failure_reason import FailureReason
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def mock_resolve_action_sha(action: str) -> str:
+    if action.startswith("octo-org/"):
+        raise ResolutionError(action, FailureReason.NOT_FOUND, "not found")
+    return SHA
+
+
+def test_resolve() -> None:
+    with patch("src.api.resolve_action_sha", side_effect=mock_resolve_action_sha):
+        assert asyncio.run(resolve("actions/checkout@v4")) == SHA
+        with pytest.raises(ResolutionError) as error:
+            asyncio.run(resolve("octo-org/private@v1"))
+
+    assert error.value.reason == FailureReason.NOT_FOUND
+
+
+def test_resolve_many_keeps_order_and_reasons(capsys) -> None:
+    with patch(
+        "src.api.resolve_action_sha", side_effect=mock_resolve_action_sha
+    ) as mock_resolve:
+        resolutions = asyncio.run(
+            resolve_many(
+                ["actions/checkout@v4", "octo-org/private@v1", "actions/checkout@v4"]
+            )
+        )
+
+    assert [resolution.action for resolution in resolutions] == [
+        "actions/checkout@v4",
+        "octo-org/private@v1",
+        "actions/checkout@v4",
+    ]
+    assert [resolution.ok for resolution in resolutions] == [True, False, True]
+    assert resolutions[1].reason == FailureReason.NOT_FOUND
+    assert mock_resolve.call_count == 2
+    assert capsys.readouterr().out == ""
+
+
+def test_resolve_many_rejects_invalid_actions_upfront() -> None:
+    with patch("src.api.resolve_action_sha") as mock_resolve:
+        with pytest.raises(InvalidActionError):
+            asyncio.run(resolve_many(["actions/checkout@v4", "not-an-action"]))
+
+    mock_resolve.assert_not_called()
+
+
+def test_resolve_many_limits_concurrency() -> None:
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow_resolve(action: str) -> str:
+        with lock:
+            in_flight.append(action)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(action)
+        return SHA
+
+    actions = [f"actions/action-{i}@v1" for i in range(8)]
+    with patch("src.api.resolve_action_sha", side_effect=slow_resolve):
+        asyncio.run(resolve_many(actions, concurrency=2))
+
+    assert max(peak) <= 2
+
+
+def test_scan_tree(tmp_path, capsys) -> None:
+    workflows = tmp_path / "workflows"
+    (workflows / "nested").mkdir(parents=True)
+    (workflows / "ci.yml").write_text(
+        "    steps:\n      - uses: actions/checkout@v4\n      - uses: ./local\n"
+    )
+    (workflows / "nested" / "release.yaml").write_text(
+        "    steps:\n      - uses: octo-org/private@v1\n"
+    )
+
+    with patch("src.api.resolve_action_sha", side_effect=mock_resolve_action_sha):
+        results = asyncio.run(scan_tree(str(workflows)))
+
+    by_path = {result.path: result for result in results}
+    ci = by_path[str(workflows / "ci.yml")]
+    assert [action.status for action in ci.actions] == [
+        ActionStatus.NEEDS_PINNING,
+        ActionStatus.SKIPPED,
+    ]
+    assert ci.needs_pinning[0].sha == SHA
+    release = by_path[str(workflows / "nested" / "release.yaml")]
+    assert release.actions[0].status == ActionStatus.ERROR
+    assert release.actions[0].reason == FailureReason.NOT_FOUND
+    # Validating only, nothing is written nor printed
+    assert "@v4" in (workflows / "ci.yml").read_text()
+    assert capsys.readouterr().out == ""
+
+
+def test_scan_file_pins_actions(tmp_path) -> None:
+    workflow = tmp_path / "ci.yml"
+    workflow.write_text("    steps:\n      - uses: actions/checkout@v4\n")
+
+    with patch("src.api.resolve_action_sha", side_effect=mock_resolve_action_sha):
+        result = asyncio.run(scan_file(str(workflow), validate_only=False))
+
+    assert result.needs_pinning[0].original_ref == "v4"
+    assert f"actions/checkout@{SHA} # v4" in workflow.read_text()
+
+
+def test_scan_errors_are_typed(tmp_path) -> None:
+    not_workflow = tmp_path / "README.md"
+    not_workflow.write_text("")
+
+    with pytest.raises(WorkflowPathError):
+        asyncio.run(scan_tree(str(tmp_path / "missing")))
+    with pytest.raises(WorkflowPathError):
+        asyncio.run(scan_file(str(tmp_path / "missing.yml")))
+    with pytest.raises(NotWorkflowFileError):
+        asyncio.run(scan_file(str(not_workflow)))
+    with pytest.raises(InvalidConcurrencyError):
+        asyncio.run(scan_tree(str(tmp_path), concurrency=0))
@@ -0,0 +1,263 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+
+from src import cache, metrics
+from src.common.constants import (
+    CACHE_FILE_FORMAT_VERSION,
+    DEFAULT_CACHE_TTL,
+    NEGATIVE_CACHE_TTL,
+)
+
+
+@dataclass(frozen=True)
+class LookupParams:
+    entry: Optional[dict]
+    expected_result: Optional[dict]
+
+
+FRESH_ENTRY = LookupParams(
+    entry={"sha": "abc", "resolved_at": 1000.0},
+    expected_result={"sha": "abc", "resolved_at": 1000.0},
+)
+
+EXPIRED_ENTRY = LookupParams(
+    entry={"sha": "abc", "resolved_at": 1000.0 - DEFAULT_CACHE_TTL - 1},
+    expected_result=None,
+)
+
+MISSING_ENTRY = LookupParams(
+    entry=None,
+    expected_result=None,
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        FRESH_ENTRY,
+        EXPIRED_ENTRY,
+        MISSING_ENTRY,
+    ],
+)
+def test_lookup(test_params: LookupParams) -> None:
+    if test_params.entry:
+        cache.get_store()["actions/checkout@v4"] = test_params.entry
+
+    with patch("src.cache.time.time", return_value=1000.0):
+        result = cache.lookup("actions/checkout@v4")
+
+    assert result == test_params.expected_result
+
+
+def test_store_then_lookup() -> None:
+    cache.store("actions/checkout@v4", sha="abc")
+
+    entry = cache.lookup("actions/checkout@v4")
+
+    assert entry["sha"] == "abc"
+    assert entry["resolved_at"] <= time.time()
+
+
+def test_save_and_load(tmp_path) -> None:
+    path = str(tmp_path / "nested" / "cache.json")
+    cache.load(path)
+    cache.store("actions/checkout@v4", sha="abc")
+    cache.save()
+
+    cache.reset()
+    cache.load(path)
+
+    assert cache.lookup("actions/checkout@v4")["sha"] == "abc"
+
+
+def test_load_ignores_other_format_versions(tmp_path) -> None:
+    path = tmp_path / "cache.json"
+    path.write_text(
+        json.dumps(
+            {
+                "version": CACHE_FILE_FORMAT_VERSION + 1,
+                "entries": {"actions/checkout@v4": {"sha": "abc"}},
+            }
+        )
+    )
+
+    cache.load(str(path))
+
+    assert cache.get_store() == {}
+
+
+def test_load_unreadable_file(tmp_path) -> None:
+    path = tmp_path / "cache.json"
+    path.write_text("not json")
+
+    with patch("builtins.print") as mock_print:
+        cache.load(str(path))
+
+    mock_print.assert_called_once()
+    assert cache.get_store() == {}
+
+
+@pytest.mark.parametrize(
+    "age,expected_hit",
+    [
+        (NEGATIVE_CACHE_TTL - 1, True),
+        (NEGATIVE_CACHE_TTL + 1, False),
+    ],
+)
+def test_failures_expire_sooner(age: float, expected_hit: bool) -> None:
+    cache.get_store()["octo-org/private-action@v1"] = {
+        "error": "not_found",
+        "resolved_at": 1000.0 - age,
+    }
+
+    with patch("src.cache.time.time", return_value=1000.0):
+        result = cache.lookup("octo-org/private-action@v1")
+
+    assert (result is not None) == expected_hit
+
+
+def test_lookup_records_last_use() -> None:
+    cache.get_store()["actions/checkout@v4"] = {"sha": "abc", "resolved_at": 1000.0}
+
+    with patch("src.cache.time.time", return_value=1001.0):
+        cache.lookup("actions/checkout@v4")
+
+    assert cache.get_store()["actions/checkout@v4"]["last_used"] == 1001.0
+
+
+@pytest.mark.parametrize("name", ["snapshot.json", "snapshot.json.gz"])
+def test_export_then_import(tmp_path, name: str) -> None:
+    path = str(tmp_path / name)
+    cache.store("actions/checkout@v4", sha="abc")
+
+    assert cache.export_snapshot(path) == 1
+
+    cache.reset()
+    assert cache.import_snapshot(path) == 1
+    assert cache.lookup("actions/checkout@v4")["sha"] == "abc"
+
+
+def test_import_keeps_most_recent_resolution(tmp_path) -> None:
+    path = tmp_path / "snapshot.json"
+    path.write_text(
+        json.dumps(
+            {
+                "version": CACHE_FILE_FORMAT_VERSION,
+                "entries": {
+                    "actions/checkout@v4": {"sha": "old", "resolved_at": 1.0},
+                    "actions/setup-go@v5": {"sha": "new", "resolved_at": 3.0},
+                },
+            }
+        )
+    )
+    cache.get_store()["actions/checkout@v4"] = {"sha": "abc", "resolved_at": 2.0}
+    cache.get_store()["actions/setup-go@v5"] = {"sha": "def", "resolved_at": 2.0}
+
+    assert cache.import_snapshot(str(path)) == 1
+    assert cache.get_store()["actions/checkout@v4"]["sha"] == "abc"
+    assert cache.get_store()["actions/setup-go@v5"]["sha"] == "new"
+
+
+def test_import_rejects_other_format_versions(tmp_path) -> None:
+    path = tmp_path / "snapshot.json"
+    path.write_text(json.dumps({"version": CACHE_FILE_FORMAT_VERSION + 1}))
+
+    with pytest.raises(ValueError):
+        cache.import_snapshot(str(path))
+
+
+@dataclass(frozen=True)
+class PruneParams:
+    max_age: Optional[float]
+    max_entries: Optional[int]
+    expected_keys: set
+
+
+PRUNE_EXPIRED_ONLY = PruneParams(
+    max_age=None,
+    max_entries=None,
+    expected_keys={"fresh@v1", "old@v1", "used@v1"},
+)
+
+PRUNE_BY_AGE = PruneParams(
+    max_age=100,
+    max_entries=None,
+    expected_keys={"fresh@v1", "used@v1"},
+)
+
+PRUNE_BY_SIZE = PruneParams(
+    max_age=None,
+    max_entries=2,
+    expected_keys={"fresh@v1", "used@v1"},
+)
+
+PRUNE_LEAST_RECENTLY_USED = PruneParams(
+    max_age=None,
+    max_entries=1,
+    expected_keys={"used@v1"},
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        PRUNE_EXPIRED_ONLY,
+        PRUNE_BY_AGE,
+        PRUNE_BY_SIZE,
+        PRUNE_LEAST_RECENTLY_USED,
+    ],
+)
+def test_prune(test_params: PruneParams) -> None:
+    now = 100000.0
+    cache.get_store().update(
+        {
+            "expired@v1": {"sha": "a", "resolved_at": now - DEFAULT_CACHE_TTL - 1},
+            "old@v1": {"sha": "b", "resolved_at": now - 200},
+            "fresh@v1": {"sha": "c", "resolved_at": now - 50},
+            "used@v1": {"sha": "d", "resolved_at": now - 60, "last_used": now - 1},
+        }
+    )
+
+    with patch("src.cache.time.time", return_value=now):
+        evicted = cache.prune(test_params.max_age, test_params.max_entries)
+
+    assert set(cache.get_store()) == test_params.expected_keys
+    assert evicted == 4 - len(test_params.expected_keys)
+
+
+def test_stats(tmp_path) -> None:
+    metrics.reset()
+    path = tmp_path / "cache.json"
+    path.write_text(
+        json.dumps(
+            {
+                "version": CACHE_FILE_FORMAT_VERSION,
+                "entries": {
+                    "actions/checkout@v4": {"sha": "abc", "resolved_at": 100000.0},
+                    "octo-org/private@v1": {"error": "not_found", "resolved_at": 0},
+                },
+                "stats": {"hits": 3, "misses": 1},
+            }
+        )
+    )
+    cache.load(str(path))
+
+    with patch("src.cache.time.time", return_value=100000.0):
+        cache.lookup("actions/checkout@v4")
+        stats = cache.stats()
+
+    assert stats == {
+        "entries": 2,
+        "resolved": 1,
+        "failed": 1,
+        "expired": 1,
+        "failures": {"not_found": 1},
+        "hits": 4,
+        "misses": 1,
+    }
+    metrics.reset()
@@ -0,0 +1,76 @@
+import io
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from src.changes import changed_files, is_within, read_path_list
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        ("a.yml\nb.yml\n", ["a.yml", "b.yml"]),
+        ("a.yml\0b.yml\0", ["a.yml", "b.yml"]),
+        ("\n  a.yml  \n\n", ["a.yml"]),
+        ("", []),
+    ],
+)
+def test_read_path_list(content: str, expected: list) -> None:
+    with patch("sys.stdin", io.StringIO(content)):
+        assert read_path_list("-") == expected
+
+
+@pytest.mark.parametrize(
+    "file,dir,expected",
+    [
+        ("/repo/.github/workflows/ci.yml", "/repo/.github/workflows", True),
+        ("/repo/.github/workflows/sub/ci.yml", "/repo/.github", True),
+        ("/repo/other/ci.yml", "/repo/.github/workflows", False),
+        ("/repo/.github/workflows-old/ci.yml", "/repo/.github/workflows", False),
+    ],
+)
+def test_is_within(file: str, dir: str, expected: bool) -> None:
+    assert is_within(file, dir) == expected
+
+
+def _git(repo, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    _git(tmp_path, "config", "user.email", "test@example.com")
+    _git(tmp_path, "config", "user.name", "test")
+    workflows = tmp_path / ".github" / "workflows"
+    workflows.mkdir(parents=True)
+    for name in ("unchanged.yml", "modified.yml", "deleted.yml"):
+        (workflows / name).write_text("on: push\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+    _git(tmp_path, "checkout", "-q", "-b", "feature")
+    return tmp_path
+
+
+def test_changed_files(repo) -> None:
+    workflows = repo / ".github" / "workflows"
+    (workflows / "modified.yml").write_text("on: pull_request\n")
+    _git(repo, "commit", "-q", "-am", "modify")
+    (workflows / "deleted.yml").unlink()
+    (workflows / "untracked.yml").write_text("on: push\n")
+
+    result = changed_files("main", str(workflows))
+
+    assert sorted(os.path.basename(file) for file in result) == [
+        "modified.yml",
+        "untracked.yml",
+    ]
+    assert all(os.path.isabs(file) for file in result)
+
+
+def test_changed_files_unknown_ref(repo) -> None:
+    with patch("builtins.print") as mock_print:
+        assert changed_files("does-not-exist", str(repo)) is None
+    mock_print.assert_called_once()
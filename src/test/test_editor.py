@@ -5,10 +5,13 @@ import pytest
 
 from src.common.action_status import ActionStatus
 from src.common.constants import ERROR_PROCESSING_FILE, FILE_NOT_FOUND_ERROR
+from src.common.failure_reason import FailureReason
 from src.editor import (
     _is_github_workflow_file,
+    _is_in_shard,
     _is_sha_reference,
     _process_actions_in_workflow_content,
+    iter_actions_in_dir,
     pin_action_in_file,
     pin_actions_in_dir,
 )
@@ -248,6 +251,39 @@ jobs:
         assert result == mock_actions_found
 
 
+@pytest.mark.parametrize("pin_images", [False, True])
+def test_pin_action_in_file_pins_images_on_request(tmp_path, pin_images) -> None:
+    workflow = tmp_path / "workflow.yml"
+    workflow.write_text("jobs:\n  test:\n    container: node:18\n")
+    digest = "sha256:" + "a" * 64
+
+    with (
+        patch("src.editor.get_image_digest", return_value=(digest, None)) as mock_get,
+        patch("builtins.print"),
+    ):
+        pin_action_in_file(str(workflow), pin_images=pin_images)
+
+    assert mock_get.called == pin_images
+    pinned = f"node:18@{digest}" if pin_images else "node:18"
+    assert workflow.read_text() == f"jobs:\n  test:\n    container: {pinned}\n"
+
+
+def test_pin_action_in_file_keeps_crlf_line_endings(tmp_path) -> None:
+    workflow = tmp_path / "workflow.yml"
+    workflow.write_bytes(b"steps:\r\n  - uses: actions/checkout@v4\r\n")
+    sha = "0123456789abcdef0123456789abcdef01234567"
+
+    with (
+        patch("src.editor.get_action_sha", return_value=sha),
+        patch("builtins.print"),
+    ):
+        pin_action_in_file(str(workflow))
+
+    assert workflow.read_bytes() == (
+        f"steps:\r\n  - uses: actions/checkout@{sha} # v4\r\n".encode()
+    )
+
+
 def test_pin_action_in_file_not_exists() -> None:
     with (
         patch("os.path.exists", return_value=False),
@@ -394,7 +430,122 @@ def test_pin_actions_in_dir(test_params: PinActionsInDirParams) -> None:
 
         assert mock_pin_action.call_count == len(test_params.expected_calls)
         for call in test_params.expected_calls:
-            mock_pin_action.assert_any_call(call, False)
+            mock_pin_action.assert_any_call(call, False, None, False)
 
         # Check that the result contains the expected number of actions
         assert len(result) == len(test_params.expected_calls) * len(mock_actions)
+
+
+def test_is_in_shard_partitions_files() -> None:
+    """Test that every file lands in exactly one shard."""
+    files = [f"workflows/workflow_{i}.yml" for i in range(50)]
+
+    for count in (1, 2, 3, 7):
+        assignments = [
+            [index for index in range(1, count + 1) if _is_in_shard(f, (index, count))]
+            for f in files
+        ]
+        assert all(len(shards) == 1 for shards in assignments)
+
+
+def test_iter_actions_in_dir_with_shard() -> None:
+    """Test that only the files of the requested shard are processed."""
+    files = [f"/test_dir/workflow_{i}.yml" for i in range(10)]
+    mock_actions = [{"action": "test-action", "status": ActionStatus.NEEDS_PINNING}]
+
+    processed = set()
+    for index in (1, 2, 3):
+        with (
+            patch("os.path.exists", return_value=True),
+            patch("src.editor.iter_workflow_files", return_value=iter(files)),
+            patch("src.editor.pin_action_in_file", return_value=mock_actions),
+        ):
+            result = dict(iter_actions_in_dir("/test_dir", True, (index, 3)))
+        assert processed.isdisjoint(result)
+        processed.update(result)
+
+    assert processed == set(files)
+
+
+def test_iter_actions_in_dir_with_files(tmp_path) -> None:
+    """Test that only the given workflow files inside the directory are processed."""
+    workflows = tmp_path / "workflows"
+    workflows.mkdir()
+    for name in ("ci.yml", "release.yml", "notes.txt"):
+        (workflows / name).write_text("on: push\n")
+    outside = tmp_path / "outside.yml"
+    outside.write_text("on: push\n")
+    files = [
+        str(workflows / "ci.yml"),
+        str(workflows / "notes.txt"),
+        str(workflows / "missing.yml"),
+        str(outside),
+    ]
+
+    with patch("src.editor.pin_action_in_file", return_value=[]) as mock_pin:
+        result = dict(iter_actions_in_dir(str(workflows), True, None, files))
+
+    assert list(result) == [str(workflows / "ci.yml")]
+    mock_pin.assert_called_once_with(str(workflows / "ci.yml"), True, None, False)
+
+
+def test_process_subpath_action_with_latest() -> None:
+    """Test that the latest release is looked up on the repository of a subpath action."""
+    content = "    steps:\n      - uses: github/codeql-action/init@latest\n"
+
+    with (
+        patch("src.editor.get_action_sha", return_value="abc") as mock_get_sha,
+        patch(
+            "src.editor.get_latest_release_tag", return_value="v3"
+        ) as mock_get_latest,
+    ):
+        result, _ = _process_actions_in_workflow_content(content)
+
+    mock_get_latest.assert_called_once_with("github", "codeql-action")
+    mock_get_sha.assert_called_once_with("github/codeql-action/init@latest")
+    assert "uses: github/codeql-action/init@abc # latest (v3)" in result
+
+
+def test_process_failed_action_carries_reason() -> None:
+    """Test that errors record why the action could not be resolved."""
+    content = "    steps:\n      - uses: octo-org/private-action@v1\n"
+
+    with (
+        patch("src.editor.get_action_sha", return_value=None),
+        patch("src.editor.get_failure_reason", return_value=FailureReason.NOT_FOUND),
+        patch("builtins.print"),
+    ):
+        _, actions_found = _process_actions_in_workflow_content(content)
+
+    assert actions_found == [
+        {
+            "action": "octo-org/private-action@v1",
+            "status": ActionStatus.ERROR,
+            "message": "Unable to retrieve SHA",
+            "reason": "not_found",
+            "line": 2,
+        }
+    ]
+
+
+def test_iter_actions_in_dir_yields_each_file_once_processed(tmp_path) -> None:
+    """Test that results are yielded file by file, before the next file is processed."""
+    for name in ("a.yml", "b.yml"):
+        (tmp_path / name).write_text("on: push\n")
+    processed = []
+
+    def mock_pin_action_in_file(file, validate_only, diff_writer, pin_images):
+        processed.append(file)
+        return [{"action": file, "status": ActionStatus.ALREADY_PINNED}]
+
+    with patch("src.editor.pin_action_in_file", side_effect=mock_pin_action_in_file):
+        results = iter_actions_in_dir(str(tmp_path), True)
+        first_file, first_actions = next(results)
+        assert processed == [first_file]
+        assert first_actions[0]["action"] == first_file
+        remaining = list(results)
+
+    assert len(remaining) == 1
+    assert sorted(processed) == sorted(
+        str(tmp_path / name) for name in ("a.yml", "b.yml")
+    )
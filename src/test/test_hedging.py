@@ -0,0 +1,210 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from src import cache, hedging, metrics
+from src.retriever import get_action_sha, parse_advertised_refs
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+TAG_SHA = "89abcdef0123456789abcdef0123456789abcdef"
+COMMIT_SHA = "fedcba9876543210fedcba9876543210fedcba98"
+
+
+def _pkt(line: str) -> bytes:
+    data = line.encode()
+    return f"{len(data) + 4:04x}".encode() + data
+
+
+ADVERTISEMENT = b"".join(
+    [
+        _pkt("# service=git-upload-pack\n"),
+        b"0000",
+        _pkt(
+            f"{SHA} HEAD\0multi_ack thin-pack side-band symref=HEAD:refs/heads/main\n"
+        ),
+        _pkt(f"{SHA} refs/heads/main\n"),
+        _pkt(f"{TAG_SHA} refs/tags/v4\n"),
+        _pkt(f"{COMMIT_SHA} refs/tags/v4^{{}}\n"),
+        b"0000",
+    ]
+)
+
+
+def test_parse_advertised_refs() -> None:
+    assert parse_advertised_refs(ADVERTISEMENT) == {
+        "HEAD": SHA,
+        "refs/heads/main": SHA,
+        "refs/tags/v4": TAG_SHA,
+        "refs/tags/v4^{}": COMMIT_SHA,
+    }
+
+
+def test_delay_follows_the_observed_percentile() -> None:
+    assert hedging.delay("github.com") == 1.0
+
+    for duration in range(1, 101):
+        hedging.record("github.com", duration / 100)
+
+    assert hedging.delay("github.com") == 0.95
+    assert hedging.delay("github.example.com") == 1.0
+
+
+@pytest.fixture
+def released():
+    """Released at the end of the test, so that no slow lookup outlives it"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _lookup(event: Optional[threading.Event], result: str) -> Callable[[], str]:
+    """A lookup answering once the event is set, or at once without one"""
+
+    def lookup() -> str:
+        if event:
+            event.wait(5)
+        return result
+
+    return lookup
+
+
+def _failing() -> str:
+    raise ValueError("failed")
+
+
+@dataclass(frozen=True)
+class RunParams:
+    slow_primary: bool
+    hedge_fails: bool
+    expected: str
+    expected_outcome: str
+
+
+NOT_HEDGED = RunParams(False, False, "primary", "not_hedged")
+HEDGE_WON = RunParams(True, False, "hedge", "hedge_won")
+PRIMARY_WON = RunParams(True, True, "primary", "primary_won")
+
+
+@pytest.mark.parametrize("test_params", [NOT_HEDGED, HEDGE_WON, PRIMARY_WON])
+def test_run_takes_the_first_answer(
+    monkeypatch, released, test_params: RunParams
+) -> None:
+    # Fast lookups answer well within the delay, however loaded the machine
+    delay = 0.01 if test_params.slow_primary else 5.0
+    monkeypatch.setattr("src.hedging.HEDGE_INITIAL_DELAY", delay)
+    metrics.reset()
+    if test_params.slow_primary and test_params.hedge_fails:
+        # The primary answers once the hedge has failed
+        threading.Timer(0.1, released.set).start()
+    primary = _lookup(released if test_params.slow_primary else None, "primary")
+    hedge = _failing if test_params.hedge_fails else _lookup(None, "hedge")
+
+    result = hedging.run("github.com", primary, hedge)
+
+    assert result == test_params.expected
+    assert (
+        metrics.counter_value(
+            "gha_pinner_hedged_lookups_total", {"outcome": test_params.expected_outcome}
+        )
+        == 1
+    )
+    metrics.reset()
+
+
+def test_run_raises_the_primary_error_when_both_fail(monkeypatch) -> None:
+    monkeypatch.setattr("src.hedging.HEDGE_INITIAL_DELAY", 0.0)
+
+    def slow_failure() -> str:
+        threading.Event().wait(0.05)
+        raise KeyError("primary")
+
+    with pytest.raises(KeyError):
+        hedging.run("github.com", slow_failure, _failing)
+
+
+def test_run_does_not_count_the_time_queued_for_a_thread(monkeypatch, released) -> None:
+    monkeypatch.setattr("src.hedging.HEDGE_INITIAL_DELAY", 0.05)
+    metrics.reset()
+    # Every thread of the pool is busy for longer than the delay
+    hedging._get_executor()
+    monkeypatch.setattr("src.hedging._executor", ThreadPoolExecutor(max_workers=1))
+    hedging._executor.submit(threading.Event().wait, 0.2)
+
+    assert hedging.run("github.com", _lookup(None, "primary"), _failing) == "primary"
+
+    assert (
+        metrics.counter_value(
+            "gha_pinner_hedged_lookups_total", {"outcome": "not_hedged"}
+        )
+        == 1
+    )
+    hedging._executor.shutdown()
+    metrics.reset()
+
+
+def test_failure_of_a_losing_primary_is_not_cached(monkeypatch, released) -> None:
+    monkeypatch.setattr("src.hedging.HEDGE_INITIAL_DELAY", 0.01)
+    hedging.enable()
+
+    def get(url: str, **kwargs) -> Mock:
+        response = Mock()
+        response.headers = {}
+        if url.endswith("/info/refs?service=git-upload-pack"):
+            response.status_code = 200
+            response.content = ADVERTISEMENT
+        else:
+            # The API answers 404 once the hedge has won
+            released.wait(5)
+            response.status_code = 404
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+                response=response
+            )
+        return response
+
+    with patch("src.retriever.requests.Session.get", side_effect=get):
+        assert get_action_sha("actions/checkout@v4") == COMMIT_SHA
+        released.set()
+        # The duration of the primary is recorded once it has failed
+        deadline = time.monotonic() + 5
+        while not hedging._durations.get("github.com") and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    entry = cache.lookup("actions/checkout@v4")
+    assert entry["sha"] == COMMIT_SHA
+    assert "error" not in entry
+
+
+def test_slow_api_lookups_are_answered_by_the_ref_advertisement(
+    monkeypatch, released
+) -> None:
+    monkeypatch.setattr("src.hedging.HEDGE_INITIAL_DELAY", 0.01)
+    hedging.enable()
+    metrics.reset()
+
+    def get(url: str, **kwargs) -> Mock:
+        response = Mock()
+        response.status_code = 200
+        response.headers = {}
+        if url.endswith("/info/refs?service=git-upload-pack"):
+            response.content = ADVERTISEMENT
+        else:
+            released.wait(5)
+            response.json.return_value = {"sha": SHA}
+        return response
+
+    with patch("src.retriever.requests.Session.get", side_effect=get) as mock_get:
+        assert get_action_sha("actions/checkout@v4") == COMMIT_SHA
+
+    assert cache.lookup("actions/checkout@v4")["sha"] == COMMIT_SHA
+    assert (
+        "https://github.com/actions/checkout.git/info/refs"
+        in (mock_get.call_args_list[-1].args[0])
+    )
+    assert "gha_pinner_hedge_ratio 1" in metrics.render().splitlines()
+    metrics.reset()
@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src import cache, hosts, retriever
+from src.common.constants import HOST_TOKEN_MISSING_WARNING
+from src.common.exceptions import HostsConfigError
+from src.common.failure_reason import FailureReason
+from src.retriever import get_action_sha, get_action_shas, get_failure_reason
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+GHES = "github.example.com"
+CONFIG = {
+    "hosts": {
+        GHES: {"owners": ["Platform"], "token_env": "GHES_TOKEN"},
+        "ghes.internal": {
+            "owners": ["tools"],
+            "api_url": "https://api.ghes.internal/",
+        },
+    }
+}
+
+
+def _load(tmp_path, config: dict) -> List[str]:
+    path = tmp_path / "hosts.json"
+    path.write_text(json.dumps(config))
+    return hosts.load(str(path))
+
+
+def _response(sha: str = SHA, headers: dict = None) -> Mock:
+    response = Mock()
+    response.status_code = 200
+    response.headers = headers or {}
+    response.json.return_value = {"sha": sha}
+    return response
+
+
+def test_host_for_maps_owners_to_their_host(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("GHES_TOKEN", "secret")
+    _load(tmp_path, CONFIG)
+
+    ghes = hosts.host_for("platform")
+    assert (ghes.name, ghes.api_url, ghes.raw_url, ghes.token) == (
+        GHES,
+        f"https://{GHES}/api/v3",
+        f"https://{GHES}/raw",
+        "secret",
+    )
+    assert hosts.host_for("tools").api_url == "https://api.ghes.internal"
+    assert hosts.host_for("actions") == hosts.GITHUB
+
+
+def test_load_returns_warnings_without_printing(tmp_path, monkeypatch) -> None:
+    monkeypatch.delenv("GHES_TOKEN", raising=False)
+
+    with patch("builtins.print") as mock_print:
+        warnings = _load(tmp_path, CONFIG)
+
+    assert warnings == [HOST_TOKEN_MISSING_WARNING.format("GHES_TOKEN", GHES)]
+    mock_print.assert_not_called()
+
+
+@dataclass(frozen=True)
+class InvalidConfigParams:
+    content: str
+
+
+NOT_JSON = InvalidConfigParams("{")
+NOT_AN_OBJECT = InvalidConfigParams("[]")
+HOST_NOT_AN_OBJECT = InvalidConfigParams('{"hosts": {"ghes": "url"}}')
+OWNERS_NOT_A_LIST = InvalidConfigParams('{"hosts": {"ghes": {"owners": "octo"}}}')
+UNKNOWN_DEFAULT = InvalidConfigParams('{"default": "ghes", "hosts": {}}')
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [NOT_JSON, NOT_AN_OBJECT, HOST_NOT_AN_OBJECT, OWNERS_NOT_A_LIST, UNKNOWN_DEFAULT],
+)
+def test_load_rejects_invalid_configs(
+    tmp_path, test_params: InvalidConfigParams
+) -> None:
+    path = tmp_path / "hosts.json"
+    path.write_text(test_params.content)
+
+    with pytest.raises(HostsConfigError):
+        hosts.load(str(path))
+    assert hosts.host_for("ghes") == hosts.GITHUB
+
+
+def test_actions_resolve_against_their_host(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("GHES_TOKEN", "secret")
+    _load(tmp_path, CONFIG)
+
+    with patch(
+        "src.retriever.requests.Session.get", return_value=_response()
+    ) as mock_get:
+        assert get_action_sha("platform/deploy@v1") == SHA
+        assert get_action_sha("actions/checkout@v4") == SHA
+
+    assert [call.args[0] for call in mock_get.call_args_list] == [
+        f"https://{GHES}/api/v3/repos/platform/deploy/commits/v1",
+        "https://api.github.com/repos/actions/checkout/commits/v4",
+    ]
+    # Each host has its own session, carrying its own token
+    assert retriever._sessions[GHES].headers["Authorization"] == "Bearer secret"
+    assert "Authorization" not in retriever._sessions["github.com"].headers
+    # The entries of both hosts never collide
+    assert cache.lookup(f"{GHES}/platform/deploy@v1")["sha"] == SHA
+    assert cache.lookup("actions/checkout@v4")["sha"] == SHA
+
+
+def test_exhausted_rate_limit_only_stops_its_host(tmp_path) -> None:
+    _load(tmp_path, CONFIG)
+    exhausted = _response(
+        headers={
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + 600),
+        }
+    )
+
+    with (
+        patch(
+            "src.retriever.requests.Session.get",
+            side_effect=[exhausted, _response()],
+        ) as mock_get,
+        patch("builtins.print"),
+    ):
+        assert get_action_sha("platform/deploy@v1") == SHA
+        assert get_action_sha("platform/release@v1") is None
+        assert get_action_sha("actions/checkout@v4") == SHA
+
+    assert get_failure_reason("platform/release@v1") == FailureReason.RATE_LIMITED
+    assert mock_get.call_count == 2
+
+
+def test_get_action_shas_resolves_hosts_concurrently(tmp_path) -> None:
+    _load(tmp_path, CONFIG)
+    github_resolved = threading.Event()
+
+    def resolve(action: str) -> str:
+        if action.startswith("actions/"):
+            github_resolved.set()
+            return SHA
+        # Would time out if github.com actions waited for a thread of the pool
+        return SHA if github_resolved.wait(5) else None
+
+    with patch("src.retriever.get_action_sha", side_effect=resolve):
+        shas = get_action_shas(
+            ["platform/a@v1", "platform/b@v1", "platform/c@v1", "actions/checkout@v4"],
+            workers=2,
+        )
+
+    assert shas == {
+        "platform/a@v1": SHA,
+        "platform/b@v1": SHA,
+        "platform/c@v1": SHA,
+        "actions/checkout@v4": SHA,
+    }
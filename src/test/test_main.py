@@ -1,10 +1,13 @@
+import json
 from dataclasses import dataclass
 from typing import List, Optional
 
 import pytest
 from typer.testing import CliRunner
 
+from src.common.action_status import ActionStatus
 from src.main import app
+from src.report import build_report, write_report
 
 
 @dataclass(frozen=True)
@@ -44,6 +47,11 @@ NO_ACTION_SPECIFIED = CommandTestParams(
     expected_exit_code=2,  # Typer returns 2 for missing required arguments
     expected_output="Missing argument 'ACTION'",
 )
+NO_REPOS_SPECIFIED = CommandTestParams(
+    args=["repos"],
+    expected_exit_code=1,
+    expected_output="No repositories specified",
+)
 
 
 @pytest.mark.parametrize(
@@ -55,6 +63,7 @@ NO_ACTION_SPECIFIED = CommandTestParams(
         NO_ARGS,
         NO_FILE_SPECIFIED,
         NO_ACTION_SPECIFIED,
+        NO_REPOS_SPECIFIED,
     ],
 )
 def test_command_execution(test_params: CommandTestParams, monkeypatch) -> None:
@@ -81,3 +90,236 @@ def test_command_execution(test_params: CommandTestParams, monkeypatch) -> None:
     # Check output if expected
     if test_params.expected_output:
         assert test_params.expected_output in result.stdout
+
+
+def test_repos_command_validation_fails(monkeypatch, tmp_path) -> None:
+    """Test that the repos command aggregates results and fails validation."""
+    unpinned = {
+        "action": "actions/checkout@v4",
+        "status": ActionStatus.NEEDS_PINNING,
+        "original_ref": "v4",
+        "sha": "0123456789abcdef0123456789abcdef01234567",
+    }
+    monkeypatch.setattr(
+        "src.sweep.sweep_repos",
+        lambda roots, *_: {root: [unpinned] for root in roots},
+    )
+    report_path = tmp_path / "report.json"
+
+    result = runner.invoke(
+        app, ["repos", "repo-a", "repo-b", "--validate", "--report", str(report_path)]
+    )
+
+    assert result.exit_code == 1
+    assert "📦 repo-a: 1 need pinning" in result.stdout
+    assert "📊 Total (2 repositories): 2 need pinning" in result.stdout
+    assert json.loads(report_path.read_text())["summary"]["needs_pinning"] == 2
+
+
+def test_dir_command_writes_shard_report(monkeypatch, tmp_path) -> None:
+    """Test that a sharded dir run records its shard in the report."""
+    calls = []
+
+    def mock_iter_actions_in_dir(*args):
+        calls.append(args)
+        return iter([("ci.yml", [])])
+
+    monkeypatch.setattr("src.main.iter_actions_in_dir", mock_iter_actions_in_dir)
+    report_path = tmp_path / "report.json"
+
+    result = runner.invoke(
+        app, ["dir", "workflows", "--shard", "2/3", "--report", str(report_path)]
+    )
+
+    assert result.exit_code == 0
+    assert calls == [("workflows", False, (2, 3), None, None, False)]
+    assert json.loads(report_path.read_text())["shards"] == [[2, 3]]
+
+
+def test_dir_command_pins_images_on_request(monkeypatch) -> None:
+    """Test that container images are only pinned with --pin-images."""
+    calls = []
+
+    def mock_iter_actions_in_dir(*args):
+        calls.append(args)
+        return iter([])
+
+    monkeypatch.setattr("src.main.iter_actions_in_dir", mock_iter_actions_in_dir)
+
+    assert runner.invoke(app, ["dir", "workflows"]).exit_code == 0
+    assert runner.invoke(app, ["dir", "workflows", "--pin-images"]).exit_code == 0
+    assert [args[-1] for args in calls] == [False, True]
+
+
+@pytest.mark.parametrize("shard", ["0/3", "4/3", "2", "a/b"])
+def test_dir_command_rejects_invalid_shard(shard: str) -> None:
+    result = runner.invoke(app, ["dir", "workflows", "--shard", shard])
+    assert result.exit_code == 2
+
+
+def test_merge_reports_command(tmp_path) -> None:
+    """Test that merged shard reports fail on unpinned actions and missing shards."""
+    unpinned = {
+        "action": "actions/checkout@v4",
+        "status": ActionStatus.NEEDS_PINNING,
+        "original_ref": "v4",
+        "sha": "0123456789abcdef0123456789abcdef01234567",
+    }
+    paths = []
+    for index, actions in ((1, [unpinned]), (2, [])):
+        path = tmp_path / f"shard-{index}.json"
+        write_report(
+            build_report({f"{index}.yml": actions}, True, (index, 2)), str(path)
+        )
+        paths.append(str(path))
+
+    result = runner.invoke(app, ["merge-reports", *paths])
+    assert result.exit_code == 1
+    assert "❌ - actions/checkout@v4 should be pinned" in result.stdout
+
+    result = runner.invoke(app, ["merge-reports", paths[1]])
+    assert result.exit_code == 1
+    assert "Missing reports for shards: 1" in result.stdout
+
+    result = runner.invoke(app, ["merge-reports", paths[1], paths[1]])
+    assert result.exit_code == 1
+    assert "Several reports were produced for shards: 2/2" in result.stdout
+
+
+def test_file_command_processes_files_from_list(monkeypatch, tmp_path) -> None:
+    """Test that the file command processes every listed file in one run."""
+    processed = []
+    monkeypatch.setattr(
+        "src.main.pin_action_in_file",
+        lambda file, validate, diff_writer, pin_images: processed.append(file) or [],
+    )
+    file_list = tmp_path / "files.txt"
+    file_list.write_text("b.yml\nc.yml\n")
+
+    result = runner.invoke(app, ["file", "a.yml", "--files-from", str(file_list)])
+
+    assert result.exit_code == 0
+    assert processed == ["a.yml", "b.yml", "c.yml"]
+
+
+def test_dir_command_restricted_to_changed_files(monkeypatch) -> None:
+    """Test that --changed-since passes the changed files to the directory scan."""
+    calls = []
+
+    def mock_iter_actions_in_dir(*args):
+        calls.append(args)
+        return iter([])
+
+    monkeypatch.setattr("src.main.changed_files", lambda *_: ["/repo/ci.yml"])
+    monkeypatch.setattr("src.main.iter_actions_in_dir", mock_iter_actions_in_dir)
+
+    result = runner.invoke(app, ["dir", "/repo", "--changed-since", "origin/main"])
+
+    assert result.exit_code == 0
+    assert calls == [("/repo", False, None, ["/repo/ci.yml"], None, False)]
+    assert "No workflow files to process" in result.stdout
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["cache", "stats"],
+        ["cache", "prune"],
+        ["cache", "export", "snapshot.json"],
+    ],
+)
+def test_cache_commands_require_cache_file(args: List[str]) -> None:
+    result = runner.invoke(app, args)
+
+    assert result.exit_code == 1
+    assert "No cache file specified" in result.stdout
+
+
+def test_cache_warm_command_requires_a_cache() -> None:
+    result = runner.invoke(app, ["cache", "warm", "actions/checkout@v4"])
+
+    assert result.exit_code == 1
+    assert "No cache specified" in result.stdout
+
+
+def test_cache_warm_command(monkeypatch, tmp_path) -> None:
+    """Test that warmed actions are resolved together and persisted."""
+    calls = []
+
+    def mock_get_action_shas(actions, workers):
+        calls.append((actions, workers))
+        return {action: "a" * 40 for action in actions}
+
+    monkeypatch.setattr("src.main.get_action_shas", mock_get_action_shas)
+    action_list = tmp_path / "actions.txt"
+    action_list.write_text("# popular\nactions/setup-go@v5\n")
+    cache_file = tmp_path / "cache.json"
+
+    result = runner.invoke(
+        app,
+        [
+            "--cache-file",
+            str(cache_file),
+            "cache",
+            "warm",
+            "actions/checkout@v4",
+            "--from-file",
+            str(action_list),
+            "-j",
+            "4",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert calls == [(["actions/checkout@v4", "actions/setup-go@v5"], 4)]
+    assert "Resolved 2 of 2 actions" in result.stdout
+    assert cache_file.exists()
+
+
+def test_cache_stats_command(tmp_path) -> None:
+    cache_file = tmp_path / "cache.json"
+    cache_file.write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "entries": {
+                    "octo-org/private@v1": {"error": "not_found", "resolved_at": 0}
+                },
+                "stats": {"hits": 3, "misses": 1},
+            }
+        )
+    )
+
+    result = runner.invoke(app, ["--cache-file", str(cache_file), "cache", "stats"])
+
+    assert result.exit_code == 0
+    assert "Entries: 1 (0 resolved, 1 failed, 1 expired)" in result.stdout
+    assert "Failures: not_found 1" in result.stdout
+    assert "Hit ratio" in result.stdout
+
+
+def test_watch_command_requires_existing_directory(tmp_path) -> None:
+    result = runner.invoke(app, ["watch", str(tmp_path / "missing")])
+
+    assert result.exit_code == 1
+    assert "does not exist" in result.stdout
+
+
+def test_update_command_validation_fails_when_updates_available(
+    monkeypatch, tmp_path
+) -> None:
+    calls = []
+
+    def mock_update_paths(paths, policy, validate_only, workers):
+        calls.append((paths, policy, validate_only))
+        return 1, {("actions", "checkout"): []}, [{"action": "actions/checkout"}]
+
+    monkeypatch.setattr("src.main.update_paths", mock_update_paths)
+
+    result = runner.invoke(
+        app, ["update", str(tmp_path), "--policy", "patch", "--validate"]
+    )
+
+    assert result.exit_code == 1
+    assert calls[0][1].value == "patch"
+    assert "1 updates" in result.stdout
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+
+from src import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@dataclass(frozen=True)
+class RenderParams:
+    counters: List[tuple]
+    gauges: List[tuple]
+    expected_lines: List[str]
+
+
+COUNTERS_WITH_LABELS = RenderParams(
+    counters=[
+        ("gha_pinner_http_requests_total", {"endpoint": "commits", "status": "200"}),
+        ("gha_pinner_http_requests_total", {"endpoint": "commits", "status": "200"}),
+        ("gha_pinner_http_requests_total", {"endpoint": "commits", "status": "404"}),
+    ],
+    gauges=[],
+    expected_lines=[
+        "# TYPE gha_pinner_http_requests_total counter",
+        'gha_pinner_http_requests_total{endpoint="commits",status="200"} 2',
+        'gha_pinner_http_requests_total{endpoint="commits",status="404"} 1',
+    ],
+)
+
+GAUGE = RenderParams(
+    counters=[],
+    gauges=[("gha_pinner_rate_limit_remaining", 4999)],
+    expected_lines=[
+        "# TYPE gha_pinner_rate_limit_remaining gauge",
+        "gha_pinner_rate_limit_remaining 4999",
+    ],
+)
+
+NOTHING_RECORDED = RenderParams(
+    counters=[],
+    gauges=[],
+    expected_lines=[],
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        COUNTERS_WITH_LABELS,
+        GAUGE,
+        NOTHING_RECORDED,
+    ],
+)
+def test_render(test_params: RenderParams) -> None:
+    for name, labels in test_params.counters:
+        metrics.inc(name, labels)
+    for name, value in test_params.gauges:
+        metrics.set_gauge(name, value)
+
+    lines = metrics.render().splitlines()
+
+    for expected_line in test_params.expected_lines:
+        assert expected_line in lines
+    if not test_params.expected_lines:
+        assert lines == []
+
+
+def test_render_histogram() -> None:
+    metrics.observe("gha_pinner_resolution_duration_seconds", 0.02)
+    metrics.observe("gha_pinner_resolution_duration_seconds", 3)
+
+    lines = metrics.render().splitlines()
+
+    assert 'gha_pinner_resolution_duration_seconds_bucket{le="0.01"} 0' in lines
+    assert 'gha_pinner_resolution_duration_seconds_bucket{le="0.025"} 1' in lines
+    assert 'gha_pinner_resolution_duration_seconds_bucket{le="5.0"} 2' in lines
+    assert 'gha_pinner_resolution_duration_seconds_bucket{le="+Inf"} 2' in lines
+    assert "gha_pinner_resolution_duration_seconds_count 2" in lines
+    assert "gha_pinner_resolution_duration_seconds_sum 3.02" in lines
+
+
+def test_write(tmp_path) -> None:
+    metrics.inc("gha_pinner_files_processed_total")
+    path = tmp_path / "metrics.prom"
+
+    metrics.write(str(path))
+
+    assert "gha_pinner_files_processed_total 1" in path.read_text()
@@ -0,0 +1,125 @@
+import difflib
+import subprocess
+from dataclasses import dataclass
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from src.main import app
+from src.patch import unified_diff
+from src.workflow_index import Edit, apply_edits
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+CONTENT = "".join(f"line {number}\n" for number in range(1, 21))
+
+
+def _offset(line: int) -> int:
+    """The offset of the word 'line' on a 1-based line of CONTENT"""
+    return CONTENT.index(f"line {line}\n")
+
+
+@dataclass(frozen=True)
+class UnifiedDiffParams:
+    edits: List[Edit]
+
+
+SINGLE_EDIT = UnifiedDiffParams([(_offset(10), _offset(10) + 4, "LINE")])
+SHARED_CONTEXT = UnifiedDiffParams(
+    [(_offset(5), _offset(5) + 4, "one"), (_offset(9), _offset(9) + 4, "two")]
+)
+SEPARATE_HUNKS = UnifiedDiffParams(
+    [(_offset(2), _offset(2), "+"), (_offset(18), _offset(18) + 4, "")]
+)
+SAME_LINE = UnifiedDiffParams(
+    [(_offset(12), _offset(12) + 4, "a"), (_offset(12) + 5, _offset(12) + 7, "b")]
+)
+
+
+@pytest.mark.parametrize(
+    "test_params", [SINGLE_EDIT, SHARED_CONTEXT, SEPARATE_HUNKS, SAME_LINE]
+)
+def test_unified_diff_matches_difflib(test_params: UnifiedDiffParams) -> None:
+    updated = apply_edits(CONTENT, test_params.edits)
+    expected = difflib.unified_diff(
+        CONTENT.splitlines(keepends=True),
+        updated.splitlines(keepends=True),
+        "a/ci.yml",
+        "b/ci.yml",
+    )
+
+    assert unified_diff("ci.yml", CONTENT, test_params.edits) == "".join(expected)
+
+
+def test_unified_diff_marks_missing_final_newline() -> None:
+    content = "steps:\n  - uses: a/b@v1"
+
+    diff = unified_diff("ci.yml", content, [(len(content) - 2, len(content), "v2")])
+
+    assert diff.endswith(
+        "-  - uses: a/b@v1\n\\ No newline at end of file\n"
+        "+  - uses: a/b@v2\n\\ No newline at end of file\n"
+    )
+
+
+def test_unified_diff_ignores_edits_changing_nothing() -> None:
+    assert unified_diff("ci.yml", CONTENT, [(0, 4, "line")]) == ""
+
+
+WORKFLOW = "jobs:\n  test:\n    steps:\n      - uses: actions/checkout@v4\n"
+
+
+@pytest.mark.parametrize(
+    "args,expected_exit_code", [(["--diff"], 0), (["--check", "--diff"], 1)]
+)
+def test_dir_command_writes_diff_without_modifying_files(
+    tmp_path, monkeypatch, args: List[str], expected_exit_code: int
+) -> None:
+    workflows = tmp_path / "workflows"
+    workflows.mkdir()
+    (workflows / "ci.yml").write_text(WORKFLOW)
+    (workflows / "pinned.yml").write_text(WORKFLOW.replace("v4", SHA))
+    monkeypatch.chdir(tmp_path)
+
+    with patch("src.editor.get_action_sha", return_value=SHA):
+        result = CliRunner().invoke(app, ["dir", "workflows", *args, "out.diff"])
+
+    assert result.exit_code == expected_exit_code
+    assert (workflows / "ci.yml").read_text() == WORKFLOW
+    assert (tmp_path / "out.diff").read_text() == (
+        "--- a/workflows/ci.yml\n"
+        "+++ b/workflows/ci.yml\n"
+        "@@ -1,4 +1,4 @@\n"
+        " jobs:\n"
+        "   test:\n"
+        "     steps:\n"
+        "-      - uses: actions/checkout@v4\n"
+        f"+      - uses: actions/checkout@{SHA} # v4\n"
+    )
+    assert "1 workflow files would be changed" in result.stdout
+
+
+def test_file_command_diff_applies_to_crlf_files(tmp_path, monkeypatch) -> None:
+    workflow = tmp_path / "ci.yml"
+    workflow.write_bytes(WORKFLOW.replace("\n", "\r\n").encode())
+    monkeypatch.chdir(tmp_path)
+
+    with patch("src.editor.get_action_sha", return_value=SHA):
+        result = CliRunner().invoke(app, ["file", "ci.yml", "--diff", "out.diff"])
+
+    assert result.exit_code == 0
+    subprocess.run(["git", "apply", "out.diff"], cwd=tmp_path, check=True)
+    assert workflow.read_bytes() == (
+        WORKFLOW.replace("@v4", f"@{SHA} # v4").replace("\n", "\r\n").encode()
+    )
+
+
+def test_file_command_check_passes_when_nothing_changes(tmp_path) -> None:
+    workflow = tmp_path / "ci.yml"
+    workflow.write_text(WORKFLOW.replace("v4", SHA))
+
+    result = CliRunner().invoke(app, ["file", str(workflow), "--check"])
+
+    assert result.exit_code == 0
+    assert "0 workflow files would be changed" in result.stdout
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.common.action_status import ActionStatus
+from src.common.exceptions import InvalidImageError, ResolutionError
+from src.common.failure_reason import FailureReason
+from src.editor import scan_workflow_content
+from src.registry import parse_image, resolve_image_digest
+from src.workflow_index import index_workflow
+
+MANIFEST = b'{"schemaVersion": 2}'
+DIGEST = "sha256:" + hashlib.sha256(MANIFEST).hexdigest()
+PINNED_DIGEST = "sha256:" + "a" * 64
+
+
+class StandInRegistry(ThreadingHTTPServer):
+    """A registry requiring a bearer token per repository, as Docker Hub does"""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _RegistryHandler)
+        self.manifests = {("team/app", "1.0"), ("team/no-digest", "1.0")}
+        self.requests: List[Tuple[str, str]] = []
+
+    @property
+    def host(self) -> str:
+        return "{}:{}".format(*self.server_address[:2])
+
+
+class _RegistryHandler(BaseHTTPRequestHandler):
+    server: StandInRegistry
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _reply(self, status: int, headers: Dict[str, str], body: bytes = b"") -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _manifest(self) -> None:
+        self.server.requests.append((self.command, self.path))
+        url = urlparse(self.path)
+        if url.path == "/token":
+            scope = parse_qs(url.query)["scope"][0]
+            body = json.dumps({"token": f"token-{scope}"}).encode()
+            return self._reply(200, {}, body)
+
+        repository, _, tag = url.path[len("/v2/") :].partition("/manifests/")
+        scope = f"repository:{repository}:pull"
+        if self.headers.get("Authorization") != f"Bearer token-{scope}":
+            challenge = (
+                f'Bearer realm="http://{self.server.host}/token",'
+                f'service="stand-in",scope="{scope}"'
+            )
+            return self._reply(401, {"WWW-Authenticate": challenge})
+        if repository == "team/limited":
+            return self._reply(429, {"RateLimit-Remaining": "0;w=21600"})
+        if (repository, tag) not in self.server.manifests:
+            return self._reply(404, {})
+
+        headers = {"RateLimit-Remaining": "99;w=21600"}
+        if repository != "team/no-digest":
+            headers["Docker-Content-Digest"] = DIGEST
+        self._reply(200, headers, MANIFEST)
+
+    do_GET = _manifest
+    do_HEAD = _manifest
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr("src.registry._tokens", {})
+    server = StandInRegistry()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@dataclass(frozen=True)
+class ParseImageParams:
+    image: str
+    expected: Optional[Tuple[str, str, str, Optional[str]]]
+
+
+OFFICIAL_IMAGE = ParseImageParams(
+    "alpine:3.19", ("registry-1.docker.io", "library/alpine", "3.19", None)
+)
+DEFAULT_TAG = ParseImageParams(
+    "docker.io/octo/app", ("registry-1.docker.io", "octo/app", "latest", None)
+)
+OTHER_REGISTRY = ParseImageParams(
+    f"ghcr.io/octo-org/app:1.0@{PINNED_DIGEST}",
+    ("ghcr.io", "octo-org/app", "1.0", PINNED_DIGEST),
+)
+REGISTRY_WITH_PORT = ParseImageParams(
+    "localhost:5000/app:dev", ("localhost:5000", "app", "dev", None)
+)
+EXPRESSION = ParseImageParams("${{ matrix.image }}", None)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [OFFICIAL_IMAGE, DEFAULT_TAG, OTHER_REGISTRY, REGISTRY_WITH_PORT, EXPRESSION],
+)
+def test_parse_image(test_params: ParseImageParams) -> None:
+    assert parse_image(test_params.image) == test_params.expected
+
+
+def test_resolve_image_digest_with_token_flow(registry) -> None:
+    image = f"{registry.host}/team/app:1.0"
+
+    assert resolve_image_digest(image) == DIGEST
+    assert resolve_image_digest(image) == DIGEST
+
+    # Challenged, token, authenticated HEAD, then cached
+    assert [method for method, _ in registry.requests] == ["HEAD", "GET", "HEAD"]
+
+
+def test_resolve_image_digest_reuses_tokens(registry) -> None:
+    registry.manifests.add(("team/app", "2.0"))
+
+    resolve_image_digest(f"{registry.host}/team/app:1.0")
+    resolve_image_digest(f"{registry.host}/team/app:2.0")
+
+    assert sum(path.startswith("/token") for _, path in registry.requests) == 1
+
+
+def test_resolve_image_digest_computes_missing_digest(registry) -> None:
+    assert resolve_image_digest(f"{registry.host}/team/no-digest:1.0") == DIGEST
+
+
+@pytest.mark.parametrize(
+    "repository,reason,cached",
+    [
+        ("team/missing", FailureReason.NOT_FOUND, True),
+        ("team/limited", FailureReason.RATE_LIMITED, False),
+    ],
+)
+def test_resolve_image_digest_failures(
+    registry, repository: str, reason: FailureReason, cached: bool
+) -> None:
+    image = f"{registry.host}/{repository}:1.0"
+
+    for _ in range(2):
+        with pytest.raises(ResolutionError) as error:
+            resolve_image_digest(image)
+        assert error.value.reason == reason
+
+    heads = sum(method == "HEAD" for method, _ in registry.requests)
+    assert heads == (2 if cached else 4)
+
+
+def test_resolve_image_digest_rejects_invalid_images() -> None:
+    with pytest.raises(InvalidImageError):
+        resolve_image_digest("${{ matrix.image }}")
+
+
+WORKFLOW = """jobs:
+  test:
+    container: node:18
+    services:
+      redis:
+        image: "redis:7"
+        ports:
+          - 6379:6379
+      cache:
+        image: memcached@{pinned}
+    steps:
+      - uses: docker://alpine:3.19
+      - uses: docker/build-push-action@v5
+        with:
+          image: not-a-container:1.0
+  build:
+    container:
+      image: ${{{{ matrix.image }}}}
+""".format(pinned=PINNED_DIGEST)
+
+
+def test_index_workflow_finds_container_images() -> None:
+    images = [image.value for image in index_workflow(WORKFLOW).images]
+
+    assert images == [
+        "node:18",
+        "redis:7",
+        f"memcached@{PINNED_DIGEST}",
+        "${{ matrix.image }}",
+    ]
+
+
+def test_scan_workflow_content_leaves_images_without_resolver() -> None:
+    updated, actions = scan_workflow_content(
+        WORKFLOW, False, lambda action: ("0" * 40, None), lambda owner, repo: None
+    )
+
+    assert updated == WORKFLOW.replace(
+        "docker/build-push-action@v5", f"docker/build-push-action@{'0' * 40} # v5"
+    )
+    assert [action["action"] for action in actions] == [
+        "docker://alpine:3.19",
+        "docker/build-push-action@v5",
+    ]
+
+
+def test_scan_workflow_content_pins_images() -> None:
+    looked_up = []
+
+    def mock_resolve_digest(image: str):
+        looked_up.append(image)
+        return DIGEST, None
+
+    updated, actions = scan_workflow_content(
+        WORKFLOW,
+        False,
+        lambda action: ("0" * 40, None),
+        lambda owner, repo: None,
+        mock_resolve_digest,
+    )
+
+    assert f"container: node:18@{DIGEST}\n" in updated
+    assert f'image: "redis:7@{DIGEST}"\n' in updated
+    assert f"uses: docker://alpine:3.19@{DIGEST}\n" in updated
+    assert "image: not-a-container:1.0\n" in updated
+    assert sorted(looked_up) == ["alpine:3.19", "node:18", "redis:7"]
+    statuses = {action["action"]: action["status"] for action in actions}
+    assert statuses["docker://alpine:3.19"] == ActionStatus.NEEDS_PINNING
+    assert statuses[f"memcached@{PINNED_DIGEST}"] == ActionStatus.ALREADY_PINNED
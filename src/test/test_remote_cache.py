@@ -0,0 +1,118 @@
+import socket
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from src import cache
+from src.main import app
+from src.remote_cache import CacheServer, HttpBackend
+
+
+@pytest.fixture
+def server():
+    server = CacheServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server: CacheServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def _unused_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_put_then_get(server) -> None:
+    backend = HttpBackend(_url(server))
+
+    backend.put("actions/checkout@v4", {"sha": "abc", "resolved_at": 1.0})
+    backend.flush()
+
+    assert server.entries == {"actions/checkout@v4": {"sha": "abc", "resolved_at": 1.0}}
+    assert backend.get("actions/checkout@v4") == {"sha": "abc", "resolved_at": 1.0}
+    assert backend.get("actions/setup-go@v5") is None
+    backend.close({})
+
+
+def test_server_keeps_most_recent_resolution(server) -> None:
+    server.put("release:actions/checkout", {"tag": "v4.2.0", "resolved_at": 2.0})
+    server.put("release:actions/checkout", {"tag": "v4.1.0", "resolved_at": 1.0})
+
+    assert server.get("release:actions/checkout")["tag"] == "v4.2.0"
+
+
+def test_lookup_reads_through_and_store_writes_behind(server) -> None:
+    server.put("actions/checkout@v4", {"sha": "abc", "resolved_at": 1000.0})
+    cache.use_backend(HttpBackend(_url(server)))
+
+    with patch("src.cache.time.time", return_value=1000.0):
+        assert cache.lookup("actions/checkout@v4")["sha"] == "abc"
+    assert "actions/checkout@v4" in cache.get_store()
+
+    cache.store("actions/setup-go@v5", sha="def")
+    cache.save()
+
+    assert server.entries["actions/setup-go@v5"]["sha"] == "def"
+
+
+def test_expired_remote_entries_are_misses(server) -> None:
+    server.put("actions/checkout@v4", {"sha": "abc", "resolved_at": 0.0})
+    cache.use_backend(HttpBackend(_url(server)))
+
+    assert cache.lookup("actions/checkout@v4") is None
+
+
+def test_unavailable_remote_is_skipped_during_cooldown() -> None:
+    on_unavailable = Mock()
+    backend = HttpBackend(
+        _unused_url(), timeout=0.5, cooldown=60, on_unavailable=on_unavailable
+    )
+
+    with patch("builtins.print") as mock_print:
+        assert backend.get("actions/checkout@v4") is None
+        with patch.object(backend._session, "request") as mock_request:
+            assert backend.get("actions/checkout@v4") is None
+            backend.put("actions/checkout@v4", {"sha": "abc"})
+            backend.flush()
+
+    on_unavailable.assert_called_once()
+    mock_print.assert_not_called()
+    mock_request.assert_not_called()
+
+
+def test_lookup_degrades_to_local_cache_when_remote_is_down() -> None:
+    cache.use_backend(HttpBackend(_unused_url(), timeout=0.5))
+    cache.store("actions/checkout@v4", sha="abc")
+
+    with patch("builtins.print"):
+        assert cache.lookup("actions/setup-go@v5") is None
+        cache.save()
+
+    assert cache.lookup("actions/checkout@v4")["sha"] == "abc"
+
+
+def test_cache_warm_command_fills_the_remote_cache(server, monkeypatch) -> None:
+    def mock_get_action_shas(actions, workers):
+        for action in actions:
+            cache.store(action, sha="a" * 40)
+        return {action: "a" * 40 for action in actions}
+
+    monkeypatch.setattr("src.main.get_action_shas", mock_get_action_shas)
+
+    result = CliRunner().invoke(
+        app, ["--remote-cache", _url(server), "cache", "warm", "actions/checkout@v4"]
+    )
+
+    assert result.exit_code == 0
+    # Written behind, and flushed when the command exits
+    assert server.entries["actions/checkout@v4"]["sha"] == "a" * 40
@@ -0,0 +1,163 @@
+import json
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+
+from src.common.action_status import ActionStatus
+from src.report import (
+    ReportWriter,
+    build_report,
+    merge_reports,
+    missing_shards,
+    read_report,
+    summarize,
+    write_report,
+)
+
+ACTIONS = [
+    {
+        "action": "actions/checkout@v4",
+        "status": ActionStatus.NEEDS_PINNING,
+        "original_ref": "v4",
+        "sha": "0123456789abcdef0123456789abcdef01234567",
+    },
+    {"action": "./local", "status": ActionStatus.SKIPPED, "message": "local"},
+]
+
+
+def test_summarize() -> None:
+    assert summarize(ACTIONS) == {
+        "needs_pinning": 1,
+        "already_pinned": 0,
+        "skipped": 1,
+        "error": 0,
+    }
+
+
+def test_build_report() -> None:
+    report = build_report({"repo-a": ACTIONS, "repo-b": []}, validate_only=True)
+
+    assert report["validate"] is True
+    assert report["results"]["repo-a"]["summary"]["needs_pinning"] == 1
+    assert report["results"]["repo-a"]["actions"][0]["status"] == "needs_pinning"
+    assert report["results"]["repo-b"]["actions"] == []
+    assert report["summary"]["skipped"] == 1
+
+
+def test_write_report(tmp_path) -> None:
+    path = tmp_path / "report.json"
+    report = build_report({"repo-a": ACTIONS}, validate_only=False)
+
+    write_report(report, str(path))
+
+    assert json.loads(path.read_text()) == report
+
+
+def _shard_report(index: int, count: int, target: str) -> dict:
+    return build_report({target: ACTIONS}, validate_only=True, shard=(index, count))
+
+
+def test_merge_reports() -> None:
+    merged = merge_reports([_shard_report(1, 2, "a.yml"), _shard_report(2, 2, "b.yml")])
+
+    assert list(merged["results"]) == ["a.yml", "b.yml"]
+    assert merged["summary"]["needs_pinning"] == 2
+    assert merged["validate"] is True
+    assert missing_shards(merged) == []
+
+
+@dataclass(frozen=True)
+class MissingShardsParams:
+    shards: List[tuple]
+    expected_result: List[int]
+
+
+ALL_SHARDS = MissingShardsParams(
+    shards=[(1, 3), (2, 3), (3, 3)],
+    expected_result=[],
+)
+
+SOME_SHARDS_MISSING = MissingShardsParams(
+    shards=[(2, 4)],
+    expected_result=[1, 3, 4],
+)
+
+UNSHARDED = MissingShardsParams(
+    shards=[],
+    expected_result=[],
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        ALL_SHARDS,
+        SOME_SHARDS_MISSING,
+        UNSHARDED,
+    ],
+)
+def test_missing_shards(test_params: MissingShardsParams) -> None:
+    reports = [
+        _shard_report(index, count, f"{index}.yml")
+        for index, count in test_params.shards
+    ] or [build_report({}, validate_only=True)]
+
+    assert missing_shards(merge_reports(reports)) == test_params.expected_result
+
+
+@pytest.mark.parametrize(
+    "reports",
+    [
+        [_shard_report(1, 2, "a.yml"), _shard_report(1, 2, "b.yml")],
+        [_shard_report(1, 2, "a.yml"), build_report({}, validate_only=True)],
+    ],
+    ids=["duplicate shard", "unsharded report"],
+)
+def test_merge_reports_rejects_overlapping_reports(reports: List[dict]) -> None:
+    with pytest.raises(ValueError):
+        merge_reports(reports)
+
+
+def test_missing_shards_inconsistent_counts() -> None:
+    merged = merge_reports([_shard_report(1, 2, "a.yml"), _shard_report(2, 3, "b.yml")])
+
+    with pytest.raises(ValueError):
+        missing_shards(merged)
+
+
+def test_read_report_rejects_unknown_version(tmp_path) -> None:
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps({"version": 0}))
+
+    with pytest.raises(ValueError):
+        read_report(str(path))
+
+
+@pytest.mark.parametrize(
+    "results",
+    [
+        {"a.yml": ACTIONS, "b.yml": [], "c.yml": ACTIONS[:1]},
+        {},
+    ],
+)
+def test_report_writer_matches_build_report(tmp_path, results: dict) -> None:
+    path = tmp_path / "report.json"
+
+    with ReportWriter(str(path), True, (1, 2)) as writer:
+        for target, actions in results.items():
+            writer.add(target, actions)
+
+    assert json.loads(path.read_text()) == build_report(results, True, (1, 2))
+    assert read_report(str(path))["shards"] == [[1, 2]]
+
+
+def test_report_writer_leaves_no_partial_report(tmp_path) -> None:
+    path = tmp_path / "report.json"
+
+    with pytest.raises(RuntimeError):
+        with ReportWriter(str(path), False) as writer:
+            writer.add("a.yml", ACTIONS)
+            raise RuntimeError("interrupted")
+
+    assert list(tmp_path.iterdir()) == []
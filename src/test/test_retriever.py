@@ -1,31 +1,69 @@
 from dataclasses import dataclass
+from typing import Optional, Tuple
 from unittest.mock import Mock, patch
 
 import pytest
 import requests
 
-from src.retriever import _parse_action, get_action_sha, get_latest_release_tag
+from src import metrics
+from src.common.exceptions import InvalidActionError, ResolutionError
+from src.common.failure_reason import FailureReason
+from src.retriever import (
+    _github_get,
+    get_action_sha,
+    get_action_shas,
+    get_failure_reason,
+    get_latest_release_tag,
+    print_pinned_action,
+    resolve_action_sha,
+    split_action,
+)
 
 
 @dataclass(frozen=True)
-class ParseActionParams:
+class SplitActionParams:
     action: str
-    expected_result: tuple[str, str, str]
+    expected_result: Optional[Tuple[str, str, str, str]]
 
 
-VALID_ACTION = ParseActionParams(
+VALID_ACTION = SplitActionParams(
     action="actions/checkout@v3",
-    expected_result=("actions", "checkout", "v3"),
+    expected_result=("actions", "checkout", "", "v3"),
 )
 
-VALID_LATEST_ACTION = ParseActionParams(
+VALID_LATEST_ACTION = SplitActionParams(
     action="actions/checkout@latest",
-    expected_result=("actions", "checkout", "latest"),
+    expected_result=("actions", "checkout", "", "latest"),
 )
 
-INVALID_ACTION = ParseActionParams(
+INVALID_ACTION = SplitActionParams(
     action="actions/checkout",
-    expected_result=("", "", ""),
+    expected_result=None,
+)
+
+SUBPATH_ACTION = SplitActionParams(
+    action="github/codeql-action/init@v3",
+    expected_result=("github", "codeql-action", "init", "v3"),
+)
+
+REUSABLE_WORKFLOW = SplitActionParams(
+    action="octo-org/example-repo/.github/workflows/reusable.yml@main",
+    expected_result=(
+        "octo-org",
+        "example-repo",
+        ".github/workflows/reusable.yml",
+        "main",
+    ),
+)
+
+DOCKER_ACTION = SplitActionParams(
+    action="docker://ghcr.io/owner/image@sha256:abc",
+    expected_result=None,
+)
+
+LOCAL_ACTION = SplitActionParams(
+    action="./local-action",
+    expected_result=None,
 )
 
 
@@ -35,11 +73,14 @@ INVALID_ACTION = ParseActionParams(
         VALID_ACTION,
         VALID_LATEST_ACTION,
         INVALID_ACTION,
+        SUBPATH_ACTION,
+        REUSABLE_WORKFLOW,
+        DOCKER_ACTION,
+        LOCAL_ACTION,
     ],
 )
-def test_parse_action(test_params: ParseActionParams) -> None:
-    result = _parse_action(test_params.action)
-    assert result == test_params.expected_result
+def test_split_action(test_params: SplitActionParams) -> None:
+    assert split_action(test_params.action) == test_params.expected_result
 
 
 @dataclass(frozen=True)
@@ -87,7 +128,7 @@ def test_get_latest_release_tag(test_params: GetLatestReleaseParams) -> None:
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
 
     # Mock the requests.get method
-    with patch("src.retriever.requests.get", return_value=mock_response):
+    with patch("src.retriever.requests.Session.get", return_value=mock_response):
         # Call the function
         result = get_latest_release_tag(test_params.owner, test_params.repo)
         assert result == test_params.expected_result
@@ -161,18 +202,18 @@ def test_get_action_sha(test_params: GetActionShaParams) -> None:
     if test_params.expected_exception:
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
 
-    # Mock the requests.get method, _parse_action, and get_latest_release_tag
+    # Mock the requests.get method and resolve_latest_release_tag
     with (
-        patch("src.retriever.requests.get", return_value=mock_response),
-        patch("src.retriever._parse_action", return_value=test_params.parse_result),
+        patch("src.retriever.requests.Session.get", return_value=mock_response),
         patch(
-            "src.retriever.get_latest_release_tag", return_value=test_params.latest_tag
+            "src.retriever.resolve_latest_release_tag",
+            return_value=test_params.latest_tag,
         ),
     ):
         # Call the function
         result = get_action_sha(test_params.action)
 
-        # For invalid action format, _parse_action returns empty strings
+        # For invalid action format
         if "" in test_params.parse_result:
             assert result is None
         # For latest tag that failed to retrieve
@@ -184,3 +225,192 @@ def test_get_action_sha(test_params: GetActionShaParams) -> None:
         # For failed API call
         else:
             assert result is None
+
+
+def test_github_get_records_metrics() -> None:
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.headers = {"X-RateLimit-Remaining": "42"}
+
+    metrics.reset()
+    with patch("src.retriever.requests.Session.get", return_value=mock_response):
+        _github_get("https://api.github.com/repos/a/b/commits/v1", "commits")
+
+    lines = metrics.render().splitlines()
+    assert 'gha_pinner_http_requests_total{endpoint="commits",status="200"} 1' in lines
+    assert 'gha_pinner_rate_limit_remaining{host="github.com"} 42' in lines
+    metrics.reset()
+
+
+def test_subpath_actions_share_one_lookup() -> None:
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"sha": "abc123def456"}
+
+    with patch(
+        "src.retriever.requests.Session.get", return_value=mock_response
+    ) as mock_get:
+        shas = [
+            get_action_sha(f"github/codeql-action/{path}@v3")
+            for path in ("init", "analyze", "upload-sarif")
+        ]
+
+    assert shas == ["abc123def456"] * 3
+    mock_get.assert_called_once_with(
+        "https://api.github.com/repos/github/codeql-action/commits/v3"
+    )
+
+
+def test_print_pinned_action_keeps_subpath() -> None:
+    with patch("builtins.print") as mock_print:
+        print_pinned_action("github/codeql-action/init@v3", "abc123")
+
+    mock_print.assert_called_with("Pinned:   github/codeql-action/init@abc123")
+
+
+def _http_error(
+    status_code: int, headers: dict = None, text: str = ""
+) -> requests.exceptions.HTTPError:
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.text = text
+    return requests.exceptions.HTTPError(response=response)
+
+
+@dataclass(frozen=True)
+class FailureParams:
+    error: Exception
+    expected_reason: FailureReason
+    expected_cached: bool
+
+
+NOT_FOUND = FailureParams(
+    error=_http_error(404),
+    expected_reason=FailureReason.NOT_FOUND,
+    expected_cached=True,
+)
+
+FORBIDDEN = FailureParams(
+    error=_http_error(403, {"X-RateLimit-Remaining": "4000"}),
+    expected_reason=FailureReason.FORBIDDEN,
+    expected_cached=True,
+)
+
+RATE_LIMITED = FailureParams(
+    error=_http_error(403, {"X-RateLimit-Remaining": "0"}),
+    expected_reason=FailureReason.RATE_LIMITED,
+    expected_cached=False,
+)
+
+SECONDARY_RATE_LIMIT = FailureParams(
+    error=_http_error(403, {"X-RateLimit-Remaining": "4000", "Retry-After": "60"}),
+    expected_reason=FailureReason.RATE_LIMITED,
+    expected_cached=False,
+)
+
+SECONDARY_RATE_LIMIT_MESSAGE = FailureParams(
+    error=_http_error(
+        403,
+        {"X-RateLimit-Remaining": "4000"},
+        '{"message": "You have exceeded a secondary rate limit."}',
+    ),
+    expected_reason=FailureReason.RATE_LIMITED,
+    expected_cached=False,
+)
+
+UNAUTHORIZED = FailureParams(
+    error=_http_error(401),
+    expected_reason=FailureReason.UNAUTHORIZED,
+    expected_cached=False,
+)
+
+TOO_MANY_REQUESTS = FailureParams(
+    error=_http_error(429),
+    expected_reason=FailureReason.RATE_LIMITED,
+    expected_cached=False,
+)
+
+SERVER_ERROR = FailureParams(
+    error=_http_error(502),
+    expected_reason=FailureReason.UNAVAILABLE,
+    expected_cached=False,
+)
+
+CONNECTION_ERROR = FailureParams(
+    error=requests.exceptions.ConnectionError(),
+    expected_reason=FailureReason.UNAVAILABLE,
+    expected_cached=False,
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        NOT_FOUND,
+        FORBIDDEN,
+        RATE_LIMITED,
+        SECONDARY_RATE_LIMIT,
+        SECONDARY_RATE_LIMIT_MESSAGE,
+        UNAUTHORIZED,
+        TOO_MANY_REQUESTS,
+        SERVER_ERROR,
+        CONNECTION_ERROR,
+    ],
+)
+def test_failed_lookups_are_classified_and_cached(test_params: FailureParams) -> None:
+    mock_response = Mock()
+    mock_response.headers = {}
+    mock_response.raise_for_status.side_effect = test_params.error
+
+    with (
+        patch(
+            "src.retriever.requests.Session.get", return_value=mock_response
+        ) as mock_get,
+        patch("builtins.print"),
+    ):
+        assert get_action_sha("octo-org/private-action@v1") is None
+        assert get_failure_reason("octo-org/private-action@v1") == (
+            test_params.expected_reason
+        )
+
+        # Only definitive failures are served from the cache on the next lookup
+        assert get_action_sha("octo-org/private-action@v1") is None
+        assert get_failure_reason("octo-org/private-action@v1") == (
+            test_params.expected_reason
+        )
+
+    assert mock_get.call_count == (1 if test_params.expected_cached else 2)
+
+
+def test_get_action_shas_resolves_each_action_once() -> None:
+    with patch(
+        "src.retriever.get_action_sha", side_effect=lambda action: action[-1] * 40
+    ) as mock_get_action_sha:
+        shas = get_action_shas(
+            ["actions/checkout@v4", "actions/setup-go@v5", "actions/checkout@v4"],
+            workers=4,
+        )
+
+    assert shas == {"actions/checkout@v4": "4" * 40, "actions/setup-go@v5": "5" * 40}
+    assert mock_get_action_sha.call_count == 2
+
+
+def test_resolve_action_sha_raises_typed_errors() -> None:
+    mock_response = Mock()
+    mock_response.status_code = 404
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        response=mock_response
+    )
+
+    with (
+        patch("src.retriever.requests.Session.get", return_value=mock_response),
+        patch("builtins.print") as mock_print,
+    ):
+        with pytest.raises(ResolutionError) as error:
+            resolve_action_sha("octo-org/private-action@v1")
+        with pytest.raises(InvalidActionError):
+            resolve_action_sha("not-an-action")
+
+    assert error.value.reason == FailureReason.NOT_FOUND
+    mock_print.assert_not_called()
@@ -0,0 +1,136 @@
+import json
+import time
+from dataclasses import dataclass
+from unittest.mock import Mock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from src import seed_index
+from src.common.constants import DEFAULT_CACHE_TTL
+from src.main import app
+from src.retriever import get_action_sha
+from src.seed_index import SeedIndex, build, is_fresh
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+OTHER_SHA = "89abcdef0123456789abcdef0123456789abcdef"
+NOW = 1_700_000_000
+ENTRIES = {
+    "actions/checkout@v4": {"sha": SHA, "resolved_at": NOW},
+    "actions/setup-go@v5.1.0": {"sha": OTHER_SHA, "resolved_at": NOW - 60},
+    "docker/login-action@main": {"sha": SHA, "resolved_at": NOW},
+    # Not seedable: failures, other kinds of entries and other hosts
+    "octo-org/private@v1": {"error": "not_found", "resolved_at": NOW},
+    "release:actions/checkout": {"tag": "v4.2.2", "resolved_at": NOW},
+    f"file:actions/checkout@{SHA}/action.yml": {"content": "", "resolved_at": NOW},
+    "github.example.com/platform/deploy@v1": {"sha": SHA, "resolved_at": NOW},
+    "actions/cache@v4": {"sha": "not-a-sha", "resolved_at": NOW},
+}
+
+
+@pytest.mark.parametrize("mapped", [True, False])
+def test_seed_index_finds_indexed_actions(tmp_path, mapped: bool) -> None:
+    path = tmp_path / "seed-index.bin"
+    path.write_bytes(build(ENTRIES))
+
+    # Memory-mapped from disk, or read into memory as from a zipapp
+    index = SeedIndex.open(str(path)) if mapped else SeedIndex(path.read_bytes())
+
+    assert len(index) == 3
+    assert index.lookup("actions/checkout@v4") == (SHA, NOW)
+    assert index.lookup("actions/setup-go@v5.1.0") == (OTHER_SHA, NOW - 60)
+    assert index.lookup("docker/login-action@main") == (SHA, NOW)
+    for key in ("actions/cache@v4", "aaa/first@v1", "zzz/last@v1", "actions/x@v1"):
+        assert index.lookup(key) is None
+    index.close()
+
+
+def test_seed_index_rejects_other_files(tmp_path) -> None:
+    path = tmp_path / "seed-index.bin"
+    path.write_bytes(b"not a seed index")
+
+    with pytest.raises(ValueError):
+        SeedIndex.open(str(path))
+
+
+@dataclass(frozen=True)
+class FreshnessParams:
+    ref: str
+    age: float
+    expected: bool
+
+
+RECENT_MAJOR_TAG = FreshnessParams("v4", 60, True)
+OLD_MAJOR_TAG = FreshnessParams("v4", DEFAULT_CACHE_TTL + 1, False)
+OLD_BRANCH = FreshnessParams("main", DEFAULT_CACHE_TTL + 1, False)
+OLD_FULL_VERSION = FreshnessParams("v4.2.2", 10 * DEFAULT_CACHE_TTL, True)
+OLD_SHA = FreshnessParams(SHA, 10 * DEFAULT_CACHE_TTL, True)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [RECENT_MAJOR_TAG, OLD_MAJOR_TAG, OLD_BRANCH, OLD_FULL_VERSION, OLD_SHA],
+)
+def test_is_fresh(test_params: FreshnessParams) -> None:
+    assert is_fresh(test_params.ref, NOW - test_params.age, NOW) == test_params.expected
+
+
+def test_retriever_uses_fresh_seeds_only(tmp_path) -> None:
+    stale = time.time() - DEFAULT_CACHE_TTL - 60
+    path = tmp_path / "seed-index.bin"
+    path.write_bytes(
+        build(
+            {
+                "actions/checkout@v4.2.2": {"sha": SHA, "resolved_at": stale},
+                "actions/setup-go@v5": {"sha": SHA, "resolved_at": stale},
+            }
+        )
+    )
+    seed_index.use(str(path))
+    response = Mock()
+    response.status_code = 200
+    response.headers = {}
+    response.json.return_value = {"sha": OTHER_SHA}
+
+    with patch("src.retriever.requests.Session.get", return_value=response) as mock_get:
+        assert get_action_sha("actions/checkout@v4.2.2") == SHA
+        assert get_action_sha("actions/setup-go@v5") == OTHER_SHA
+
+    mock_get.assert_called_once_with(
+        "https://api.github.com/repos/actions/setup-go/commits/v5"
+    )
+
+
+def test_retriever_re_resolves_branches_seeded_before_the_cache_ttl(tmp_path) -> None:
+    # A branch head seeded when the release was built may have moved since
+    seeded_at = time.time() - DEFAULT_CACHE_TTL - 60
+    path = tmp_path / "seed-index.bin"
+    path.write_bytes(
+        build({"docker/login-action@main": {"sha": SHA, "resolved_at": seeded_at}})
+    )
+    seed_index.use(str(path))
+    response = Mock()
+    response.status_code = 200
+    response.headers = {}
+    response.json.return_value = {"sha": OTHER_SHA}
+
+    with patch("src.retriever.requests.Session.get", return_value=response) as mock_get:
+        assert get_action_sha("docker/login-action@main") == OTHER_SHA
+
+    mock_get.assert_called_once_with(
+        "https://api.github.com/repos/docker/login-action/commits/main"
+    )
+
+
+def test_cache_build_index_command(tmp_path) -> None:
+    snapshot = tmp_path / "cache.json"
+    snapshot.write_text(json.dumps({"version": 1, "entries": ENTRIES}))
+    output = tmp_path / "seed-index.bin"
+
+    result = CliRunner().invoke(
+        app, ["cache", "build-index", str(snapshot), str(output)]
+    )
+
+    assert result.exit_code == 0
+    assert "Indexed 3 actions" in result.stdout
+    assert SeedIndex.open(str(output)).lookup("actions/checkout@v4") == (SHA, NOW)
@@ -0,0 +1,155 @@
+import io
+import json
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from src import cache, hedging, hosts, seed_index
+from src.common.action_status import ActionStatus
+from src.common.constants import SEED_INDEX_DISABLED
+from src.remote_cache import HttpBackend
+from src.sweep import (
+    _init_worker,
+    _scan_repo,
+    _worker_config,
+    read_list,
+    sweep_repos,
+)
+
+
+def test_read_list(tmp_path) -> None:
+    path = tmp_path / "repos.txt"
+    path.write_text("# fleet\nrepo-a\n\n  repo-b  \n")
+
+    assert read_list(str(path)) == ["repo-a", "repo-b"]
+
+
+def test_read_list_from_stdin() -> None:
+    with patch("sys.stdin", io.StringIO("repo-a\nrepo-b\n")):
+        assert read_list("-") == ["repo-a", "repo-b"]
+
+
+@dataclass(frozen=True)
+class ScanRepoParams:
+    make_workflows_dir: bool
+    make_repo: bool
+    expected_calls: int
+
+
+REPO_WITH_WORKFLOWS = ScanRepoParams(
+    make_workflows_dir=True,
+    make_repo=True,
+    expected_calls=1,
+)
+
+REPO_WITHOUT_WORKFLOWS = ScanRepoParams(
+    make_workflows_dir=False,
+    make_repo=True,
+    expected_calls=0,
+)
+
+MISSING_REPO = ScanRepoParams(
+    make_workflows_dir=False,
+    make_repo=False,
+    expected_calls=0,
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        REPO_WITH_WORKFLOWS,
+        REPO_WITHOUT_WORKFLOWS,
+        MISSING_REPO,
+    ],
+)
+def test_scan_repo(test_params: ScanRepoParams, tmp_path) -> None:
+    root = tmp_path / "repo"
+    if test_params.make_repo:
+        root.mkdir()
+    if test_params.make_workflows_dir:
+        (root / ".github" / "workflows").mkdir(parents=True)
+
+    with patch("src.sweep.pin_actions_in_dir", return_value=[]) as mock_pin:
+        assert _scan_repo(str(root), True) == []
+
+    assert mock_pin.call_count == test_params.expected_calls
+
+
+def _make_repo(tmp_path, name: str) -> str:
+    workflows_dir = tmp_path / name / ".github" / "workflows"
+    workflows_dir.mkdir(parents=True)
+    (workflows_dir / "ci.yml").write_text(
+        "jobs:\n  test:\n    steps:\n      - uses: actions/checkout@v4\n"
+    )
+    return str(tmp_path / name)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sweep_repos_shares_one_cache(workers: int, tmp_path) -> None:
+    roots = [_make_repo(tmp_path, "repo-a"), _make_repo(tmp_path, "repo-b")]
+    cache.store("actions/checkout@v4", sha="0123456789abcdef0123456789abcdef01234567")
+
+    results = sweep_repos(roots, validate_only=True, workers=workers)
+
+    assert list(results) == roots
+    for actions in results.values():
+        assert actions[0]["status"] == ActionStatus.NEEDS_PINNING
+        assert actions[0]["sha"] == "0123456789abcdef0123456789abcdef01234567"
+
+
+def test_spawned_workers_get_the_parent_configuration(tmp_path, monkeypatch) -> None:
+    """Spawned workers inherit nothing, so they must be sent the configuration"""
+    config = tmp_path / "hosts.json"
+    config.write_text(
+        json.dumps({"hosts": {"github.example.com": {"owners": ["actions"]}}})
+    )
+    hosts.load(str(config))
+    # Only found if the workers resolve the action against the configured host
+    cache.store(
+        "github.example.com/actions/checkout@v4",
+        sha="0123456789abcdef0123456789abcdef01234567",
+    )
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(
+        "src.sweep.ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=spawn)
+    )
+    roots = [_make_repo(tmp_path, "repo-a"), _make_repo(tmp_path, "repo-b")]
+
+    results = sweep_repos(roots, validate_only=True, workers=2)
+
+    for actions in results.values():
+        assert actions[0]["status"] == ActionStatus.NEEDS_PINNING
+
+
+def test_init_worker_applies_the_pickled_configuration(tmp_path) -> None:
+    config = tmp_path / "hosts.json"
+    config.write_text(
+        json.dumps({"hosts": {"github.example.com": {"owners": ["platform"]}}})
+    )
+    hosts.load(str(config))
+    hedging.enable()
+    seed_index.use(None)
+    cache.load(str(tmp_path / "cache.json"))
+    cache.use_backend(HttpBackend("http://cache.example"))
+    store = {"actions/checkout@v4": {"sha": "abc"}}
+    worker_config = pickle.loads(pickle.dumps(_worker_config(store)))
+    hosts.reset()
+    hedging.reset()
+    seed_index.reset()
+    cache.reset()
+
+    _init_worker(worker_config)
+
+    assert hosts.host_for("platform").name == "github.example.com"
+    assert hedging.is_enabled()
+    assert seed_index.get_source() == SEED_INDEX_DISABLED
+    [backend] = cache.get_backends()
+    assert isinstance(backend, HttpBackend)
+    assert backend.url == "http://cache.example"
+    assert cache.get_store() == store
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+from src import tracing
+
+
+def test_span_is_noop_when_disabled() -> None:
+    tracing.disable_tracing()
+
+    with tracing.span("gha_pinner.file", path="ci.yml") as active_span:
+        assert active_span is None
+
+
+def test_disabled_tracing_does_not_import_opentelemetry() -> None:
+    code = (
+        "import sys; from src.main import app; "
+        "from src.editor import pin_action_in_file; "
+        "assert not any(m.startswith('opentelemetry') for m in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code])
+    assert result.returncode == 0
+
+
+def test_enable_tracing_without_opentelemetry() -> None:
+    with (
+        patch.dict(sys.modules, {"opentelemetry": None}),
+        patch("builtins.print") as mock_print,
+    ):
+        assert tracing.enable_tracing() is False
+        mock_print.assert_called_once()
+
+    with tracing.span("gha_pinner.resolve") as active_span:
+        assert active_span is None
+
+
+def test_enable_tracing_uses_tracer() -> None:
+    fake_trace = MagicMock()
+    fake_module = MagicMock(trace=fake_trace)
+
+    with patch.dict(sys.modules, {"opentelemetry": fake_module}):
+        assert tracing.enable_tracing() is True
+
+    try:
+        tracing.span("gha_pinner.resolve", action="actions/checkout@v4")
+        tracer = fake_trace.get_tracer.return_value
+        tracer.start_as_current_span.assert_called_once_with(
+            "gha_pinner.resolve", attributes={"action": "actions/checkout@v4"}
+        )
+    finally:
+        tracing.disable_tracing()
@@ -0,0 +1,171 @@
+from typing import Optional
+from unittest.mock import Mock, patch
+
+import requests
+
+from src import cache
+from src.common.action_status import ActionStatus
+from src.retriever import fetch_file
+from src.transitive import find_nested_uses, inspect_transitively, roots_of
+
+SETUP_SHA = "1" * 40
+NODE_SHA = "2" * 40
+CACHE_SHA = "3" * 40
+TOOLKIT_SHA = "4" * 40
+WORKFLOW_SHA = "5" * 40
+DIGEST = "sha256:" + "6" * 64
+
+# (owner/repo, sha, path) -> content
+FILES = {
+    ("octo-org/setup", SETUP_SHA, "action.yml"): (
+        "runs:\n"
+        "  using: composite\n"
+        "  steps:\n"
+        f"    - uses: actions/setup-node@{NODE_SHA}\n"
+        "    - uses: 'actions/cache@v4'\n"
+        "    - uses: ./local-action\n"
+        "    - uses: docker://alpine:3.19\n"
+    ),
+    ("actions/setup-node", NODE_SHA, "action.yaml"): "runs:\n  using: node20\n",
+    ("actions/cache", CACHE_SHA, "restore/action.yml"): "runs:\n  using: node20\n",
+    ("actions/cache", CACHE_SHA, "action.yml"): (
+        "runs:\n"
+        "  using: composite\n"
+        "  steps:\n"
+        "    - uses: actions/cache/restore@v4\n"
+        "    - uses: octo-org/toolkit@main\n"
+    ),
+    ("octo-org/workflows", WORKFLOW_SHA, ".github/workflows/build.yml"): (
+        f"jobs:\n  build:\n    steps:\n      - uses: octo-org/setup@{SETUP_SHA} # v1\n"
+    ),
+}
+
+
+def mock_fetch_file(owner: str, repo: str, sha: str, path: str) -> Optional[str]:
+    return FILES.get((f"{owner}/{repo}", sha, path))
+
+
+def mock_resolve_action_sha(action: str) -> str:
+    return {
+        "actions/cache@v4": CACHE_SHA,
+        "actions/cache/restore@v4": CACHE_SHA,
+        "octo-org/toolkit@main": TOOLKIT_SHA,
+    }[action]
+
+
+def test_find_nested_uses_skips_local_and_docker() -> None:
+    content = FILES[("octo-org/setup", SETUP_SHA, "action.yml")]
+
+    assert find_nested_uses(content) == [
+        f"actions/setup-node@{NODE_SHA}",
+        "actions/cache@v4",
+    ]
+
+
+def test_inspect_transitively_follows_reusable_workflows() -> None:
+    with (
+        patch("src.transitive.fetch_file", side_effect=mock_fetch_file),
+        patch("src.transitive.resolve_action_sha", side_effect=mock_resolve_action_sha),
+    ):
+        inspected, found = inspect_transitively(
+            [("octo-org/workflows/.github/workflows/build.yml@v2", WORKFLOW_SHA)]
+        )
+
+    unpinned = {
+        action["action"]: action["via"]
+        for action in found
+        if action["status"] == ActionStatus.NEEDS_PINNING
+    }
+    assert unpinned == {
+        "actions/cache@v4": [
+            "octo-org/workflows/.github/workflows/build.yml@v2",
+            f"octo-org/setup@{SETUP_SHA}",
+        ],
+        "actions/cache/restore@v4": [
+            "octo-org/workflows/.github/workflows/build.yml@v2",
+            f"octo-org/setup@{SETUP_SHA}",
+            "actions/cache@v4",
+        ],
+        "octo-org/toolkit@main": [
+            "octo-org/workflows/.github/workflows/build.yml@v2",
+            f"octo-org/setup@{SETUP_SHA}",
+            "actions/cache@v4",
+        ],
+    }
+    # build.yml, setup, setup-node, cache, cache/restore and toolkit
+    assert inspected == 6
+
+
+def test_inspect_transitively_fetches_each_manifest_once() -> None:
+    roots = [
+        (f"octo-org/setup@{SETUP_SHA}", SETUP_SHA),
+        (f"octo-org/setup@{SETUP_SHA}", SETUP_SHA),
+        (f"actions/setup-node@{NODE_SHA}", NODE_SHA),
+    ]
+    with (
+        patch("src.transitive.fetch_file", side_effect=mock_fetch_file) as mock_fetch,
+        patch("src.transitive.resolve_action_sha", side_effect=mock_resolve_action_sha),
+    ):
+        inspect_transitively(roots, workers=4)
+
+    fetched = [call.args for call in mock_fetch.call_args_list]
+    assert len(fetched) == len(set(fetched))
+
+
+def test_roots_of_keeps_resolved_actions() -> None:
+    actions_found = [
+        {
+            "action": "actions/checkout@v4",
+            "status": ActionStatus.NEEDS_PINNING,
+            "sha": WORKFLOW_SHA,
+        },
+        {
+            "action": f"octo-org/setup@{SETUP_SHA}",
+            "status": ActionStatus.ALREADY_PINNED,
+            "sha": SETUP_SHA,
+        },
+        {"action": "octo-org/private@v1", "status": ActionStatus.ERROR},
+        {"action": "./local", "status": ActionStatus.SKIPPED},
+        {
+            "action": "docker://alpine:3.19",
+            "status": ActionStatus.NEEDS_PINNING,
+            "sha": DIGEST,
+        },
+        {
+            "action": f"node:18@{DIGEST}",
+            "status": ActionStatus.ALREADY_PINNED,
+            "sha": DIGEST,
+        },
+    ]
+
+    assert roots_of(actions_found) == [
+        ("actions/checkout@v4", WORKFLOW_SHA),
+        (f"octo-org/setup@{SETUP_SHA}", SETUP_SHA),
+    ]
+
+
+def _response(status_code: int, text: str = "") -> Mock:
+    response = Mock(status_code=status_code, text=text)
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            response=response
+        )
+    return response
+
+
+def test_fetch_file_is_cached_forever() -> None:
+    responses = [_response(200, "runs:\n"), _response(404)]
+    with patch("src.retriever._github_get", side_effect=responses) as mock_get:
+        assert fetch_file("actions", "cache", CACHE_SHA, "action.yml") == "runs:\n"
+        assert fetch_file("actions", "cache", CACHE_SHA, "action.yaml") is None
+
+        # Long after any other entry would have expired
+        with patch("src.cache.time.time", return_value=10**12):
+            assert fetch_file("actions", "cache", CACHE_SHA, "action.yml") == "runs:\n"
+            assert fetch_file("actions", "cache", CACHE_SHA, "action.yaml") is None
+            assert cache.prune(max_age=1) == 0
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args_list[0].args[0] == (
+        f"https://raw.githubusercontent.com/actions/cache/{CACHE_SHA}/action.yml"
+    )
@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.common.exceptions import ResolutionError
+from src.common.failure_reason import FailureReason
+from src.common.update_policy import UpdatePolicy
+from src.retriever import list_tags
+from src.updater import (
+    fetch_tag_lists,
+    find_pinned_repos,
+    parse_version,
+    select_tag,
+    update_paths,
+    update_workflow_content,
+)
+
+OLD_SHA = "1" * 40
+SHA_4_1_7 = "2" * 40
+SHA_4_2_0 = "3" * 40
+SHA_5_0_0 = "4" * 40
+SHA_V4 = "5" * 40
+SHA_V5 = "6" * 40
+
+CHECKOUT_TAGS = [
+    ("v5.0.0-beta.1", "7" * 40),
+    ("v5.0.0", SHA_5_0_0),
+    ("v5", SHA_V5),
+    ("v4.2.0", SHA_4_2_0),
+    ("v4.1.7", SHA_4_1_7),
+    ("v4.1.6", OLD_SHA),
+    ("v4", SHA_V4),
+    ("4.3.0", "8" * 40),
+]
+
+
+@pytest.mark.parametrize(
+    "tag,expected",
+    [
+        ("v4", (4,)),
+        ("v4.1", (4, 1)),
+        ("4.1.2", (4, 1, 2)),
+        ("v5.0.0-beta.1", None),
+        ("main", None),
+    ],
+)
+def test_parse_version(tag: str, expected: Optional[Tuple[int, ...]]) -> None:
+    assert parse_version(tag) == expected
+
+
+@dataclass(frozen=True)
+class SelectTagParams:
+    current_tag: str
+    policy: UpdatePolicy
+    expected: Optional[Tuple[str, str]]
+
+
+PATCH_UPDATE = SelectTagParams("v4.1.6", UpdatePolicy.PATCH, ("v4.1.7", SHA_4_1_7))
+MINOR_UPDATE = SelectTagParams("v4.1.6", UpdatePolicy.MINOR, ("v4.2.0", SHA_4_2_0))
+MAJOR_UPDATE = SelectTagParams("v4.1.6", UpdatePolicy.MAJOR, ("v5.0.0", SHA_5_0_0))
+# A major version tag follows the major version tags only
+MOVED_MAJOR_TAG = SelectTagParams("v4", UpdatePolicy.MINOR, ("v4", SHA_V4))
+NEXT_MAJOR_TAG = SelectTagParams("v4", UpdatePolicy.MAJOR, ("v5", SHA_V5))
+# Never downgrade, even if the current tag is gone
+NO_DOWNGRADE = SelectTagParams("v4.9.0", UpdatePolicy.MINOR, None)
+NOT_A_VERSION = SelectTagParams("main", UpdatePolicy.MAJOR, None)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        PATCH_UPDATE,
+        MINOR_UPDATE,
+        MAJOR_UPDATE,
+        MOVED_MAJOR_TAG,
+        NEXT_MAJOR_TAG,
+        NO_DOWNGRADE,
+        NOT_A_VERSION,
+    ],
+)
+def test_select_tag(test_params: SelectTagParams) -> None:
+    assert (
+        select_tag(test_params.current_tag, CHECKOUT_TAGS, test_params.policy)
+        == test_params.expected
+    )
+
+
+def test_update_workflow_content_rewrites_sha_and_comment() -> None:
+    content = (
+        "    steps:\n"
+        f"      - uses: actions/checkout@{OLD_SHA} # v4.1.6\n"
+        f"      - uses: actions/checkout@{OLD_SHA}  #v4.1.6 keep this note\n"
+        f"      - uses: actions/checkout@{OLD_SHA} # latest (v4.1.6)\n"
+        f"      - uses: actions/checkout@{SHA_4_2_0} # v4.2.0\n"
+        f"      - uses: actions/checkout@{OLD_SHA}\n"
+        f"      - uses: octo-org/private/action@{OLD_SHA} # v1.0.0\n"
+        "      - uses: actions/setup-go@v5\n"
+    )
+    tag_lists = {("actions", "checkout"): CHECKOUT_TAGS, ("octo-org", "private"): None}
+
+    updated, updates = update_workflow_content(content, UpdatePolicy.MINOR, tag_lists)
+
+    assert updated == (
+        "    steps:\n"
+        f"      - uses: actions/checkout@{SHA_4_2_0} # v4.2.0\n"
+        f"      - uses: actions/checkout@{SHA_4_2_0}  #v4.2.0 keep this note\n"
+        f"      - uses: actions/checkout@{SHA_4_2_0} # latest (v4.2.0)\n"
+        f"      - uses: actions/checkout@{SHA_4_2_0} # v4.2.0\n"
+        f"      - uses: actions/checkout@{OLD_SHA}\n"
+        f"      - uses: octo-org/private/action@{OLD_SHA} # v1.0.0\n"
+        "      - uses: actions/setup-go@v5\n"
+    )
+    assert len(updates) == 3
+    assert updates[2]["new_tag"] == "latest (v4.2.0)"
+
+
+def _tags_page(tags: List[Tuple[str, str]], next_url: Optional[str]) -> Mock:
+    response = Mock(status_code=200)
+    response.json.return_value = [
+        {"name": name, "commit": {"sha": sha}} for name, sha in tags
+    ]
+    response.links = {"next": {"url": next_url}} if next_url else {}
+    return response
+
+
+def test_find_pinned_repos_skips_comments_that_are_not_versions() -> None:
+    content = (
+        "steps:\n"
+        f"  - uses: actions/checkout@{OLD_SHA} # v4.1.6\n"
+        f"  - uses: actions/cache@{OLD_SHA} # latest (v4.0.0)\n"
+        f"  - uses: octo-org/noted@{OLD_SHA} # pinned by security\n"
+        f"  - uses: octo-org/branch@{OLD_SHA} # main\n"
+        f"  - uses: octo-org/bare@{OLD_SHA}\n"
+    )
+
+    assert find_pinned_repos(content) == [
+        ("actions", "checkout"),
+        ("actions", "cache"),
+    ]
+
+
+def test_list_tags_follows_pages_and_caches() -> None:
+    pages = [
+        _tags_page(CHECKOUT_TAGS[:4], "https://api.github.com/page2"),
+        _tags_page(CHECKOUT_TAGS[4:], None),
+    ]
+    with patch("src.retriever._github_get", side_effect=pages) as mock_get:
+        assert list_tags("actions", "checkout") == CHECKOUT_TAGS
+        assert list_tags("actions", "checkout") == CHECKOUT_TAGS
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.args[0] == "https://api.github.com/page2"
+
+
+def test_fetch_tag_lists_lists_each_repo_once(capsys) -> None:
+    def mock_list_tags(owner: str, repo: str) -> List[Tuple[str, str]]:
+        if owner == "octo-org":
+            raise ResolutionError(
+                f"{owner}/{repo}", FailureReason.NOT_FOUND, "❌ not found"
+            )
+        return CHECKOUT_TAGS
+
+    repos = [("actions", "checkout"), ("octo-org", "private")] * 3
+    with patch(
+        "src.updater.list_tags", side_effect=mock_list_tags
+    ) as mock_list_tags_call:
+        tag_lists = fetch_tag_lists(repos, workers=4)
+
+    assert tag_lists == {
+        ("actions", "checkout"): CHECKOUT_TAGS,
+        ("octo-org", "private"): None,
+    }
+    assert mock_list_tags_call.call_count == 2
+    assert capsys.readouterr().out.count("not found") == 1
+
+
+def test_update_paths_shares_listings_across_files(tmp_path) -> None:
+    workflows = tmp_path / "workflows"
+    workflows.mkdir()
+    for name in ("ci.yml", "release.yml"):
+        (workflows / name).write_text(
+            f"    steps:\n      - uses: actions/checkout@{OLD_SHA} # v4.1.6\n"
+        )
+
+    with patch("src.updater.list_tags", return_value=CHECKOUT_TAGS) as mock_list:
+        files, tag_lists, updates = update_paths(
+            [str(workflows)], UpdatePolicy.PATCH, validate_only=True
+        )
+
+    assert (files, len(tag_lists), len(updates)) == (2, 1, 2)
+    mock_list.assert_called_once_with("actions", "checkout")
+    # Validating only, nothing is written
+    assert f"@{OLD_SHA} # v4.1.6" in (workflows / "ci.yml").read_text()
+
+    with patch("src.updater.list_tags", return_value=CHECKOUT_TAGS):
+        update_paths([str(workflows)], UpdatePolicy.PATCH)
+
+    assert f"@{SHA_4_1_7} # v4.1.7" in (workflows / "release.yml").read_text()
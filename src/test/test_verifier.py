@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Optional
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from src.common.exceptions import ResolutionError
+from src.common.failure_reason import FailureReason
+from src.common.verify_status import VerifyStatus
+from src.retriever import is_commit_reachable
+from src.verifier import find_pinned_actions, has_failures, verify_files
+
+SHA_V4 = "1" * 40
+SHA_V4_1_0 = "2" * 40
+SHA_MAIN = "3" * 40
+SHA_OLD = "4" * 40
+SHA_FORK = "5" * 40
+
+TAGS = [("v4", SHA_V4), ("v4.1.0", SHA_V4_1_0)]
+BRANCHES = [("main", SHA_MAIN)]
+
+
+def mock_is_commit_reachable(owner: str, repo: str, sha: str, base: str) -> bool:
+    return sha == SHA_OLD
+
+
+@dataclass(frozen=True)
+class VerifyParams:
+    line: str
+    expected_status: VerifyStatus
+    expected_compare_base: Optional[str] = None
+
+
+MATCHING_TAG = VerifyParams(f"actions/checkout@{SHA_V4} # v4", VerifyStatus.VERIFIED)
+# The SHA is the one of another tag: no comparison is needed to find it
+DRIFTED_TAG = VerifyParams(f"actions/checkout@{SHA_V4_1_0} # v4", VerifyStatus.DRIFTED)
+OLD_COMMIT_OF_TAG = VerifyParams(
+    f"actions/checkout@{SHA_OLD} # v4", VerifyStatus.DRIFTED, "v4"
+)
+FORK_COMMIT = VerifyParams(
+    f"actions/checkout@{SHA_FORK} # v4", VerifyStatus.UNREACHABLE, "v4"
+)
+BRANCH_HEAD = VerifyParams(f"actions/checkout@{SHA_MAIN} # main", VerifyStatus.VERIFIED)
+NO_COMMENT_OLD_COMMIT = VerifyParams(
+    f"actions/checkout/subdir@{SHA_OLD}", VerifyStatus.VERIFIED, "main"
+)
+UNKNOWN_REF_FORK_COMMIT = VerifyParams(
+    f"actions/checkout@{SHA_FORK} # v9", VerifyStatus.UNREACHABLE, "main"
+)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        MATCHING_TAG,
+        DRIFTED_TAG,
+        OLD_COMMIT_OF_TAG,
+        FORK_COMMIT,
+        BRANCH_HEAD,
+        NO_COMMENT_OLD_COMMIT,
+        UNKNOWN_REF_FORK_COMMIT,
+    ],
+)
+def test_verify_files(test_params: VerifyParams, tmp_path) -> None:
+    workflow = tmp_path / "ci.yml"
+    workflow.write_text(f"    steps:\n      - uses: {test_params.line}\n")
+
+    with (
+        patch("src.verifier.list_tags", return_value=TAGS),
+        patch("src.verifier.list_branches", return_value=BRANCHES),
+        patch("src.verifier.get_default_branch", return_value="main"),
+        patch(
+            "src.verifier.is_commit_reachable", side_effect=mock_is_commit_reachable
+        ) as mock_reachable,
+    ):
+        results = verify_files([str(workflow)])
+
+    assert [result["status"] for result in results] == [test_params.expected_status]
+    if test_params.expected_compare_base:
+        assert mock_reachable.call_args.args[3] == test_params.expected_compare_base
+    else:
+        mock_reachable.assert_not_called()
+
+
+def test_verify_files_lists_refs_once_per_repo(tmp_path, capsys) -> None:
+    for name in ("ci.yml", "release.yml"):
+        (tmp_path / name).write_text(
+            "    steps:\n"
+            f"      - uses: actions/checkout@{SHA_V4} # v4\n"
+            f"      - uses: actions/checkout@{SHA_OLD} # v4\n"
+            f"      - uses: octo-org/private@{SHA_V4} # v1\n"
+        )
+
+    def mock_list_tags(owner: str, repo: str):
+        if owner == "octo-org":
+            raise ResolutionError(
+                f"{owner}/{repo}", FailureReason.NOT_FOUND, "❌ not found"
+            )
+        return TAGS
+
+    with (
+        patch("src.verifier.list_tags", side_effect=mock_list_tags) as mock_tags,
+        patch("src.verifier.list_branches", return_value=BRANCHES),
+        patch(
+            "src.verifier.is_commit_reachable", side_effect=mock_is_commit_reachable
+        ) as mock_reachable,
+    ):
+        results = verify_files(
+            [str(tmp_path / "ci.yml"), str(tmp_path / "release.yml")]
+        )
+
+    assert mock_tags.call_count == 2
+    mock_reachable.assert_called_once()
+    assert [result["status"] for result in results].count(
+        VerifyStatus.UNVERIFIABLE
+    ) == 2
+    assert has_failures(results)
+    assert capsys.readouterr().out.count("not found") == 1
+
+
+def test_find_pinned_actions_reads_latest_comment() -> None:
+    pinned = find_pinned_actions(
+        "ci.yml", f"    steps:\n      - uses: actions/checkout@{SHA_V4} # latest (v4)\n"
+    )
+
+    assert pinned[0]["repo"] == ("actions", "checkout")
+    assert pinned[0]["ref"] == "v4"
+
+
+@pytest.mark.parametrize(
+    "status_code,status,expected",
+    [
+        (200, "behind", True),
+        (200, "identical", True),
+        (200, "diverged", False),
+        (404, None, False),
+    ],
+)
+def test_is_commit_reachable(
+    status_code: int, status: Optional[str], expected: bool
+) -> None:
+    response = Mock(status_code=status_code)
+    response.json.return_value = {"status": status}
+    if status_code != 200:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            response=response
+        )
+
+    with patch("src.retriever._github_get", return_value=response) as mock_get:
+        assert is_commit_reachable("actions", "checkout", SHA_FORK, "v4") is expected
+        assert is_commit_reachable("actions", "checkout", SHA_FORK, "v4") is expected
+
+    mock_get.assert_called_once()
+    assert mock_get.call_args.args[0].endswith(f"/compare/v4...{SHA_FORK}")
@@ -0,0 +1,87 @@
+import queue
+import sys
+import threading
+import time
+
+import pytest
+
+from src.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    Watcher,
+    create_watcher,
+    watch,
+)
+
+WATCHERS = [lambda dir: PollingWatcher(dir, interval=0.05)]
+if sys.platform.startswith("linux"):
+    WATCHERS.append(InotifyWatcher)
+
+
+@pytest.fixture(
+    params=WATCHERS, ids=lambda factory: getattr(factory, "name", "polling")
+)
+def watched(request, tmp_path):
+    """Watch tmp_path in a thread, yielding the queue of reported batches"""
+    (tmp_path / "ci.yml").write_text("on: push\n")
+    watcher = request.param(str(tmp_path))
+    batches = queue.Queue()
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch, args=(watcher, batches.put, 0.1, stop), daemon=True
+    )
+    thread.start()
+    yield tmp_path, batches
+    stop.set()
+    thread.join(timeout=5)
+    watcher.close()
+
+
+def test_reports_changed_workflow_files(watched) -> None:
+    dir, batches = watched
+    time.sleep(0.1)
+
+    (dir / "ci.yml").write_text("on: pull_request\n")
+    (dir / "notes.txt").write_text("not a workflow\n")
+
+    assert batches.get(timeout=5) == [str(dir / "ci.yml")]
+
+
+def test_reports_new_files_in_new_directories(watched) -> None:
+    dir, batches = watched
+    time.sleep(0.1)
+
+    (dir / "nested").mkdir()
+    time.sleep(0.1)
+    (dir / "nested" / "release.yaml").write_text("on: push\n")
+
+    assert batches.get(timeout=5) == [str(dir / "nested" / "release.yaml")]
+
+
+def test_debounces_bursts_of_saves(watched) -> None:
+    dir, batches = watched
+    time.sleep(0.1)
+
+    for i in range(3):
+        (dir / "ci.yml").write_text(f"on: push # {i}\n")
+        (dir / "other.yml").write_text(f"on: push # {i}\n")
+        time.sleep(0.02)
+
+    assert batches.get(timeout=5) == [str(dir / "ci.yml"), str(dir / "other.yml")]
+    with pytest.raises(queue.Empty):
+        batches.get(timeout=0.5)
+
+
+def test_create_watcher_falls_back_to_polling(tmp_path) -> None:
+    watcher = create_watcher(str(tmp_path), poll=True)
+
+    assert isinstance(watcher, PollingWatcher)
+    watcher.close()
+
+
+def test_watcher_requires_wait() -> None:
+    class Incomplete(Watcher):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,215 @@
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pytest
+
+from src.common.action_status import ActionStatus
+from src.editor import scan_workflow_content
+from src.workflow_index import apply_edits, index_workflow
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+@dataclass(frozen=True)
+class IndexUsesParams:
+    line: str
+    # value, quote, comment
+    expected: Optional[Tuple[str, str, Optional[str]]]
+
+
+PLAIN = IndexUsesParams(
+    "- uses: actions/checkout@v4", ("actions/checkout@v4", "", None)
+)
+DOUBLE_QUOTED = IndexUsesParams(
+    '- uses: "actions/checkout@v4"', ("actions/checkout@v4", '"', None)
+)
+SINGLE_QUOTED = IndexUsesParams(
+    "- uses: 'actions/checkout@v4'  # pinned later",
+    ("actions/checkout@v4", "'", "pinned later"),
+)
+WITH_COMMENT = IndexUsesParams(
+    "  uses: actions/checkout@v4 #v4.1.0 ", ("actions/checkout@v4", "", "v4.1.0")
+)
+HASH_IN_VALUE = IndexUsesParams(
+    "- uses: octo-org/action@main#ref", ("octo-org/action@main#ref", "", None)
+)
+EMPTY_COMMENT = IndexUsesParams(
+    "- uses: actions/checkout@v4 #", ("actions/checkout@v4", "", "")
+)
+FLOW_MAPPING = IndexUsesParams("- { uses: flow/style@v1 }", ("flow/style@v1", "", None))
+QUOTED_FLOW_MAPPING = IndexUsesParams(
+    "- {name: 'Check, uses: no', uses: \"flow/style@v1\"} # note",
+    ("flow/style@v1", '"', "note"),
+)
+UNCLOSED_FLOW_MAPPING = IndexUsesParams("- { uses: flow/style@v1,", None)
+COMMENTED_OUT = IndexUsesParams("# - uses: actions/checkout@v4", None)
+OTHER_KEY = IndexUsesParams("- name: 'uses: actions/checkout@v4'", None)
+
+
+@pytest.mark.parametrize(
+    "test_params",
+    [
+        PLAIN,
+        DOUBLE_QUOTED,
+        SINGLE_QUOTED,
+        WITH_COMMENT,
+        HASH_IN_VALUE,
+        EMPTY_COMMENT,
+        FLOW_MAPPING,
+        QUOTED_FLOW_MAPPING,
+        UNCLOSED_FLOW_MAPPING,
+        COMMENTED_OUT,
+        OTHER_KEY,
+    ],
+)
+def test_index_workflow_reads_uses(test_params: IndexUsesParams) -> None:
+    content = f"steps:\n  {test_params.line}\n"
+
+    uses = index_workflow(content).uses
+
+    if test_params.expected is None:
+        assert uses == []
+        return
+    [value] = uses
+    assert (value.value, value.quote, value.comment) == test_params.expected
+    assert value.line == 2
+    assert content[value.start : value.end] == value.value
+    assert content.splitlines()[1][value.column - 1] in (value.quote or value.value)
+
+
+def test_index_workflow_skips_block_scalars() -> None:
+    content = (
+        "steps:\n"
+        "  - run: |\n"
+        "      uses: not/an-action@v1\n"
+        "\n"
+        "        - uses: still/a-script@v1\n"
+        "  - name: Folded\n"
+        "    with:\n"
+        "      script: >-\n"
+        "        uses: not/an-action@v2\n"
+        "    uses: actions/github-script@v7\n"
+    )
+
+    assert [uses.value for uses in index_workflow(content).uses] == [
+        "actions/github-script@v7"
+    ]
+
+
+def test_index_workflow_skips_quoted_values_spanning_lines() -> None:
+    content = (
+        "steps:\n"
+        '  - name: "Deploy with\n'
+        '      uses: x/y@v1"\n'
+        "  - run: 'echo it''s\n"
+        "      uses: x/y@v2\n"
+        "\n"
+        "      # uses: x/y@v3'\n"
+        "    uses: actions/checkout@v4\n"
+    )
+
+    assert [uses.value for uses in index_workflow(content).uses] == [
+        "actions/checkout@v4"
+    ]
+
+
+def _generated_workflow(steps: int) -> str:
+    lines = ["jobs:", "  build:", "    steps:"]
+    for step in range(steps):
+        lines.append(f"      - uses: 'octo-org/action-{step}@v1' # step {step}")
+        lines.extend(["      - run: |", "          echo 'uses: a/b@v1'"])
+    return "\n".join(lines) + "\n"
+
+
+def _index_time(content: str) -> float:
+    timings: List[float] = []
+    for _ in range(3):
+        start = time.perf_counter()
+        index_workflow(content)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_index_workflow_is_linear() -> None:
+    small, large = _generated_workflow(2_000), _generated_workflow(20_000)
+
+    assert len(index_workflow(large).uses) == 20_000
+    # 10 times the content, with a generous margin for noisy machines
+    assert _index_time(large) < 30 * _index_time(small)
+
+
+def test_apply_edits_in_any_order() -> None:
+    assert apply_edits("abcdef", [(4, 5, "E"), (0, 1, "A"), (2, 2, "-")]) == "Ab-cdEf"
+
+
+def test_scan_workflow_content_pins_flow_mappings() -> None:
+    content = (
+        "steps:\n"
+        "  - { uses: flow/style@v1 }\n"
+        "  - uses: actions/checkout@v4 #\n"
+        "  - [{ uses: a/b@v1 }, { uses: c/d@v1 }]\n"
+    )
+
+    updated, actions = scan_workflow_content(
+        content, False, lambda action: (SHA, None), lambda owner, repo: None
+    )
+
+    assert updated == (
+        "steps:\n"
+        f"  - {{ uses: flow/style@{SHA} }} # v1\n"
+        f"  - uses: actions/checkout@{SHA} # v4\n"
+        "  - [{ uses: a/b@v1 }, { uses: c/d@v1 }]\n"
+    )
+    assert [(action["action"], action["status"]) for action in actions] == [
+        ("flow/style@v1", ActionStatus.NEEDS_PINNING),
+        ("actions/checkout@v4", ActionStatus.NEEDS_PINNING),
+        ("a/b@v1", ActionStatus.SKIPPED),
+        ("c/d@v1", ActionStatus.SKIPPED),
+    ]
+
+
+def test_scan_workflow_content_keeps_quotes_and_comments() -> None:
+    content = (
+        "steps:\n"
+        '  - uses: "actions/checkout@v4" # keep this note\n'
+        "  - uses: 'actions/setup-go@v5'\n"
+        "  - run: |\n"
+        "      # uses: actions/cache@v4\n"
+    )
+
+    updated, actions = scan_workflow_content(
+        content, False, lambda action: (SHA, None), lambda owner, repo: None
+    )
+
+    assert updated == (
+        "steps:\n"
+        f'  - uses: "actions/checkout@{SHA}" # v4 keep this note\n'
+        f"  - uses: 'actions/setup-go@{SHA}' # v5\n"
+        "  - run: |\n"
+        "      # uses: actions/cache@v4\n"
+    )
+    assert [(action["action"], action["line"]) for action in actions] == [
+        ("actions/checkout@v4", 2),
+        ("actions/setup-go@v5", 3),
+    ]
+
+
+def test_scan_workflow_content_keeps_comments_starting_with_the_ref() -> None:
+    content = (
+        "steps:\n"
+        "  - uses: actions/checkout@v4 # v4\n"
+        "  - uses: actions/setup-go@v5 # v5 keep this note\n"
+        "  - uses: actions/cache@v4 # v4.2.0\n"
+    )
+
+    updated, _ = scan_workflow_content(
+        content, False, lambda action: (SHA, None), lambda owner, repo: None
+    )
+
+    assert updated == (
+        "steps:\n"
+        f"  - uses: actions/checkout@{SHA} # v4\n"
+        f"  - uses: actions/setup-go@{SHA} # v5 keep this note\n"
+        f"  - uses: actions/cache@{SHA} # v4 v4.2.0\n"
+    )
@@ -0,0 +1,46 @@
+"""
+Optional OpenTelemetry tracing.
+
+The OpenTelemetry API is only imported once tracing is enabled, so a regular
+run neither pays for the import nor requires the package to be installed.
+Exporters are configured the usual OpenTelemetry way (e.g. by running under
+`opentelemetry-instrument` with the OTEL_* environment variables).
+"""
+
+from contextlib import nullcontext
+from typing import Any, ContextManager
+
+from src.common.constants import PROGRAM_NAME, TRACING_UNAVAILABLE_WARNING, VERSION
+
+_NOOP_SPAN = nullcontext()
+_tracer: Any = None
+
+
+def enable_tracing() -> bool:
+    """Start emitting spans, returning False if OpenTelemetry is not installed"""
+    global _tracer
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print(TRACING_UNAVAILABLE_WARNING)
+        return False
+
+    _tracer = trace.get_tracer(PROGRAM_NAME, VERSION)
+    return True
+
+
+def is_tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def disable_tracing() -> None:
+    """Go back to no-op spans"""
+    global _tracer
+    _tracer = None
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Any]:
+    """Return a span context manager, or a shared no-op one if tracing is off"""
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
@@ -0,0 +1,178 @@
+"""
+Transitive inspection of the actions and reusable workflows used by workflows.
+
+Pinning the `uses:` of a workflow does not pin what a composite action or a
+reusable workflow uses in turn. Starting from the commit each top-level action
+resolves to, the manifest (`action.yml`, or the reusable workflow itself) is
+fetched at that commit and its own `uses:` are inspected, level by level, every
+level being fetched in parallel. Manifests are cached by commit SHA, forever,
+since the content at a commit never changes.
+"""
+
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.common.action_status import ActionStatus
+from src.common.constants import (
+    ACTION_MANIFEST_FILES,
+    DEFAULT_RESOLVE_WORKERS,
+    MAX_TRANSITIVE_DEPTH,
+    SHA_REGEX_PATTERN,
+    TRANSITIVE_SUMMARY_FORMAT,
+    UNPINNED_NESTED_ACTION_FORMAT,
+    WORKFLOW_FILE_EXTENSIONS,
+)
+from src.common.exceptions import GhaPinnerError, ResolutionError
+from src.retriever import fetch_file, resolve_action_sha, split_action
+from src.workflow_index import index_workflow
+
+# owner, repo, path in the repository, commit SHA
+Node = Tuple[str, str, str, str]
+
+
+def _manifest_paths(path: str) -> List[str]:
+    """The files that may define the action or reusable workflow at `path`"""
+    if path.lower().endswith(WORKFLOW_FILE_EXTENSIONS):
+        return [path]
+    return [posixpath.join(path, name) for name in ACTION_MANIFEST_FILES]
+
+
+def fetch_manifest(node: Node) -> Optional[str]:
+    """Fetch the manifest of an action or reusable workflow at a commit
+
+    Returns:
+        The manifest, or None if there is none (e.g. a Docker image)
+
+    Raises:
+        ResolutionError: If the manifest could not be fetched
+    """
+    owner, repo, path, sha = node
+    for manifest_path in _manifest_paths(path):
+        content = fetch_file(owner, repo, sha, manifest_path)
+        if content is not None:
+            return content
+    return None
+
+
+def find_nested_uses(content: str) -> List[str]:
+    """List the `uses:` of a manifest, other than local and Docker ones"""
+    return [
+        uses.value for uses in index_workflow(content).uses if split_action(uses.value)
+    ]
+
+
+def _expand(node: Node) -> List[Tuple[str, Optional[Node]]]:
+    """Find the actions a node uses, resolving the unpinned ones to a commit
+
+    Returns:
+        The nested actions with their node, None if it could not be resolved
+    """
+    try:
+        content = fetch_manifest(node)
+    except ResolutionError as e:
+        print(e)
+        return []
+    if content is None:
+        return []
+
+    children: List[Tuple[str, Optional[Node]]] = []
+    for uses in find_nested_uses(content):
+        owner, repo, path, ref = split_action(uses)
+        sha: Optional[str] = ref
+        if not re.match(SHA_REGEX_PATTERN, ref):
+            try:
+                sha = resolve_action_sha(uses)
+            except GhaPinnerError:
+                sha = None
+        children.append((uses, (owner, repo, path, sha) if sha else None))
+    return children
+
+
+def inspect_transitively(
+    roots: Iterable[Tuple[str, str]], workers: int = DEFAULT_RESOLVE_WORKERS
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Inspect the actions used, recursively, by the given ones
+
+    Args:
+        roots: (action, sha) pairs, the action being owner/repo[/path]@ref
+        workers: Maximum number of manifests fetched at once
+
+    Returns:
+        The number of actions and reusable workflows inspected, and the nested
+        actions found, with the chain of actions leading to them
+    """
+    frontier: Dict[Node, List[str]] = {}
+    for action, sha in roots:
+        parts = split_action(action)
+        if parts:
+            owner, repo, path, _ = parts
+            frontier.setdefault((owner, repo, path, sha), [action])
+
+    visited: Set[Node] = set()
+    found = []
+    for _ in range(MAX_TRANSITIVE_DEPTH):
+        nodes = [node for node in frontier if node not in visited]
+        if not nodes:
+            break
+        visited.update(nodes)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(nodes)))) as pool:
+            expanded = list(pool.map(_expand, nodes))
+
+        next_frontier: Dict[Node, List[str]] = {}
+        for node, children in zip(nodes, expanded):
+            for uses, child in children:
+                pinned = bool(re.match(SHA_REGEX_PATTERN, uses.rsplit("@", 1)[1]))
+                found.append(
+                    {
+                        "action": uses,
+                        "status": ActionStatus.ALREADY_PINNED
+                        if pinned
+                        else ActionStatus.NEEDS_PINNING,
+                        "via": frontier[node],
+                    }
+                )
+                if child is not None:
+                    next_frontier.setdefault(child, frontier[node] + [uses])
+        frontier = next_frontier
+
+    return len(visited), found
+
+
+def report_transitively(
+    roots: Iterable[Tuple[str, str]], workers: int = DEFAULT_RESOLVE_WORKERS
+) -> List[Dict[str, Any]]:
+    """Inspect the actions used by the given ones, printing the unpinned ones
+
+    Returns:
+        The unpinned nested actions
+    """
+    inspected, found = inspect_transitively(roots, workers)
+    unpinned = [
+        action for action in found if action["status"] == ActionStatus.NEEDS_PINNING
+    ]
+    for action in unpinned:
+        print(
+            UNPINNED_NESTED_ACTION_FORMAT.format(
+                action["action"], " → ".join(action["via"])
+            )
+        )
+    print(TRANSITIVE_SUMMARY_FORMAT.format(inspected, len(unpinned)))
+    return unpinned
+
+
+def roots_of(actions_found: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """The (action, sha) pairs of the resolved actions of workflow files
+
+    Container images and `docker://` actions, resolved to a digest rather than
+    a commit, are left out.
+    """
+    return [
+        (action["action"], action["sha"])
+        for action in actions_found
+        if action["status"] in (ActionStatus.NEEDS_PINNING, ActionStatus.ALREADY_PINNED)
+        and re.match(SHA_REGEX_PATTERN, action.get("sha") or "")
+        and split_action(action["action"]) is not None
+    ]
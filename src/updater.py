@@ -0,0 +1,296 @@
+"""
+Updating of already-pinned actions to newer tags.
+
+The version an action was pinned to is read from its trailing comment (as
+written when pinning). Each repository's tags are listed once, so a single
+listing serves every occurrence of its actions across all the files, and the
+SHA and the comment are rewritten together.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.common.constants import (
+    DEFAULT_RESOLVE_WORKERS,
+    ERROR_PROCESSING_FILE,
+    FILE_NOT_FOUND_ERROR,
+    LATEST_COMMENT_PATTERN,
+    NOT_WORKFLOW_FILE_ERROR,
+    SUCCESS_UPDATE_MESSAGE,
+    UPDATE_AVAILABLE_FORMAT,
+    VERSION_TAG_PATTERN,
+    WORKFLOW_FILE_EXTENSIONS,
+)
+from src.common.exceptions import ResolutionError
+from src.common.update_policy import UpdatePolicy
+from src.editor import iter_workflow_files
+from src.retriever import list_tags
+from src.workflow_index import (
+    Edit,
+    apply_edits,
+    index_workflow,
+    replace_value,
+    set_comment,
+    split_pinned,
+)
+
+Repo = Tuple[str, str]
+# The (tag, sha) pairs of each repository, or None if they could not be listed
+TagLists = Dict[Repo, Optional[List[Tuple[str, str]]]]
+
+
+def parse_version(tag: str) -> Optional[Tuple[int, ...]]:
+    """Parse a version tag such as v4, v4.1 or 4.1.2
+
+    Returns:
+        The numeric components of the version, or None if the tag is not a plain
+        version (e.g. a pre-release or a branch name)
+    """
+    matched = re.match(VERSION_TAG_PATTERN, tag)
+    if not matched:
+        return None
+    return tuple(int(part) for part in matched.groups() if part is not None)
+
+
+def _padded(version: Tuple[int, ...]) -> Tuple[int, ...]:
+    return version + (0,) * (3 - len(version))
+
+
+def _allowed(
+    current: Tuple[int, ...], candidate: Tuple[int, ...], policy: UpdatePolicy
+) -> bool:
+    current, candidate = _padded(current), _padded(candidate)
+    if candidate < current:
+        return False
+    if policy == UpdatePolicy.MINOR:
+        return candidate[0] == current[0]
+    if policy == UpdatePolicy.PATCH:
+        return candidate[:2] == current[:2]
+    return True
+
+
+def select_tag(
+    current_tag: str, tags: Iterable[Tuple[str, str]], policy: UpdatePolicy
+) -> Optional[Tuple[str, str]]:
+    """Pick the newest tag the action may be updated to
+
+    Only tags written like the current one are considered (same number of
+    components, same 'v' prefix), so that e.g. an action pinned to v4 follows
+    the v4 or v5 tags rather than v4.2.1.
+
+    Returns:
+        The (tag, sha) to update to, possibly the current tag if it has moved,
+        or None if the current tag is not a version
+    """
+    current = parse_version(current_tag)
+    if current is None:
+        return None
+
+    prefixed = current_tag.startswith("v")
+    best: Optional[Tuple[Tuple[int, ...], str, str]] = None
+    for name, sha in tags:
+        version = parse_version(name)
+        if (
+            version is None
+            or len(version) != len(current)
+            or name.startswith("v") != prefixed
+            or not _allowed(current, version, policy)
+        ):
+            continue
+        if best is None or version > best[0]:
+            best = (version, name, sha)
+    return (best[1], best[2]) if best else None
+
+
+def split_comment(comment: str) -> Tuple[str, str]:
+    """Split a pin comment into its version and the format to write a new one in
+
+    Returns:
+        (version, format), e.g. ('v4.1.0', 'latest ({})') for 'latest (v4.1.0)'
+    """
+    latest = re.match(LATEST_COMMENT_PATTERN, comment)
+    if latest:
+        return latest.group(1), "latest ({})"
+    version, _, rest = comment.partition(" ")
+    return version, "{} " + rest if rest else "{}"
+
+
+def repo_of(action_base: str) -> Repo:
+    owner, repo = action_base.split("/")[:2]
+    return owner, repo
+
+
+def find_pinned_repos(content: str) -> List[Repo]:
+    """List the repositories of the pinned actions with a version comment
+
+    Actions whose comment is not a version (e.g. a note, or a branch name) are
+    left out, since they cannot be updated and their tags need no listing.
+    """
+    repos = []
+    for uses in index_workflow(content).uses:
+        pinned = split_pinned(uses)
+        if (
+            pinned
+            and uses.comment
+            and parse_version(split_comment(uses.comment)[0]) is not None
+        ):
+            repos.append(repo_of(pinned[0]))
+    return list(dict.fromkeys(repos))
+
+
+def update_workflow_content(
+    content: str, policy: UpdatePolicy, tag_lists: TagLists
+) -> Tuple[str, List[Dict[str, str]]]:
+    """Update the pinned actions of the workflow content, without printing
+
+    Args:
+        content: The workflow file content
+        policy: How far actions may be updated
+        tag_lists: The tags of each repository, see `fetch_tag_lists`
+
+    Returns:
+        Tuple containing:
+        - Updated content
+        - List of updates, with the action, its current and new tag and SHA
+    """
+    updates = []
+    edits: List[Edit] = []
+    for uses in index_workflow(content).uses:
+        pinned = split_pinned(uses)
+        if not pinned or not uses.comment:
+            continue
+        action_base, sha = pinned
+        tags = tag_lists.get(repo_of(action_base))
+        if not tags:
+            continue
+
+        tag, comment_format = split_comment(uses.comment)
+        selected = select_tag(tag, tags, policy)
+        if selected is None or selected[1] == sha:
+            continue
+
+        new_tag, new_sha = selected
+        new_comment = comment_format.format(new_tag)
+        updates.append(
+            {
+                "action": f"{action_base}@{sha}",
+                "tag": uses.comment,
+                "new_tag": new_comment,
+                "sha": new_sha,
+            }
+        )
+        edits.append(replace_value(uses, f"{action_base}@{new_sha}"))
+        edits.append(set_comment(uses, new_comment, keep_existing=False))
+    return apply_edits(content, edits), updates
+
+
+def _list_tags_or_print(repo: Repo) -> Optional[List[Tuple[str, str]]]:
+    try:
+        return list_tags(*repo)
+    except ResolutionError as e:
+        print(e)
+        return None
+
+
+def fetch_tag_lists(
+    repos: Sequence[Repo], workers: int = DEFAULT_RESOLVE_WORKERS
+) -> TagLists:
+    """List the tags of each repository once, concurrently
+
+    Errors are printed once per repository, and the repository mapped to None.
+    """
+    unique = list(dict.fromkeys(repos))
+    if workers <= 1 or len(unique) <= 1:
+        return {repo: _list_tags_or_print(repo) for repo in unique}
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(unique))) as pool:
+        return dict(zip(unique, pool.map(_list_tags_or_print, unique)))
+
+
+def _iter_files(paths: Iterable[str]) -> Iterable[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            yield from iter_workflow_files(path)
+        elif not os.path.exists(path):
+            print(FILE_NOT_FOUND_ERROR.format(path))
+        elif not path.lower().endswith(WORKFLOW_FILE_EXTENSIONS):
+            print(NOT_WORKFLOW_FILE_ERROR.format(path))
+        else:
+            yield path
+
+
+def read_file(file: str) -> Optional[str]:
+    try:
+        with open(file, "r", newline="") as f:
+            return f.read()
+    except OSError as e:
+        print(ERROR_PROCESSING_FILE.format(file, e))
+        return None
+
+
+def update_file(
+    file: str, policy: UpdatePolicy, tag_lists: TagLists, validate_only: bool
+) -> List[Dict[str, str]]:
+    """Update the pinned actions of a workflow file
+
+    Args:
+        validate_only: If True, only report the updates without modifying the file
+
+    Returns:
+        List of updates available or made
+    """
+    content = read_file(file)
+    if content is None:
+        return []
+
+    updated_content, updates = update_workflow_content(content, policy, tag_lists)
+    if validate_only:
+        for update in updates:
+            print(
+                UPDATE_AVAILABLE_FORMAT.format(
+                    update["action"],
+                    update["tag"],
+                    update["action"].rsplit("@", 1)[0],
+                    update["sha"],
+                    update["new_tag"],
+                )
+            )
+    elif updates:
+        try:
+            with open(file, "w", newline="") as f:
+                f.write(updated_content)
+        except OSError as e:
+            print(ERROR_PROCESSING_FILE.format(file, e))
+            return []
+        print(SUCCESS_UPDATE_MESSAGE.format(len(updates), file))
+    return updates
+
+
+def update_paths(
+    paths: Sequence[str],
+    policy: UpdatePolicy = UpdatePolicy.MINOR,
+    validate_only: bool = False,
+    workers: int = DEFAULT_RESOLVE_WORKERS,
+) -> Tuple[int, TagLists, List[Dict[str, str]]]:
+    """Update the pinned actions of workflow files and directories
+
+    The files are read twice: once to gather the repositories whose tags to
+    list, and once to update them, so that memory does not grow with the tree.
+
+    Returns:
+        (number of files, tag listings, updates available or made)
+    """
+    files = list(dict.fromkeys(_iter_files(paths)))
+    repos: List[Repo] = []
+    for file in files:
+        content = read_file(file)
+        if content is not None:
+            repos.extend(find_pinned_repos(content))
+
+    tag_lists = fetch_tag_lists(repos, workers)
+    updates = []
+    for file in files:
+        updates.extend(update_file(file, policy, tag_lists, validate_only))
+    return len(files), tag_lists, updates
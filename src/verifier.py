@@ -0,0 +1,216 @@
+"""
+Verification of already-pinned actions against their version comments.
+
+A pinned line such as `uses: actions/checkout@<sha> # v4` can disagree with the
+commit v4 points to, or the SHA can come from a fork (GitHub serves the
+commits of forks through their parent repository). Each repository's tags and
+branches are listed once for all of its occurrences, and only the SHAs found
+in neither listing cost a request of their own, to check their ancestry.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from src.common.constants import (
+    DEFAULT_RESOLVE_WORKERS,
+    DRIFTED_ACTION_FORMAT,
+    UNREACHABLE_ACTION_FORMAT,
+    UNVERIFIABLE_ACTION_FORMAT,
+    VERIFY_SUMMARY_FORMAT,
+    WORKFLOW_FILE_EXTENSIONS,
+)
+from src.common.exceptions import ResolutionError
+from src.common.verify_status import VerifyStatus
+from src.retriever import (
+    get_default_branch,
+    is_commit_reachable,
+    list_branches,
+    list_tags,
+)
+from src.updater import Repo, read_file, repo_of, split_comment
+from src.workflow_index import index_workflow, split_pinned
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class RepoRefs:
+    """The tags and branches of a repository, with their commit SHAs"""
+
+    tags: Dict[str, str]
+    branches: Dict[str, str]
+
+    @property
+    def shas(self) -> Set[str]:
+        return set(self.tags.values()) | set(self.branches.values())
+
+
+def _map(func: Callable[[T], R], items: Sequence[T], workers: int) -> List[R]:
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def _fetch_refs(repo: Repo) -> Optional[RepoRefs]:
+    try:
+        return RepoRefs(dict(list_tags(*repo)), dict(list_branches(*repo)))
+    except ResolutionError as e:
+        print(e)
+        return None
+
+
+def _check_reachable(check: Tuple[Repo, str, Optional[str]]) -> Optional[bool]:
+    (owner, repo), sha, base = check
+    try:
+        return is_commit_reachable(
+            owner, repo, sha, base or get_default_branch(owner, repo)
+        )
+    except ResolutionError as e:
+        print(e)
+        return None
+
+
+def _known_ref(ref: Optional[str], refs: RepoRefs) -> Optional[str]:
+    """Return the ref if it is a tag or branch of the repository"""
+    return ref if ref in refs.tags or ref in refs.branches else None
+
+
+def find_pinned_actions(file: str, content: str) -> List[Dict[str, Any]]:
+    """List the actions pinned to a SHA in the workflow content
+
+    Returns:
+        The pinned actions, with the ref named in their comment if any
+    """
+    pinned = []
+    for uses in index_workflow(content).uses:
+        parts = split_pinned(uses)
+        if not parts:
+            continue
+        action_base, sha = parts
+        pinned.append(
+            {
+                "file": file,
+                "action": f"{action_base}@{sha}",
+                "repo": repo_of(action_base),
+                "sha": sha,
+                "ref": split_comment(uses.comment)[0] if uses.comment else None,
+                "line": uses.line,
+            }
+        )
+    return pinned
+
+
+def verify_pinned_actions(
+    pinned: List[Dict[str, Any]], workers: int = DEFAULT_RESOLVE_WORKERS
+) -> List[Dict[str, Any]]:
+    """Verify pinned actions, as found by `find_pinned_actions`
+
+    An action is drifted if the tag in its comment points to another commit, and
+    unreachable if its commit is not an ancestor of the ref in its comment (or
+    of the default branch if the comment names no known ref).
+
+    Returns:
+        The actions, with their status and the SHA their comment points to
+    """
+    repos = list(dict.fromkeys(action["repo"] for action in pinned))
+    refs_by_repo = dict(zip(repos, _map(_fetch_refs, repos, workers)))
+
+    # Only the commits that are not the target of a ref need their own request
+    checks: List[Tuple[Repo, str, Optional[str]]] = []
+    for action in pinned:
+        refs = refs_by_repo[action["repo"]]
+        if refs is None or action["sha"] in refs.shas:
+            continue
+        checks.append((action["repo"], action["sha"], _known_ref(action["ref"], refs)))
+    checks = list(dict.fromkeys(checks))
+    reachable = dict(zip(checks, _map(_check_reachable, checks, workers)))
+
+    results = []
+    for action in pinned:
+        refs = refs_by_repo[action["repo"]]
+        expected = refs.tags.get(action["ref"]) if refs and action["ref"] else None
+        if refs is None:
+            status = VerifyStatus.UNVERIFIABLE
+        else:
+            found = action["sha"] in refs.shas or reachable.get(
+                (action["repo"], action["sha"], _known_ref(action["ref"], refs))
+            )
+            if found is None:
+                status = VerifyStatus.UNVERIFIABLE
+            elif not found:
+                status = VerifyStatus.UNREACHABLE
+            elif expected and expected != action["sha"]:
+                status = VerifyStatus.DRIFTED
+            else:
+                status = VerifyStatus.VERIFIED
+        results.append({**action, "status": status, "expected_sha": expected})
+    return results
+
+
+def verify_files(
+    files: Sequence[str], workers: int = DEFAULT_RESOLVE_WORKERS
+) -> List[Dict[str, Any]]:
+    """Verify the pinned actions of workflow files, printing the failures
+
+    Missing files and files that are not workflows are skipped, as they are
+    reported when processed.
+
+    Returns:
+        The verified actions, see `verify_pinned_actions`
+    """
+    pinned = []
+    for file in files:
+        if not os.path.isfile(file) or not file.lower().endswith(
+            WORKFLOW_FILE_EXTENSIONS
+        ):
+            continue
+        content = read_file(file)
+        if content is not None:
+            pinned.extend(find_pinned_actions(file, content))
+
+    results = verify_pinned_actions(pinned, workers)
+    for result in results:
+        owner, repo = result["repo"]
+        location = f"{result['file']}:{result['line']}"
+        if result["status"] == VerifyStatus.DRIFTED:
+            print(
+                DRIFTED_ACTION_FORMAT.format(
+                    result["action"],
+                    location,
+                    result["ref"],
+                    result["expected_sha"],
+                )
+            )
+        elif result["status"] == VerifyStatus.UNREACHABLE:
+            print(
+                UNREACHABLE_ACTION_FORMAT.format(
+                    result["action"], location, owner, repo
+                )
+            )
+        elif result["status"] == VerifyStatus.UNVERIFIABLE:
+            print(UNVERIFIABLE_ACTION_FORMAT.format(result["action"], location))
+
+    counts = {status: 0 for status in VerifyStatus}
+    for result in results:
+        counts[result["status"]] += 1
+    print(
+        VERIFY_SUMMARY_FORMAT.format(
+            len(results),
+            counts[VerifyStatus.DRIFTED],
+            counts[VerifyStatus.UNREACHABLE],
+            counts[VerifyStatus.UNVERIFIABLE],
+        )
+    )
+    return results
+
+
+def has_failures(results: List[Dict[str, Any]]) -> bool:
+    """Tell whether any pinned action drifted or is unreachable"""
+    return any(
+        result["status"] in (VerifyStatus.DRIFTED, VerifyStatus.UNREACHABLE)
+        for result in results
+    )
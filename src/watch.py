@@ -0,0 +1,206 @@
+"""
+Watching of a directory for changes to its workflow files.
+
+On Linux, changes are reported by inotify (through ctypes, so no dependency is
+needed). Elsewhere, or if inotify is unavailable, the directory is polled for
+modification times instead. Since the watching process is long-lived, the HTTP
+session and the resolution cache stay warm between changes.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.common.constants import (
+    WATCH_DEBOUNCE,
+    WATCH_POLL_INTERVAL,
+    WATCH_STOP_CHECK_INTERVAL,
+    WORKFLOW_FILE_EXTENSIONS,
+)
+from src.editor import iter_workflow_files
+
+# inotify(7) flags
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+# struct inotify_event header: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Watcher(ABC):
+    """Reports the workflow files changed in a directory"""
+
+    name = ""
+
+    @abstractmethod
+    def wait(self, timeout: float) -> Set[str]:
+        """Wait up to `timeout` seconds for changes
+
+        Returns:
+            The workflow files created or modified since the previous call
+        """
+
+    def close(self) -> None:
+        """Release what the watcher holds (e.g. its inotify descriptor)"""
+
+
+class PollingWatcher(Watcher):
+    """Compares the modification times of the workflow files at an interval"""
+
+    name = "polling"
+
+    def __init__(self, dir: str, interval: float = WATCH_POLL_INTERVAL) -> None:
+        self.dir = dir
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for file in iter_workflow_files(self.dir):
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            snapshot[file] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {
+            file
+            for file, signature in snapshot.items()
+            if self._snapshot.get(file) != signature
+        }
+        self._snapshot = snapshot
+        return changed
+
+
+class InotifyWatcher(Watcher):
+    """Receives the changes from the Linux kernel, with no rescanning"""
+
+    name = "inotify"
+
+    def __init__(self, dir: str) -> None:
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dir = dir
+        self._dirs: Dict[int, str] = {}
+        try:
+            self._add_tree(dir)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, dir: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed on {dir}")
+        self._dirs[wd] = dir
+        for entry in os.scandir(dir):
+            if entry.is_dir(follow_symlinks=False):
+                self._add_tree(entry.path)
+
+    def _read_events(self) -> Set[str]:
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            start = offset + _EVENT_HEADER.size
+            name = os.fsdecode(buffer[start : start + length].rstrip(b"\0"))
+            offset = start + length
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped, so consider every file changed
+                changed.update(iter_workflow_files(self.dir))
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    try:
+                        self._add_tree(path)
+                    except OSError:
+                        continue
+                    changed.update(iter_workflow_files(path))
+            elif path.lower().endswith(WORKFLOW_FILE_EXTENSIONS):
+                # Creations count too, so that a file still being written
+                # keeps the burst going until it is closed
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return self._read_events() if readable else set()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(dir: str, poll: bool = False) -> Watcher:
+    """Watch the directory with inotify if available, by polling otherwise"""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dir)
+        except (OSError, AttributeError):
+            # AttributeError: the C library has no inotify functions
+            pass
+    return PollingWatcher(dir)
+
+
+def watch(
+    watcher: Watcher,
+    on_change: Callable[[List[str]], None],
+    debounce: float = WATCH_DEBOUNCE,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Call `on_change` with the workflow files changed, until `stop` is set
+
+    A burst of changes (e.g. an editor saving several files, or writing a file
+    in several steps) is reported once, after `debounce` seconds without any
+    further change.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        changed = watcher.wait(WATCH_STOP_CHECK_INTERVAL)
+        if not changed:
+            continue
+
+        while not stop.is_set():
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            changed |= more
+
+        existing = sorted(file for file in changed if os.path.isfile(file))
+        if existing:
+            on_change(existing)
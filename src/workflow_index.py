@@ -0,0 +1,307 @@
+"""
+Index of the `uses:` values and container images of a workflow file.
+
+The index is built in a single linear pass over the lines, without loading the
+YAML: only what a YAML parser would read as a value is indexed, so comments and
+the content of block scalars (e.g. `run: |` scripts) and of quoted values
+spanning several lines are skipped, and quoted values are unquoted. Flow
+collections are read as long as they close on their line (e.g.
+`- { uses: actions/checkout@v4 }`). Each value is located by line, column and
+offsets, with its quoting style and trailing comment, so that rewrites only
+touch its span.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from src.common.constants import (
+    BLOCK_SCALAR_PATTERN,
+    FLOW_COLLECTION_PATTERN,
+    FLOW_KEY_PATTERN,
+    MAPPING_KEY_PATTERN,
+    SHA_REGEX_PATTERN,
+    TRAILING_COMMENT_PATTERN,
+)
+
+# (start, end, replacement) of a change to the content
+Edit = Tuple[int, int, str]
+
+_KEY = re.compile(MAPPING_KEY_PATTERN)
+_FLOW_COLLECTION = re.compile(FLOW_COLLECTION_PATTERN)
+_FLOW_KEY = re.compile(FLOW_KEY_PATTERN)
+_BLOCK_SCALAR = re.compile(BLOCK_SCALAR_PATTERN)
+_TRAILING_COMMENT = re.compile(TRAILING_COMMENT_PATTERN)
+
+
+@dataclass(frozen=True)
+class IndexedValue:
+    """A scalar value of the workflow, with its location"""
+
+    key: str  # uses, container or image
+    value: str  # Without its quotes
+    line: int  # 1-based
+    column: int  # 1-based, of the opening quote if quoted
+    start: int  # Offset of the value in the content, quotes excluded
+    end: int
+    quote: str  # "", "'" or '"'
+    comment: Optional[str]  # Trailing comment, without its '#'
+    comment_start: int  # Offset of the trailing comment, or where to add one
+
+
+@dataclass
+class WorkflowIndex:
+    """The `uses:` values and the container images of a workflow"""
+
+    uses: List[IndexedValue] = field(default_factory=list)
+    # The images of job containers (container: image, or its image:) and services
+    images: List[IndexedValue] = field(default_factory=list)
+    # `uses:` values sharing a line with another one, in a flow collection, which
+    # cannot be given a comment each
+    shared_line_uses: List[IndexedValue] = field(default_factory=list)
+
+
+def _read_comment(line: str, after: int) -> Tuple[Optional[str], int]:
+    """Read the trailing comment following position `after` of the line
+
+    Returns:
+        The comment, without its '#', and where it starts (or where to add one)
+    """
+    matched = _TRAILING_COMMENT.match(line, after)
+    if not matched:
+        return None, after
+    if not matched.group(1):
+        # An empty comment is written to right after its '#'
+        return "", line.index("#", after) + 1
+    return matched.group(1), matched.start(1)
+
+
+def _closing_quote(line: str, quote: str, start: int) -> int:
+    """Find the quote closing a quoted value from position `start` of the line,
+    skipping escaped ones (\\" in double quotes, '' in single quotes)
+
+    Returns:
+        Its position, or -1 if the value continues on the next line
+    """
+    end = line.find(quote, start)
+    while end >= 0:
+        if quote == '"' and end > start and line[end - 1] == "\\":
+            end = line.find(quote, end + 1)
+        elif quote == "'" and line.startswith("''", end):
+            end = line.find(quote, end + 2)
+        else:
+            break
+    return end
+
+
+def _read_value(
+    key: str, line: str, position: int, line_number: int, offset: int
+) -> Optional[IndexedValue]:
+    """Read the value starting at `position` of the line, which starts at `offset`"""
+    quote = line[position] if line[position] in "'\"" else ""
+    if quote:
+        end = _closing_quote(line, quote, position + 1)
+        if end < 0:
+            # A quoted value spanning several lines
+            return None
+        start, after = position + 1, end + 1
+    else:
+        # A plain value runs until a comment or the end of the line
+        start = position
+        comment = _TRAILING_COMMENT.search(line, position)
+        end = comment.start() if comment else len(line.rstrip())
+        after = end
+
+    comment, comment_start = _read_comment(line, after)
+    return IndexedValue(
+        key=key,
+        value=line[start:end],
+        line=line_number,
+        column=position + 1,
+        start=offset + start,
+        end=offset + end,
+        quote=quote,
+        comment=comment,
+        comment_start=offset + comment_start,
+    )
+
+
+def _read_flow_values(
+    line: str, position: int, line_number: int, offset: int
+) -> Optional[List[IndexedValue]]:
+    """Read the values of the flow collection starting at `position` of the line
+
+    Their trailing comment is the one following the collection, which has to
+    close on the same line.
+
+    Returns:
+        The values, or None if the collection spans several lines
+    """
+    comment = _TRAILING_COMMENT.search(line, position)
+    end = comment.start() if comment else len(line.rstrip())
+    if line[end - 1] not in "}]":
+        return None
+    comment_text, comment_start = _read_comment(line, end)
+
+    values = []
+    key = _FLOW_KEY.search(line, position, end)
+    while key:
+        start = key.end()
+        if line[start] in "{[":
+            # A nested collection, whose keys are read next
+            key = _FLOW_KEY.search(line, start, end)
+            continue
+        quote = line[start] if line[start] in "'\"" else ""
+        if quote:
+            value_end = line.find(quote, start + 1)
+            if value_end < 0:
+                return None
+            value_start, after = start + 1, value_end + 1
+        else:
+            value_start = after = start
+            while after < end and line[after] not in ",}]":
+                after += 1
+            value_end = len(line[:after].rstrip())
+        key_name = key.group(1)
+        key = _FLOW_KEY.search(line, after, end)
+        values.append(
+            IndexedValue(
+                key=key_name,
+                value=line[value_start:value_end],
+                line=line_number,
+                column=start + 1,
+                start=offset + value_start,
+                end=offset + value_end,
+                quote=quote,
+                comment=comment_text,
+                comment_start=offset + comment_start,
+            )
+        )
+    return values
+
+
+def index_workflow(content: str) -> WorkflowIndex:
+    """Index the `uses:` values and container images of the workflow content"""
+    index = WorkflowIndex()
+    # Lines indented deeper than the key of a block scalar belong to it, as
+    # lines indented deeper than `container:` or `services:` to their mapping
+    scalar_indent: Optional[int] = None
+    container_indent: Optional[int] = None
+    # The quote of a quoted value continued on the next lines, until it closes
+    open_quote: Optional[str] = None
+
+    offset = 0
+    for line_number, raw_line in enumerate(content.splitlines(keepends=True), 1):
+        line_offset, offset = offset, offset + len(raw_line)
+        line = raw_line.rstrip("\r\n")
+        if open_quote is not None:
+            if _closing_quote(line, open_quote, 0) >= 0:
+                open_quote = None
+            continue
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        indent = len(line) - len(stripped)
+        if scalar_indent is not None:
+            if indent > scalar_indent:
+                continue
+            scalar_indent = None
+        if stripped.startswith("#"):
+            continue
+        if container_indent is not None and indent <= container_indent:
+            container_indent = None
+
+        flow = _FLOW_COLLECTION.match(line)
+        if flow:
+            in_container = container_indent is not None or flow.group(1) in (
+                "container",
+                "services",
+            )
+            values = _read_flow_values(line, flow.end() - 1, line_number, line_offset)
+            uses = [value for value in values or () if value.key == "uses"]
+            if len(uses) > 1:
+                index.shared_line_uses.extend(uses)
+            else:
+                index.uses.extend(uses)
+            if in_container:
+                index.images.extend(
+                    value for value in values or () if value.key == "image"
+                )
+            continue
+
+        matched = _KEY.match(line)
+        if not matched:
+            continue
+        key, column, position = matched.group(1), matched.start(1), matched.end()
+        if _BLOCK_SCALAR.match(line, position):
+            scalar_indent = column
+            continue
+        if position == len(line) or line[position] == "#":
+            if key in ("container", "services"):
+                container_indent = column
+            continue
+        if (
+            line[position] in "'\""
+            and _closing_quote(line, line[position], position + 1) < 0
+        ):
+            open_quote = line[position]
+            continue
+
+        if key == "uses":
+            target = index.uses
+        elif key == "container" or (key == "image" and container_indent is not None):
+            target = index.images
+        else:
+            continue
+        value = _read_value(key, line, position, line_number, line_offset)
+        if value is not None:
+            target.append(value)
+    return index
+
+
+def split_pinned(uses: IndexedValue) -> Optional[Tuple[str, str]]:
+    """Split a `uses:` value pinned to a commit into its owner/repo[/path] and SHA
+
+    Returns:
+        (action, sha), or None if the value is not pinned to a commit
+    """
+    action_base, _, ref = uses.value.rpartition("@")
+    if "/" not in action_base or not re.match(SHA_REGEX_PATTERN, ref):
+        return None
+    return action_base, ref
+
+
+def apply_edits(content: str, edits: Iterable[Edit]) -> str:
+    """Apply non-overlapping edits to the content, in a single pass"""
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: edit[:2]):
+        parts.append(content[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(content[position:])
+    return "".join(parts)
+
+
+def replace_value(value: IndexedValue, replacement: str) -> Edit:
+    """Replace the value, keeping its quotes"""
+    return value.start, value.end, replacement
+
+
+def set_comment(value: IndexedValue, comment: str, keep_existing: bool) -> Edit:
+    """Set the trailing comment of the value
+
+    Args:
+        keep_existing: If True, prefix the existing comment (e.g. '# v4 note'
+            for 'v4' and '# note') rather than replacing it, unless it already
+            starts with the comment
+    """
+    if value.comment is None:
+        return value.comment_start, value.comment_start, f" # {comment}"
+    if not value.comment:
+        return value.comment_start, value.comment_start, f" {comment}"
+    if keep_existing:
+        if f"{value.comment} ".startswith(f"{comment} "):
+            return value.comment_start, value.comment_start, ""
+        return value.comment_start, value.comment_start, f"{comment} "
+    return value.comment_start, value.comment_start + len(value.comment), comment